@@ -0,0 +1,200 @@
+"""
+Admission Control - 동시 처리 수 제한과 대기열로 과부하 시 요청을 빠르게 거절
+
+동시에 실행되는 파이프라인 수를 제한하고, 초과한 요청은 제한된 크기의 대기열에서 기다립니다.
+대기열이 가득 차면 429, 대기 시간이 목표를 넘으면 503으로 즉시 거절하고
+예상 대기 시간을 Retry-After로 알려줍니다. 이미 목표 이상 대기 중인 요청이 있으면
+새 요청은 대기열에 넣지 않고 바로 거절해, 승인된 요청의 지연 시간이 유지되도록 합니다.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+import metrics
+from config import Config
+
+
+class AdmissionRejected(Exception):
+    """과부하로 요청 거절"""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionPermit:
+    """승인된 요청의 실행 권한 (release는 여러 번 호출해도 한 번만 반영)"""
+
+    def __init__(self, controller: "AdmissionController", slots: int):
+        self.controller = controller
+        self.slots = slots
+        self.started = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        self.controller._release(self.slots, time.monotonic() - self.started)
+
+
+class AdmissionController:
+    """동시 처리 수 제한 + 제한된 FIFO 대기열 (이벤트 루프 안에서 사용)"""
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        max_queue_wait: Optional[float] = None,
+        retry_after_max: Optional[int] = None
+    ):
+        self.max_concurrency = max_concurrency if max_concurrency is not None else Config.ADMISSION_MAX_CONCURRENCY
+        self.max_queue = max_queue if max_queue is not None else Config.ADMISSION_MAX_QUEUE
+        self.max_queue_wait = max_queue_wait if max_queue_wait is not None else Config.ADMISSION_MAX_QUEUE_WAIT
+        self.retry_after_max = retry_after_max if retry_after_max is not None else Config.ADMISSION_RETRY_AFTER_MAX
+
+        self._in_flight = 0
+        # (대기 future, 필요 슬롯 수, 대기 시작 시각)
+        self._waiters: Deque[Tuple[asyncio.Future, int, float]] = deque()
+        # 요청 처리 시간 지수 이동 평균 (Retry-After 추정용)
+        self._service_time = 1.0
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = {"queue_full": 0, "queue_wait": 0, "overloaded": 0}
+
+    @property
+    def enabled(self) -> bool:
+        """동시 처리 수 제한 사용 여부 (0 이하이면 비활성화)"""
+        return self.max_concurrency > 0
+
+    @asynccontextmanager
+    async def admit(self, slots: int = 1) -> AsyncIterator[AdmissionPermit]:
+        """
+        승인 후 블록 실행, 종료 시 슬롯 반환
+
+        Args:
+            slots: 사용할 동시 처리 슬롯 수 (배치 요청 등)
+
+        Raises:
+            AdmissionRejected: 과부하로 거절된 경우
+        """
+        permit = await self.acquire(slots)
+        try:
+            yield permit
+        finally:
+            permit.release()
+
+    async def acquire(self, slots: int = 1) -> AdmissionPermit:
+        """
+        실행 권한 획득 (필요하면 대기열에서 대기)
+
+        Args:
+            slots: 사용할 동시 처리 슬롯 수
+
+        Returns:
+            실행 권한 (처리 후 release 호출 필요)
+
+        Raises:
+            AdmissionRejected: 대기열이 가득 찼거나(429) 대기 시간이 목표를 넘은 경우(503)
+        """
+        if not self.enabled:
+            return AdmissionPermit(self, 0)
+
+        slots = max(1, min(slots, self.max_concurrency))
+        now = time.monotonic()
+
+        if not self._waiters and self._in_flight + slots <= self.max_concurrency:
+            return self._grant(slots, 0.0)
+
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full", 429, "요청이 너무 많습니다. 잠시 후 다시 시도해주세요.")
+
+        # 이미 목표 이상 기다리는 요청이 있으면 대기열이 해소되지 않는 상태이므로 바로 거절
+        if self._waiters and now - self._waiters[0][2] >= self.max_queue_wait:
+            raise self._reject("overloaded", 503, "서버가 과부하 상태입니다. 잠시 후 다시 시도해주세요.")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, slots, now)
+        self._waiters.append(entry)
+        self.queued += 1
+        metrics.set_admission_queue(len(self._waiters))
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_queue_wait)
+        except asyncio.TimeoutError:
+            if not future.done():
+                self._abandon(entry)
+                raise self._reject("queue_wait", 503, "대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 승인과 동시에 호출자가 취소된 경우 슬롯 반환
+                self._release(slots, None)
+            else:
+                self._abandon(entry)
+            raise
+
+        return self._admitted(slots, time.monotonic() - now)
+
+    def _abandon(self, entry: Tuple[asyncio.Future, int, float]):
+        """승인되지 않은 대기 요청을 대기열에서 제거 (앞 요청이 빠지면 다음 요청 승인 가능)"""
+        entry[0].cancel()
+        self._waiters.remove(entry)
+        self._wake()
+
+    def _grant(self, slots: int, waited: float) -> AdmissionPermit:
+        self._in_flight += slots
+        return self._admitted(slots, waited)
+
+    def _admitted(self, slots: int, waited: float) -> AdmissionPermit:
+        self.admitted += 1
+        metrics.observe_admission_wait(waited)
+        return AdmissionPermit(self, slots)
+
+    def _release(self, slots: int, service_time: Optional[float]):
+        """슬롯 반환 후 대기 중인 요청 승인"""
+        self._in_flight -= slots
+        if service_time is not None:
+            self._service_time = 0.9 * self._service_time + 0.1 * service_time
+        self._wake()
+
+    def _wake(self):
+        """대기열 앞에서부터 슬롯이 허용하는 만큼 승인 (FIFO)"""
+        while self._waiters:
+            future, slots, _ = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if self._in_flight + slots > self.max_concurrency:
+                break
+            self._waiters.popleft()
+            self._in_flight += slots
+            future.set_result(None)
+        metrics.set_admission_queue(len(self._waiters))
+
+    def _reject(self, reason: str, status_code: int, message: str) -> AdmissionRejected:
+        self.rejected[reason] += 1
+        metrics.observe_admission_rejected(reason)
+        return AdmissionRejected(status_code, message, self.retry_after())
+
+    def retry_after(self) -> int:
+        """현재 대기열이 해소될 때까지의 예상 시간 (초, 1 ~ retry_after_max)"""
+        estimate = self._service_time * (len(self._waiters) + 1) / max(1, self.max_concurrency)
+        return max(1, min(self.retry_after_max, math.ceil(estimate)))
+
+    def stats(self) -> Dict[str, Any]:
+        """승인 / 거절 통계"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "queue_length": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": dict(self.rejected),
+            "avg_service_time": round(self._service_time, 4),
+        }
@@ -1,8 +1,13 @@
 """
 Main AI Agent - 모든 컴포넌트를 통합하는 핵심 에이전트
 """
+import asyncio
+import contextvars
 import time
-from typing import List, Dict, Any
+from contextlib import aclosing, contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Tuple, Callable, Awaitable, Optional, AsyncIterator
+from config import Config
 from models import (
     QueryRequest, EnhancedQuery, ActionDecision, 
     AgentResponse, SearchResult, ActionType
@@ -10,22 +15,73 @@ from models import (
 from gemini_client import GeminiClient
 from web_search_handler import WebSearchHandler
 from realtime_api_handler import RealtimeAPIHandler
+from vector_db_handler import VectorDBHandler
+from text_utils import jaccard_similarity
+from cache import make_key
+from context_builder import AnswerContext, ContextBuilder
+from dedup import ResultDeduplicator
+from reranker import ResultReranker
+from semantic_cache import SemanticCache
+import metrics
+import resilience
+import tracing
+from resilience import CircuitOpenError, UpstreamThrottled
+from intent_classifier import IntentClassifier, classification_text, flush_decisions, record_decision
 
 
 class AIAgent:
     """AI 에이전트 메인 클래스"""
     
+    PLANNER_MODES = ("two_step", "single")
+    
+    # 로컬 지식 베이스 문서만으로 답할 수 없을 때 최종 답변 대신 출력하도록 요청하는 표시
+    LOCAL_KB_INSUFFICIENT = "NEED_WEB_SEARCH"
+    
     def __init__(self):
         """에이전트 초기화"""
         print("AI Agent 초기화 중...")
         
+        self.planner_mode = Config.PLANNER_MODE
+        if self.planner_mode not in self.PLANNER_MODES:
+            raise ValueError(f"지원하지 않는 PLANNER_MODE입니다: {self.planner_mode}")
+        
         # 각 핸들러 초기화
         self.gemini_client = GeminiClient()
+        self.intent_classifier = (
+            IntentClassifier.load_or_train(Config.INTENT_MODEL_PATH, Config.INTENT_LOG_PATH)
+            if Config.INTENT_CLASSIFIER_ENABLED else None
+        )
         self.web_search_handler = WebSearchHandler()
+        self.reranker = ResultReranker()
+        self.deduplicator = ResultDeduplicator()
+        self.context_builder = ContextBuilder()
         self.realtime_api_handler = RealtimeAPIHandler()
+        self.vector_db_handler = VectorDBHandler()
+        self.semantic_cache = SemanticCache()
+        
+        # 동기 경로의 하이브리드 소스 동시 실행용 스레드 풀
+        self._executor = ThreadPoolExecutor(
+            max_workers=Config.HTTP_POOL_SIZE,
+            thread_name_prefix="hybrid"
+        )
         
         print("AI Agent 초기화 완료!")
     
+    async def aclose(self):
+        """비동기 연결 풀 정리 (서버 종료 시)"""
+        await self.gemini_client.aclose()
+        await self.web_search_handler.aclose()
+        await self.realtime_api_handler.aclose()
+    
+    def close(self):
+        """동기 연결 풀 및 스레드 풀 정리"""
+        self.gemini_client.close()
+        self.web_search_handler.close()
+        self.realtime_api_handler.close()
+        self.vector_db_handler.close()
+        flush_decisions()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
     def process_query(self, request: QueryRequest) -> AgentResponse:
         """
         사용자 쿼리 처리
@@ -36,66 +92,639 @@ class AIAgent:
         Returns:
             처리된 응답
         """
-        start_time = time.time()
+        with tracing.start_trace("query", mode="sync", query=request.query):
+            start_time = time.time()
+            stage_timings: Dict[str, float] = {}
+            metrics.query_started("sync")
+            
+            try:
+                # 0. 의미 기반 응답 캐시 (표현만 다른 이전 질문의 응답 재사용)
+                cached = self._cached_response(request, start_time, stage_timings)
+                if cached is not None:
+                    return cached
+                
+                # 1-2. 쿼리 증강 및 액션 분류
+                with self._timed(stage_timings, "plan", observe=self.planner_mode != "single"):
+                    enhanced_query, action_decision = self._plan(request)
+                action_decision = self._route_local_kb(enhanced_query, action_decision)
+                
+                # 3. 선택된 액션 실행
+                tracing.set_attribute("action_type", ActionType(action_decision.action_type).value)
+                with self._timed(stage_timings, "execute"):
+                    search_results = self._execute_action(
+                        action_decision, 
+                        enhanced_query
+                    )
+                self._remember_results(enhanced_query, search_results)
+                
+                # 4. 결과 재정렬, 유사 중복 결과 병합 후 답변 컨텍스트 구성 (토큰 예산 이내)
+                with self._timed(stage_timings, "rerank"):
+                    search_results = self.reranker.rerank(
+                        enhanced_query.enhanced_query, enhanced_query.keywords, search_results
+                    )
+                with self._timed(stage_timings, "dedup"):
+                    search_results = self._collapse_duplicates(search_results)
+                with self._timed(stage_timings, "context"):
+                    context = self._build_context(search_results)
+                
+                # 5. 최종 응답 생성
+                with self._timed(stage_timings, "answer"):
+                    final_answer, answer_degraded = self._generate_final_answer(
+                        enhanced_query, 
+                        context
+                    )
+                
+                # 5-1. 로컬 지식 베이스 문서로 답할 수 없으면 웹 검색으로 다시 답변
+                if self._needs_web_fallback(context, final_answer):
+                    action_decision = self._web_fallback_decision(action_decision)
+                    with self._timed(stage_timings, "local_kb_fallback"):
+                        search_results, context, final_answer, answer_degraded = self._answer_from_web(
+                            action_decision, enhanced_query
+                        )
+                
+                response = self._build_response(
+                    request, enhanced_query, action_decision,
+                    search_results, final_answer, start_time, stage_timings, context
+                )
+                self._cache_response(request, response, context, answer_degraded)
+                return response
+                
+            except Exception as e:
+                return self._error_response(request, e, start_time, stage_timings)
+            finally:
+                metrics.query_finished("sync")
+    
+    async def aprocess_query(self, request: QueryRequest) -> AgentResponse:
+        """
+        사용자 쿼리 처리 (비동기) - 업스트림 호출 동안 이벤트 루프를 막지 않음
+        
+        Args:
+            request: 사용자 쿼리 요청
+            
+        Returns:
+            처리된 응답
+        """
+        with tracing.start_trace("query", mode="async", query=request.query):
+            start_time = time.time()
+            stage_timings: Dict[str, float] = {}
+            
+            metrics.query_started("async")
+            speculative_web = None
+            
+            try:
+                # 0. 의미 기반 응답 캐시 (표현만 다른 이전 질문의 응답 재사용)
+                cached = self._cached_response(request, start_time, stage_timings)
+                if cached is not None:
+                    return cached
+                
+                # 0-1. 추측 웹 검색 (계획 호출과 동시에 원본 쿼리로 시작)
+                speculative_web = self._start_speculative_web(request)
+                
+                # 1-2. 쿼리 증강 및 액션 분류
+                with self._timed(stage_timings, "plan", observe=self.planner_mode != "single"):
+                    enhanced_query, action_decision = await self._aplan(request)
+                action_decision = self._route_local_kb(enhanced_query, action_decision)
+                speculative_web = self._claim_speculative_web(speculative_web, request, enhanced_query, action_decision)
+                
+                # 3. 선택된 액션 실행
+                tracing.set_attribute("action_type", ActionType(action_decision.action_type).value)
+                with self._timed(stage_timings, "execute"):
+                    search_results = await self._aexecute_action(
+                        action_decision, 
+                        enhanced_query,
+                        speculative_web
+                    )
+                self._remember_results(enhanced_query, search_results)
+                
+                # 4. 결과 재정렬, 유사 중복 결과 병합 후 답변 컨텍스트 구성 (토큰 예산 이내)
+                with self._timed(stage_timings, "rerank"):
+                    search_results = self.reranker.rerank(
+                        enhanced_query.enhanced_query, enhanced_query.keywords, search_results
+                    )
+                with self._timed(stage_timings, "dedup"):
+                    search_results = self._collapse_duplicates(search_results)
+                with self._timed(stage_timings, "context"):
+                    context = self._build_context(search_results)
+                
+                # 5. 최종 응답 생성
+                with self._timed(stage_timings, "answer"):
+                    final_answer, answer_degraded = await self._agenerate_final_answer(
+                        enhanced_query, 
+                        context
+                    )
+                
+                # 5-1. 로컬 지식 베이스 문서로 답할 수 없으면 웹 검색으로 다시 답변
+                if self._needs_web_fallback(context, final_answer):
+                    action_decision = self._web_fallback_decision(action_decision)
+                    with self._timed(stage_timings, "local_kb_fallback"):
+                        search_results, context, final_answer, answer_degraded = await self._aanswer_from_web(
+                            action_decision, enhanced_query
+                        )
+                
+                response = self._build_response(
+                    request, enhanced_query, action_decision,
+                    search_results, final_answer, start_time, stage_timings, context
+                )
+                self._cache_response(request, response, context, answer_degraded)
+                return response
+                
+            except Exception as e:
+                return self._error_response(request, e, start_time, stage_timings)
+            finally:
+                metrics.query_finished("async")
+                if speculative_web is not None:
+                    speculative_web.cancel()
+    
+    async def astream_query(self, request: QueryRequest) -> AsyncIterator[Dict[str, Any]]:
+        """
+        사용자 쿼리 처리 (스트리밍) - 각 단계가 끝날 때마다 이벤트 전달
+        
+        이벤트 순서: enhanced_query → action → search_result (결과별) →
+        answer_delta (답변 조각별) → done (최종 AgentResponse).
+        처리 중 오류 시 error 이벤트 후 done 이벤트로 기본 응답을 전달.
+        의미 캐시 적중 시 재사용한 응답으로 같은 순서의 이벤트를 바로 전달 (답변은 answer_delta 한 번)
+        
+        Args:
+            request: 사용자 쿼리 요청
+            
+        Yields:
+            {"event": 이벤트 이름, "data": JSON 직렬화 가능한 데이터}
+        """
+        with tracing.start_trace("query", mode="stream", query=request.query):
+            start_time = time.time()
+            stage_timings: Dict[str, float] = {}
+            metrics.query_started("stream")
+            speculative_web = None
+            
+            try:
+                # 0. 의미 기반 응답 캐시 (재사용한 응답을 같은 이벤트 순서로 한 번에 전달)
+                cached = self._cached_response(request, start_time, stage_timings)
+                if cached is not None:
+                    for event in self._cached_stream_events(cached):
+                        yield event
+                    yield {"event": "done", "data": cached.model_dump(mode="json")}
+                    return
+                
+                # 0-1. 추측 웹 검색 (계획 호출과 동시에 원본 쿼리로 시작)
+                speculative_web = self._start_speculative_web(request)
+                
+                # 1-2. 쿼리 증강 및 액션 분류
+                with self._timed(stage_timings, "plan", observe=self.planner_mode != "single"):
+                    enhanced_query, action_decision = await self._aplan(request)
+                action_decision = self._route_local_kb(enhanced_query, action_decision)
+                yield {"event": "enhanced_query", "data": enhanced_query.model_dump(mode="json")}
+                yield {"event": "action", "data": action_decision.model_dump(mode="json")}
+                
+                speculative_web = self._claim_speculative_web(speculative_web, request, enhanced_query, action_decision)
+                
+                # 3. 선택된 액션 실행
+                tracing.set_attribute("action_type", ActionType(action_decision.action_type).value)
+                with self._timed(stage_timings, "execute"):
+                    search_results = await self._aexecute_action(
+                        action_decision, 
+                        enhanced_query,
+                        speculative_web
+                    )
+                self._remember_results(enhanced_query, search_results)
+                
+                # 4. 결과 재정렬, 유사 중복 결과 병합 후 답변 컨텍스트 구성 (토큰 예산 이내)
+                with self._timed(stage_timings, "rerank"):
+                    search_results = self.reranker.rerank(
+                        enhanced_query.enhanced_query, enhanced_query.keywords, search_results
+                    )
+                with self._timed(stage_timings, "dedup"):
+                    search_results = self._collapse_duplicates(search_results)
+                for result in search_results:
+                    yield {"event": "search_result", "data": result.model_dump(mode="json")}
+                with self._timed(stage_timings, "context"):
+                    context = self._build_context(search_results)
+                
+                # 5. 최종 응답 스트리밍 생성
+                answer_parts = []
+                answer_degraded = False
+                with self._timed(stage_timings, "answer"):
+                    async for chunk, chunk_degraded in self._astream_final_answer(enhanced_query, context):
+                        answer_parts.append(chunk)
+                        answer_degraded = answer_degraded or chunk_degraded
+                        if not self._needs_web_fallback(context, chunk):
+                            yield {"event": "answer_delta", "data": {"text": chunk}}
+                
+                # 5-1. 로컬 지식 베이스 문서로 답할 수 없으면 웹 검색으로 다시 답변 (변경된 액션과 새 검색 결과 전달)
+                if self._needs_web_fallback(context, "".join(answer_parts)):
+                    action_decision = self._web_fallback_decision(action_decision)
+                    yield {"event": "action", "data": action_decision.model_dump(mode="json")}
+                    answer_parts = []
+                    answer_degraded = False
+                    with self._timed(stage_timings, "local_kb_fallback"):
+                        search_results = await self._aexecute_action(action_decision, enhanced_query)
+                        self._remember_results(enhanced_query, search_results)
+                        search_results = self._collapse_duplicates(self.reranker.rerank(
+                            enhanced_query.enhanced_query, enhanced_query.keywords, search_results
+                        ))
+                        for result in search_results:
+                            yield {"event": "search_result", "data": result.model_dump(mode="json")}
+                        context = self._build_context(search_results)
+                        async for chunk, chunk_degraded in self._astream_final_answer(enhanced_query, context):
+                            answer_parts.append(chunk)
+                            answer_degraded = answer_degraded or chunk_degraded
+                            yield {"event": "answer_delta", "data": {"text": chunk}}
+                
+                response = self._build_response(
+                    request, enhanced_query, action_decision,
+                    search_results, "".join(answer_parts), start_time, stage_timings, context
+                )
+                self._cache_response(request, response, context, answer_degraded)
+                
+            except Exception as e:
+                response = self._error_response(request, e, start_time, stage_timings)
+                yield {"event": "error", "data": {"message": str(e)}}
+            finally:
+                metrics.query_finished("stream")
+                if speculative_web is not None:
+                    speculative_web.cancel()
+            
+            yield {"event": "done", "data": response.model_dump(mode="json")}
+    
+    async def aprocess_batch(
+        self,
+        requests: List[QueryRequest],
+        concurrency: Optional[int] = None
+    ) -> AsyncIterator[Tuple[List[int], AgentResponse]]:
+        """
+        여러 쿼리를 동시 처리 수 제한 안에서 처리하고 완료 순서대로 전달
+        동일한 쿼리(정규화된 쿼리 + 컨텍스트)는 한 번만 처리
+        
+        Args:
+            requests: 사용자 쿼리 요청 리스트
+            concurrency: 동시 처리 수 (기본값: Config.BATCH_CONCURRENCY)
+            
+        Yields:
+            (해당 응답을 받는 입력 인덱스 리스트, 처리된 응답)
+        """
+        concurrency = max(1, min(concurrency or Config.BATCH_CONCURRENCY, Config.BATCH_MAX_CONCURRENCY))
         
+        # 동일 쿼리 병합
+        groups: Dict[str, List[int]] = {}
+        for index, request in enumerate(requests):
+            groups.setdefault(make_key(request.query, request.context), []).append(index)
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run(indices: List[int]) -> Tuple[List[int], AgentResponse]:
+            async with semaphore:
+                return indices, await self.aprocess_query(requests[indices[0]])
+        
+        tasks = [asyncio.ensure_future(run(indices)) for indices in groups.values()]
         try:
-            # 1. Gemini로 쿼리 증강
-            print(f"1. 쿼리 증강 중: {request.query}")
-            enhanced_data = self.gemini_client.enhance_query(request.query)
-            enhanced_query = EnhancedQuery(**enhanced_data)
-            
-            # 2. 액션 분류
-            print(f"2. 액션 분류 중...")
-            action_data = self.gemini_client.classify_action(
-                enhanced_query.enhanced_query,
-                enhanced_query.keywords,
-                enhanced_query.intent
-            )
-            action_decision = ActionDecision(**action_data)
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _cached_response(
+        self,
+        request: QueryRequest,
+        start_time: float,
+        stage_timings: Dict[str, float]
+    ) -> Optional[AgentResponse]:
+        """
+        의미 기반 응답 캐시 조회
+        
+        Args:
+            request: 사용자 쿼리 요청
+            start_time: 처리 시작 시각
+            stage_timings: 단계별 소요 시간
             
-            # 3. 선택된 액션 실행
-            print(f"3. 액션 실행 중: {action_decision.action_type}")
-            search_results = self._execute_action(
-                action_decision, 
-                enhanced_query
-            )
+        Returns:
+            재사용할 응답 (이번 요청의 쿼리 / 처리 시간 / 트레이스 ID로 갱신) 또는 None
+        """
+        with self._timed(stage_timings, "semantic_cache"):
+            cached = self.semantic_cache.lookup(request.query, request.context)
+        if cached is None:
+            return None
+        
+        response, similarity = cached
+        processing_time = time.time() - start_time
+        tracing.info("의미 캐시 응답 재사용", similarity=round(similarity, 4), cached_query=response.query)
+        tracing.set_attribute("semantic_cache_hit", True)
+        metrics.observe_response(response.action_taken.value, processing_time, ok=True)
+        return response.model_copy(update={
+            "query": request.query,
+            "processing_time": processing_time,
+            "stage_timings": dict(stage_timings),
+            "trace_id": tracing.current_trace_id(),
+            "cache_similarity": round(similarity, 4)
+        })
+    
+    def _cached_stream_events(self, response: AgentResponse) -> List[Dict[str, Any]]:
+        """
+        재사용한 응답을 스트리밍 이벤트로 변환 (done 이벤트 제외)
+        
+        Args:
+            response: 의미 캐시에서 재사용한 응답
+        
+        Returns:
+            enhanced_query → action → search_result (결과별) → answer_delta 이벤트 리스트
+        """
+        enhanced_query = EnhancedQuery(
+            original_query=response.query,
+            enhanced_query=response.enhanced_query,
+            keywords=[],
+            intent="",
+            complexity_score=0.0
+        )
+        action_decision = ActionDecision(
+            action_type=response.action_taken,
+            confidence=response.confidence,
+            reasoning="의미 캐시 응답 재사용",
+            parameters={"cache_similarity": response.cache_similarity}
+        )
+        events = [
+            {"event": "enhanced_query", "data": enhanced_query.model_dump(mode="json")},
+            {"event": "action", "data": action_decision.model_dump(mode="json")},
+        ]
+        events.extend({"event": "search_result", "data": result.model_dump(mode="json")} for result in response.results)
+        events.append({"event": "answer_delta", "data": {"text": response.final_answer}})
+        return events
+    
+    def _cache_response(
+        self,
+        request: QueryRequest,
+        response: AgentResponse,
+        context: AnswerContext,
+        answer_degraded: bool
+    ):
+        """
+        정상 처리된 응답만 의미 기반 응답 캐시에 저장 (검색 오류 / 결과 없음 / 기본 답변으로 대체된 응답 제외)
+        
+        Args:
+            request: 사용자 쿼리 요청
+            response: 최종 응답
+            context: 답변 컨텍스트
+            answer_degraded: 최종 답변 생성 실패로 기본 답변을 사용했는지 여부
+        """
+        if context.has_errors or not context.has_valid_results or answer_degraded:
+            return
+        self.semantic_cache.store(request.query, request.context, response)
+    
+    def _start_speculative_web(self, request: QueryRequest) -> Optional["asyncio.Future[List[SearchResult]]"]:
+        """추측 웹 검색 시작 (SPECULATIVE_WEB_SEARCH 비활성화 시 None)"""
+        if not Config.SPECULATIVE_WEB_SEARCH:
+            return None
+        
+        tracing.debug("추측 웹 검색 시작")
+        speculative_web = asyncio.ensure_future(
+            self.web_search_handler.asearch(request.query, max_results=Config.WEB_SEARCH_MAX_RESULTS)
+        )
+        speculative_web.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return speculative_web
+    
+    def _claim_speculative_web(
+        self,
+        speculative_web: Optional["asyncio.Future[List[SearchResult]]"],
+        request: QueryRequest,
+        enhanced_query: EnhancedQuery,
+        action_decision: ActionDecision
+    ) -> Optional["asyncio.Future[List[SearchResult]]"]:
+        """재사용할 수 있으면 추측 웹 검색을 그대로 반환하고, 아니면 취소 후 None"""
+        if speculative_web is None:
+            return None
+        
+        if self._should_reuse_speculative(request, enhanced_query, action_decision):
+            return speculative_web
+        
+        speculative_web.cancel()
+        return None
+    
+    def _should_reuse_speculative(self, request: QueryRequest, enhanced_query: EnhancedQuery, action_decision: ActionDecision) -> bool:
+        """
+        추측 웹 검색 결과 재사용 여부 판단
+        
+        Args:
+            request: 사용자 쿼리 요청
+            enhanced_query: 증강된 쿼리
+            action_decision: 액션 결정
             
-            # 4. 최종 응답 생성
-            print(f"4. 최종 응답 생성 중...")
-            final_answer = self._generate_final_answer(
-                enhanced_query, 
-                search_results
-            )
+        Returns:
+            웹 검색 계열 액션이고 증강된 쿼리가 원본과 충분히 유사하면 True
+        """
+        if ActionType(action_decision.action_type) not in (ActionType.WEB_SEARCH, ActionType.HYBRID):
+            tracing.info("추측 웹 검색 폐기 (웹 검색 불필요)")
+            return False
+        
+        similarity = jaccard_similarity(request.query, enhanced_query.enhanced_query)
+        if similarity < Config.SPECULATIVE_SIMILARITY_THRESHOLD:
+            tracing.info("추측 웹 검색 폐기", similarity=round(similarity, 4))
+            return False
+        
+        tracing.info("추측 웹 검색 재사용", similarity=round(similarity, 4))
+        return True
+    
+    def _plan(self, request: QueryRequest) -> Tuple[EnhancedQuery, ActionDecision]:
+        """쿼리 증강 및 액션 분류 (Gemini 회로 차단 중이면 증강 생략)"""
+        try:
+            return self._gemini_plan(request)
+        except CircuitOpenError as e:
+            return self._degraded_plan(request, e)
+    
+    async def _aplan(self, request: QueryRequest) -> Tuple[EnhancedQuery, ActionDecision]:
+        """쿼리 증강 및 액션 분류 (비동기, Gemini 회로 차단 중이면 증강 생략)"""
+        try:
+            return await self._agemini_plan(request)
+        except CircuitOpenError as e:
+            return self._degraded_plan(request, e)
+    
+    def _degraded_plan(self, request: QueryRequest, e: CircuitOpenError) -> Tuple[EnhancedQuery, ActionDecision]:
+        """
+        Gemini 없이 계획 (원본 쿼리 그대로 사용, 액션은 로컬 분류기 또는 기본 웹 검색)
+        
+        Args:
+            request: 사용자 쿼리 요청
+            e: 회로 차단 오류
             
-            processing_time = time.time() - start_time
+        Returns:
+            (증강된 쿼리, 액션 결정)
+        """
+        tracing.warning(f"쿼리 증강 생략: {e}")
+        enhanced_data, action_data = self.gemini_client.fallback_plan(request.query)
+        enhanced_query = EnhancedQuery(**enhanced_data)
+        action_decision = self._local_classify(enhanced_query)
+        if action_decision is None:
+            action_decision = ActionDecision(**action_data)
+        return enhanced_query, action_decision
+    
+    def _gemini_plan(self, request: QueryRequest) -> Tuple[EnhancedQuery, ActionDecision]:
+        """
+        쿼리 증강 및 액션 분류 (PLANNER_MODE에 따라 1회 또는 2회 호출)
+        
+        Args:
+            request: 사용자 쿼리 요청
             
-            response = AgentResponse(
-                query=request.query,
-                enhanced_query=enhanced_query.enhanced_query,
-                action_taken=ActionType(action_decision.action_type),
-                results=search_results,
-                final_answer=final_answer,
-                confidence=action_decision.confidence,
-                processing_time=processing_time
-            )
+        Returns:
+            (증강된 쿼리, 액션 결정)
+        """
+        if self.planner_mode == "single":
+            enhanced_data, action_data = self.gemini_client.plan_query(request.query)
+            return EnhancedQuery(**enhanced_data), ActionDecision(**action_data)
+        
+        # 1. Gemini로 쿼리 증강
+        enhanced_data = self.gemini_client.enhance_query(request.query)
+        enhanced_query = EnhancedQuery(**enhanced_data)
+        
+        # 2. 액션 분류 (로컬 분류기가 확실하면 Gemini 호출 생략)
+        action_decision = self._local_classify(enhanced_query)
+        if action_decision is not None:
+            return enhanced_query, action_decision
+        
+        action_data = self.gemini_client.classify_action(
+            enhanced_query.enhanced_query,
+            enhanced_query.keywords,
+            enhanced_query.intent
+        )
+        self._record_decision(enhanced_query, action_data)
+        return enhanced_query, ActionDecision(**action_data)
+    
+    async def _agemini_plan(self, request: QueryRequest) -> Tuple[EnhancedQuery, ActionDecision]:
+        """
+        쿼리 증강 및 액션 분류 (비동기, PLANNER_MODE에 따라 1회 또는 2회 호출)
+        
+        Args:
+            request: 사용자 쿼리 요청
             
-            print(f"처리 완료! (소요 시간: {processing_time:.2f}초)")
-            return response
+        Returns:
+            (증강된 쿼리, 액션 결정)
+        """
+        if self.planner_mode == "single":
+            enhanced_data, action_data = await self.gemini_client.aplan_query(request.query)
+            return EnhancedQuery(**enhanced_data), ActionDecision(**action_data)
+        
+        # 1. Gemini로 쿼리 증강
+        enhanced_data = await self.gemini_client.aenhance_query(request.query)
+        enhanced_query = EnhancedQuery(**enhanced_data)
+        
+        # 2. 액션 분류 (로컬 분류기가 확실하면 Gemini 호출 생략)
+        action_decision = self._local_classify(enhanced_query)
+        if action_decision is not None:
+            return enhanced_query, action_decision
+        
+        action_data = await self.gemini_client.aclassify_action(
+            enhanced_query.enhanced_query,
+            enhanced_query.keywords,
+            enhanced_query.intent
+        )
+        self._record_decision(enhanced_query, action_data)
+        return enhanced_query, ActionDecision(**action_data)
+    
+    def _local_classify(self, enhanced_query: EnhancedQuery) -> Optional[ActionDecision]:
+        """
+        로컬 분류기로 액션 결정 (비활성화되었거나 신뢰도가 임계값 미만이면 None)
+        
+        Args:
+            enhanced_query: 증강된 쿼리
             
-        except Exception as e:
-            print(f"쿼리 처리 중 오류 발생: {e}")
-            
-            # 오류 발생 시 기본 응답
-            processing_time = time.time() - start_time
-            return AgentResponse(
-                query=request.query,
-                enhanced_query=request.query,
-                action_taken=ActionType.WEB_SEARCH,
-                results=[],
-                final_answer=f"죄송합니다. 쿼리 처리 중 오류가 발생했습니다: {str(e)}",
-                confidence=0.0,
-                processing_time=processing_time
-            )
+        Returns:
+            액션 결정 또는 None
+        """
+        if self.intent_classifier is None:
+            return None
+        
+        action_type, confidence = self.intent_classifier.predict(
+            classification_text(enhanced_query.enhanced_query, enhanced_query.keywords)
+        )
+        if confidence < Config.INTENT_CLASSIFIER_THRESHOLD:
+            tracing.info("로컬 분류 신뢰도 부족 - Gemini 분류 사용", action_type=action_type.value, confidence=round(confidence, 4))
+            return None
+        
+        tracing.info("로컬 분류 사용", action_type=action_type.value, confidence=round(confidence, 4))
+        return ActionDecision(
+            action_type=action_type,
+            confidence=confidence,
+            reasoning="로컬 분류기 판단",
+            parameters={}
+        )
+    
+    def _record_decision(self, enhanced_query: EnhancedQuery, action_data: Dict[str, Any]):
+        """Gemini 분류 결과를 로컬 분류기 재학습용으로 기록"""
+        record_decision(
+            classification_text(enhanced_query.enhanced_query, enhanced_query.keywords),
+            action_data.get("action_type"),
+            action_data.get("confidence", 0.0)
+        )
+    
+    @staticmethod
+    @contextmanager
+    def _timed(stage_timings: Dict[str, float], stage: str, observe: bool = True):
+        """
+        블록을 트레이스 스팬으로 감싸고 실행 시간을 stage_timings[stage]에 기록 (초 단위)
+        observe가 False이면 단계 지표는 호출되는 함수(@timed_stage)가 기록하므로 생략
+        """
+        started = time.perf_counter()
+        try:
+            with tracing.span(stage):
+                yield
+        finally:
+            stage_timings[stage] = time.perf_counter() - started
+            if observe:
+                metrics.observe_stage(stage, stage_timings[stage])
+    
+    def _build_response(
+        self,
+        request: QueryRequest,
+        enhanced_query: EnhancedQuery,
+        action_decision: ActionDecision,
+        search_results: List[SearchResult],
+        final_answer: str,
+        start_time: float,
+        stage_timings: Optional[Dict[str, float]] = None,
+        context: Optional[AnswerContext] = None
+    ) -> AgentResponse:
+        """처리 결과로 최종 응답 생성"""
+        processing_time = time.time() - start_time
+        
+        response = AgentResponse(
+            query=request.query,
+            enhanced_query=enhanced_query.enhanced_query,
+            action_taken=ActionType(action_decision.action_type),
+            results=search_results,
+            final_answer=final_answer,
+            confidence=action_decision.confidence,
+            processing_time=processing_time,
+            stage_timings=stage_timings or {},
+            context_tokens=context.tokens if context else None,
+            trace_id=tracing.current_trace_id()
+        )
+        
+        metrics.observe_response(response.action_taken.value, processing_time, ok=True)
+        return response
+    
+    def _error_response(
+        self,
+        request: QueryRequest,
+        e: Exception,
+        start_time: float,
+        stage_timings: Optional[Dict[str, float]] = None
+    ) -> AgentResponse:
+        """오류 발생 시 기본 응답"""
+        tracing.record_error(f"쿼리 처리 중 오류 발생: {e}")
+        
+        processing_time = time.time() - start_time
+        metrics.observe_response(ActionType.WEB_SEARCH.value, processing_time, ok=False)
+        if isinstance(e, UpstreamThrottled):
+            final_answer = "죄송합니다. 현재 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요."
+        else:
+            final_answer = f"죄송합니다. 쿼리 처리 중 오류가 발생했습니다: {str(e)}"
+        return AgentResponse(
+            query=request.query,
+            enhanced_query=request.query,
+            action_taken=ActionType.WEB_SEARCH,
+            results=[],
+            final_answer=final_answer,
+            confidence=0.0,
+            processing_time=processing_time,
+            stage_timings=stage_timings or {},
+            trace_id=tracing.current_trace_id()
+        )
     
     def _execute_action(self, action_decision: ActionDecision, enhanced_query: EnhancedQuery) -> List[SearchResult]:
         """
@@ -111,6 +740,12 @@ class AIAgent:
         action_type = ActionType(action_decision.action_type)
         query = enhanced_query.enhanced_query
         
+        if action_type == ActionType.LOCAL_KB:
+            local_results = self._local_kb_search(enhanced_query)
+            if local_results:
+                return local_results
+            action_type = ActionType.WEB_SEARCH
+        
         if action_type == ActionType.REALTIME_API:
             try:
                 return self.realtime_api_handler.search(
@@ -118,104 +753,276 @@ class AIAgent:
                     action_decision.parameters
                 )
             except Exception as e:
-                print(f"❌ 실시간 API 검색 실패: {e}")
-                # 실패 시 빈 결과 대신 에러 정보를 포함한 결과 반환
-                from models import SearchResult
-                error_result = SearchResult(
-                    source="realtime_api_error",
-                    content=f"실시간 API 검색 중 오류가 발생했습니다: {str(e)}",
-                    relevance_score=0.1,
-                    metadata={"error": str(e), "query": query}
-                )
-                return [error_result]
+                tracing.record_error(f"실시간 API 검색 실패: {e}")
+                return [self._error_result("realtime_api_error", "실시간 API 검색", e, query)]
         
         elif action_type == ActionType.WEB_SEARCH:
             try:
-                return self.web_search_handler.search(query)
+                return self.web_search_handler.search(query, max_results=Config.WEB_SEARCH_MAX_RESULTS)
             except Exception as e:
-                print(f"❌ 웹 검색 실패: {e}")
-                # 실패 시 빈 결과 대신 에러 정보를 포함한 결과 반환
-                from models import SearchResult
-                error_result = SearchResult(
-                    source="web_search_error",
-                    content=f"웹 검색 중 오류가 발생했습니다: {str(e)}",
-                    relevance_score=0.1,
-                    metadata={"error": str(e), "query": query}
+                tracing.record_error(f"웹 검색 실패: {e}")
+                return [self._error_result("web_search_error", "웹 검색", e, query)]
+        
+        elif action_type == ActionType.HYBRID:
+            # 하이브리드: 웹 검색 + 실시간 API 동시 실행 (소스별 마감 시간, 에러 방어적 처리)
+            sources = [(
+                "웹 검색",
+                lambda: self.web_search_handler.search(query, max_results=Config.HYBRID_WEB_MAX_RESULTS),
+                Config.HYBRID_WEB_DEADLINE
+            )]
+            
+            if self._use_realtime(query):
+                sources.append((
+                    "실시간 API",
+                    lambda: self.realtime_api_handler.search(query, action_decision.parameters),
+                    Config.HYBRID_REALTIME_DEADLINE
+                ))
+            
+            results, errors = self._fan_out(sources)
+            return self._merge_hybrid_results(results, errors, query)
+        
+        else:
+            # 기본값: 웹 검색
+            return self.web_search_handler.search(query, max_results=Config.WEB_SEARCH_MAX_RESULTS)
+    
+    async def _aexecute_action(
+        self,
+        action_decision: ActionDecision,
+        enhanced_query: EnhancedQuery,
+        speculative_web: Optional["asyncio.Future[List[SearchResult]]"] = None
+    ) -> List[SearchResult]:
+        """
+        액션 실행 (비동기)
+        
+        Args:
+            action_decision: 액션 결정 정보
+            enhanced_query: 증강된 쿼리
+            speculative_web: 재사용할 추측 웹 검색 (없으면 새로 검색)
+            
+        Returns:
+            검색 결과 리스트
+        """
+        action_type = ActionType(action_decision.action_type)
+        query = enhanced_query.enhanced_query
+        
+        if action_type == ActionType.LOCAL_KB:
+            local_results = self._local_kb_search(enhanced_query)
+            if local_results:
+                return local_results
+            action_type = ActionType.WEB_SEARCH
+        
+        if action_type == ActionType.REALTIME_API:
+            try:
+                return await self.realtime_api_handler.asearch(
+                    query, 
+                    action_decision.parameters
                 )
-                return [error_result]
+            except Exception as e:
+                tracing.record_error(f"실시간 API 검색 실패: {e}")
+                return [self._error_result("realtime_api_error", "실시간 API 검색", e, query)]
+        
+        elif action_type == ActionType.WEB_SEARCH:
+            try:
+                return await self._aweb_search(query, Config.WEB_SEARCH_MAX_RESULTS, speculative_web)
+            except Exception as e:
+                tracing.record_error(f"웹 검색 실패: {e}")
+                return [self._error_result("web_search_error", "웹 검색", e, query)]
         
         elif action_type == ActionType.HYBRID:
-            # 하이브리드: 웹 검색 + 실시간 API (에러 방어적 처리)
-            results = []
-            errors = []
+            # 하이브리드: 웹 검색 + 실시간 API 동시 실행 (소스별 마감 시간, 에러 방어적 처리)
+            sources = [(
+                "웹 검색",
+                self._aweb_search(query, Config.HYBRID_WEB_MAX_RESULTS, speculative_web),
+                Config.HYBRID_WEB_DEADLINE
+            )]
+            
+            if self._use_realtime(query):
+                sources.append((
+                    "실시간 API",
+                    self.realtime_api_handler.asearch(query, action_decision.parameters),
+                    Config.HYBRID_REALTIME_DEADLINE
+                ))
             
-            # 웹 검색 (에러 방어적)
+            results, errors = await self._afan_out(sources)
+            return self._merge_hybrid_results(results, errors, query)
+        
+        else:
+            # 기본값: 웹 검색
+            return await self.web_search_handler.asearch(query, max_results=Config.WEB_SEARCH_MAX_RESULTS)
+    
+    def _error_result(self, source: str, label: str, e: Exception, query: str) -> SearchResult:
+        """실패 시 빈 결과 대신 에러 정보를 포함한 결과"""
+        return SearchResult(
+            source=source,
+            content=f"{label} 중 오류가 발생했습니다: {str(e)}",
+            relevance_score=0.1,
+            metadata={"error": str(e), "query": query}
+        )
+    
+    async def _aweb_search(
+        self,
+        query: str,
+        max_results: int,
+        speculative_web: Optional["asyncio.Future[List[SearchResult]]"] = None
+    ) -> List[SearchResult]:
+        """
+        웹 검색 (비동기) - 추측 웹 검색이 있으면 그 결과를 우선 사용
+        
+        Args:
+            query: 검색 쿼리
+            max_results: 최대 결과 수
+            speculative_web: 진행 중인 추측 웹 검색
+            
+        Returns:
+            검색 결과 리스트 (추측 웹 검색 결과는 액션의 최대 결과 수로 잘라서 사용)
+        """
+        if speculative_web is not None:
             try:
-                print("🌐 웹 검색 시도 중...")
-                web_results = self.web_search_handler.search(query, max_results=3)
-                if web_results:
-                    results.extend(web_results)
-                    print(f"✅ 웹 검색 성공: {len(web_results)}개 결과")
-                else:
-                    print("⚠️ 웹 검색 결과 없음")
+                # 추측 웹 검색은 WEB_SEARCH_MAX_RESULTS로 요청하므로 HYBRID 등 더 적은 결과를 쓰는 액션과 맞춤
+                return (await speculative_web)[:max_results]
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                error_msg = f"웹 검색 실패: {str(e)}"
-                print(f"❌ {error_msg}")
-                errors.append(error_msg)
+                tracing.warning(f"추측 웹 검색 실패 - 증강된 쿼리로 재검색: {e}")
+        
+        return await self.web_search_handler.asearch(query, max_results=max_results)
+    
+    def _fan_out(self, sources: List[Tuple[str, Callable[[], List[SearchResult]], float]]) -> Tuple[List[SearchResult], List[str]]:
+        """
+        여러 소스를 스레드 풀에서 동시에 실행하고 도착 순서대로 병합
+        마감 시간을 넘긴 소스는 기다리지 않고 제외
+        
+        Args:
+            sources: (소스 이름, 검색 함수, 마감 시간) 리스트
             
-            # 실시간 API (에러 방어적)
-            if self._is_realtime_relevant(query):
+        Returns:
+            (수집된 결과, 에러 메시지 리스트)
+        """
+        results = []
+        errors = []
+        
+        start = time.monotonic()
+        futures = {}
+        for label, search_fn, deadline in sources:
+            tracing.debug(f"{label} 시도 중 (마감 {deadline:.1f}초)")
+            # 스레드에서도 현재 스팬 아래에 기록되도록 컨텍스트 복사
+            futures[self._executor.submit(contextvars.copy_context().run, search_fn)] = (label, start + deadline)
+        
+        pending = set(futures)
+        while pending:
+            next_deadline = min(futures[f][1] for f in pending)
+            done, pending = wait(
+                pending,
+                timeout=max(0.0, next_deadline - time.monotonic()),
+                return_when=FIRST_COMPLETED
+            )
+            
+            for future in done:
+                label, _ = futures[future]
                 try:
-                    print("⏰ 실시간 API 시도 중...")
-                    realtime_results = self.realtime_api_handler.search(
-                        query, 
-                        action_decision.parameters
-                    )
-                    if realtime_results:
-                        results.extend(realtime_results)
-                        print(f"✅ 실시간 API 성공: {len(realtime_results)}개 결과")
-                    else:
-                        print("⚠️ 실시간 API 결과 없음")
+                    self._collect_hybrid_results(label, future.result(), results)
                 except Exception as e:
-                    error_msg = f"실시간 API 실패: {str(e)}"
-                    print(f"❌ {error_msg}")
+                    error_msg = f"{label} 실패: {str(e)}"
+                    tracing.warning(error_msg)
                     errors.append(error_msg)
-            else:
-                print("ℹ️ 실시간 API 관련성 없음 - 건너뜀")
             
-            # 결과 처리
-            if results:
-                # 관련성 점수로 정렬
-                results.sort(key=lambda x: x.relevance_score, reverse=True)
-                
-                # 에러가 있었다면 메타데이터에 추가
-                if errors:
-                    for result in results:
-                        if "hybrid_errors" not in result.metadata:
-                            result.metadata["hybrid_errors"] = errors
-                
-                print(f"🎯 하이브리드 검색 완료: {len(results)}개 결과 (에러 {len(errors)}개)")
-                return results[:5]  # 상위 5개만 반환
-            else:
-                # 모든 검색이 실패한 경우 에러 정보를 포함한 기본 결과 반환
-                print("❌ 모든 하이브리드 검색 실패")
-                from models import SearchResult
-                error_result = SearchResult(
-                    source="hybrid_error",
-                    content=f"하이브리드 검색 중 오류가 발생했습니다: {'; '.join(errors)}",
-                    relevance_score=0.1,
-                    metadata={
-                        "errors": errors,
-                        "query": query,
-                        "action_type": "hybrid_failed"
-                    }
-                )
-                return [error_result]
-            return results[:5]  # 상위 5개만 반환
+            # 마감 시간이 지난 소스는 결과를 기다리지 않음
+            now = time.monotonic()
+            for future in [f for f in pending if futures[f][1] <= now]:
+                pending.discard(future)
+                future.cancel()
+                errors.append(self._deadline_error(futures[future][0], futures[future][1] - start))
         
+        return results, errors
+    
+    async def _afan_out(self, sources: List[Tuple[str, Awaitable[List[SearchResult]], float]]) -> Tuple[List[SearchResult], List[str]]:
+        """
+        여러 소스를 동시에 실행하고 도착 순서대로 병합 (비동기)
+        마감 시간을 넘긴 소스는 취소하고 제외
+        
+        Args:
+            sources: (소스 이름, 검색 코루틴, 마감 시간) 리스트
+            
+        Returns:
+            (수집된 결과, 에러 메시지 리스트)
+        """
+        results = []
+        errors = []
+        
+        tasks = {}
+        for label, search_coro, deadline in sources:
+            tracing.debug(f"{label} 시도 중 (마감 {deadline:.1f}초)")
+            tasks[asyncio.ensure_future(asyncio.wait_for(search_coro, timeout=deadline))] = (label, deadline)
+        
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            
+            for task in done:
+                label, deadline = tasks[task]
+                try:
+                    self._collect_hybrid_results(label, task.result(), results)
+                except asyncio.TimeoutError:
+                    errors.append(self._deadline_error(label, deadline))
+                except Exception as e:
+                    error_msg = f"{label} 실패: {str(e)}"
+                    tracing.warning(error_msg)
+                    errors.append(error_msg)
+        
+        return results, errors
+    
+    def _deadline_error(self, label: str, deadline: float) -> str:
+        """마감 시간 초과 에러 메시지"""
+        error_msg = f"{label} 마감 시간 초과 ({deadline:.1f}초) - 결과 제외"
+        tracing.warning(error_msg)
+        return error_msg
+    
+    def _collect_hybrid_results(self, label: str, source_results: List[SearchResult], results: List[SearchResult]):
+        """하이브리드 소스 결과 수집"""
+        if source_results:
+            results.extend(source_results)
+            tracing.debug(f"{label} 성공: {len(source_results)}개 결과")
         else:
-            # 기본값: 웹 검색
-            return self.web_search_handler.search(query)
+            tracing.info(f"{label} 결과 없음")
+    
+    def _merge_hybrid_results(self, results: List[SearchResult], errors: List[str], query: str) -> List[SearchResult]:
+        """
+        하이브리드 결과 병합
+        
+        Args:
+            results: 수집된 검색 결과
+            errors: 소스별 에러 메시지
+            query: 검색 쿼리
+            
+        Returns:
+            상위 결과 리스트 (모두 실패 시 에러 결과)
+        """
+        if results:
+            # 관련성 점수로 정렬
+            results.sort(key=lambda x: x.relevance_score, reverse=True)
+            
+            # 에러가 있었다면 메타데이터에 추가
+            if errors:
+                for result in results:
+                    if "hybrid_errors" not in result.metadata:
+                        result.metadata["hybrid_errors"] = errors
+            
+            tracing.info("하이브리드 검색 완료", results=len(results), errors=len(errors))
+            return results[:5]  # 상위 5개만 반환
+        
+        # 모든 검색이 실패한 경우 에러 정보를 포함한 기본 결과 반환
+        tracing.record_error("모든 하이브리드 검색 실패")
+        error_result = SearchResult(
+            source="hybrid_error",
+            content=f"하이브리드 검색 중 오류가 발생했습니다: {'; '.join(errors)}",
+            relevance_score=0.1,
+            metadata={
+                "errors": errors,
+                "query": query,
+                "action_type": "hybrid_failed"
+            }
+        )
+        return [error_result]
     
     def _is_realtime_relevant(self, query: str) -> bool:
         """실시간 API가 관련성이 있는지 확인"""
@@ -227,77 +1034,353 @@ class AIAgent:
         query_lower = query.lower()
         return any(keyword in query_lower for keyword in realtime_keywords)
     
-    def _generate_final_answer(self, enhanced_query: EnhancedQuery, search_results: List[SearchResult]) -> str:
+    def _use_realtime(self, query: str) -> bool:
+        """하이브리드 액션에서 실시간 API도 호출할지 (관련성이 없거나 회로 차단 중이면 건너뜀)"""
+        if not self._is_realtime_relevant(query):
+            tracing.info("실시간 API 관련성 없음 - 건너뜀")
+            return False
+        
+        if not self.realtime_api_handler.is_available(query):
+            tracing.warning("실시간 API 회로 차단 중 - 건너뜀")
+            return False
+        
+        return True
+    
+    def _route_local_kb(self, enhanced_query: EnhancedQuery, action_decision: ActionDecision) -> ActionDecision:
         """
-        최종 응답 생성 (에러 방어적)
+        웹 검색 액션이면 로컬 벡터 DB를 먼저 조회하고, 유사 문서가 충분하고 같은 질문으로 가져온 문서가 있으면
+        로컬 지식 베이스 액션으로 변경 (주제만 같은 질문은 그대로 웹 검색)
         
         Args:
             enhanced_query: 증강된 쿼리
-            search_results: 검색 결과들
+            action_decision: 계획 단계의 액션 결정
             
         Returns:
-            최종 답변
+            액션 결정 (변경하지 않으면 그대로)
+        """
+        if not Config.LOCAL_KB_ENABLED or ActionType(action_decision.action_type) != ActionType.WEB_SEARCH:
+            return action_decision
+        
+        local_results = self._local_kb_search(enhanced_query)
+        if len(local_results) < Config.LOCAL_KB_MIN_HITS:
+            return action_decision
+        
+        top_score = local_results[0].relevance_score
+        query_score = max(result.metadata.get("query_score", 0.0) for result in local_results)
+        if query_score < Config.LOCAL_KB_MIN_QUERY_SCORE:
+            tracing.info("로컬 지식 베이스 생략 (같은 질문 아님)", hits=len(local_results), query_score=query_score)
+            return action_decision
+        
+        tracing.info("로컬 지식 베이스 사용", hits=len(local_results), top_score=top_score, query_score=query_score)
+        return ActionDecision(
+            action_type=ActionType.LOCAL_KB,
+            confidence=action_decision.confidence,
+            reasoning=f"{action_decision.reasoning} (로컬 지식 베이스에 유사 문서 {len(local_results)}건, 최고 유사도 {top_score})",
+            parameters={
+                **action_decision.parameters,
+                "local_hits": len(local_results),
+                "local_top_score": top_score,
+                "local_query_score": query_score
+            }
+        )
+    
+    def _local_kb_search(self, enhanced_query: EnhancedQuery) -> List[SearchResult]:
+        """로컬 벡터 DB 검색 (라우팅 판단과 실행 단계는 같은 쿼리라 검색 결과 캐시를 공유)"""
+        try:
+            return self.vector_db_handler.search(self._local_kb_text(enhanced_query), max_results=Config.VECTOR_DB_MAX_RESULTS)
+        except Exception as e:
+            tracing.warning(f"로컬 벡터 DB 검색 실패: {e}")
+            return []
+    
+    def _remember_results(self, enhanced_query: EnhancedQuery, search_results: List[SearchResult]):
+        """가져온 웹 검색 결과를 로컬 벡터 DB에 저장 (백그라운드, 저장 대상 소스만)"""
+        self.vector_db_handler.add(self._local_kb_text(enhanced_query), search_results)
+    
+    @staticmethod
+    def _local_kb_text(enhanced_query: EnhancedQuery) -> str:
+        """벡터 DB 조회 / 저장에 사용하는 쿼리 텍스트 (증강된 쿼리 + 키워드)"""
+        return " ".join([enhanced_query.enhanced_query, *enhanced_query.keywords])
+    
+    @staticmethod
+    def _is_local_kb_context(context: AnswerContext) -> bool:
+        """답변 컨텍스트가 로컬 지식 베이스 문서로만 구성되었는지"""
+        return not context.empty and all(result.source == "local_kb" for result in context.sources)
+    
+    def _needs_web_fallback(self, context: AnswerContext, final_answer: str) -> bool:
+        """로컬 지식 베이스 문서만으로는 답할 수 없다고 판단한 답변인지"""
+        return self._is_local_kb_context(context) and final_answer.strip().startswith(self.LOCAL_KB_INSUFFICIENT)
+    
+    def _web_fallback_decision(self, action_decision: ActionDecision) -> ActionDecision:
+        """로컬 지식 베이스 대신 웹 검색을 사용하는 액션 결정"""
+        tracing.info("로컬 지식 베이스로 답변 불가 - 웹 검색으로 다시 답변")
+        return ActionDecision(
+            action_type=ActionType.WEB_SEARCH,
+            confidence=action_decision.confidence,
+            reasoning=f"{action_decision.reasoning} (로컬 지식 베이스 정보 부족으로 웹 검색)",
+            parameters=action_decision.parameters
+        )
+    
+    def _answer_from_web(
+        self,
+        action_decision: ActionDecision,
+        enhanced_query: EnhancedQuery
+    ) -> Tuple[List[SearchResult], AnswerContext, str, bool]:
         """
-        if not search_results:
-            return "죄송합니다. 관련된 정보를 찾을 수 없습니다."
+        웹 검색 결과로 다시 답변 (검색 → 재정렬 → 중복 병합 → 컨텍스트 → 답변)
         
-        # 에러 결과가 있는지 확인
-        error_results = [r for r in search_results if "error" in r.source]
-        valid_results = [r for r in search_results if "error" not in r.source]
+        Args:
+            action_decision: 웹 검색 액션 결정
+            enhanced_query: 증강된 쿼리
+            
+        Returns:
+            (검색 결과, 답변 컨텍스트, 최종 답변, 기본 답변으로 대체되었는지 여부)
+        """
+        search_results = self._execute_action(action_decision, enhanced_query)
+        self._remember_results(enhanced_query, search_results)
+        search_results = self._collapse_duplicates(self.reranker.rerank(
+            enhanced_query.enhanced_query, enhanced_query.keywords, search_results
+        ))
+        context = self._build_context(search_results)
+        final_answer, answer_degraded = self._generate_final_answer(enhanced_query, context)
+        return search_results, context, final_answer, answer_degraded
+    
+    async def _aanswer_from_web(
+        self,
+        action_decision: ActionDecision,
+        enhanced_query: EnhancedQuery
+    ) -> Tuple[List[SearchResult], AnswerContext, str, bool]:
+        """
+        웹 검색 결과로 다시 답변 (비동기)
         
-        # 유효한 결과가 있으면 그것을 우선 사용
-        results_to_use = valid_results if valid_results else search_results
+        Args:
+            action_decision: 웹 검색 액션 결정
+            enhanced_query: 증강된 쿼리
+            
+        Returns:
+            (검색 결과, 답변 컨텍스트, 최종 답변, 기본 답변으로 대체되었는지 여부)
+        """
+        search_results = await self._aexecute_action(action_decision, enhanced_query)
+        self._remember_results(enhanced_query, search_results)
+        search_results = self._collapse_duplicates(self.reranker.rerank(
+            enhanced_query.enhanced_query, enhanced_query.keywords, search_results
+        ))
+        context = self._build_context(search_results)
+        final_answer, answer_degraded = await self._agenerate_final_answer(enhanced_query, context)
+        return search_results, context, final_answer, answer_degraded
+    
+    def _collapse_duplicates(self, search_results: List[SearchResult]) -> List[SearchResult]:
+        """
+        내용이 거의 같은 검색 결과 병합 (병합된 출처는 대표 결과의 metadata["alternate_sources"])
         
-        # 검색 결과를 종합하여 답변 생성
-        context_parts = []
+        Args:
+            search_results: 검색 결과들
+            
+        Returns:
+            병합된 검색 결과들
+        """
+        collapsed = self.deduplicator.collapse(search_results)
+        if len(collapsed) < len(search_results):
+            tracing.info("유사 중복 결과 병합", before=len(search_results), after=len(collapsed))
+        return collapsed
+    
+    def _build_context(self, search_results: List[SearchResult]) -> AnswerContext:
+        """
+        검색 결과로 토큰 예산 이내의 답변 컨텍스트 구성
         
-        for i, result in enumerate(results_to_use[:3]):  # 상위 3개 결과만 사용
-            # 에러 결과인 경우 특별 처리
-            if "error" in result.source:
-                context_parts.append(f"⚠️ {result.source}: {result.content}")
-            else:
-                context_parts.append(f"출처 {i+1} ({result.source}): {result.content}")
+        Args:
+            search_results: 검색 결과들
+            
+        Returns:
+            답변 컨텍스트
+        """
+        context = self.context_builder.build(search_results)
+        tracing.set_attribute("context_tokens", context.tokens)
+        if context.dropped or context.truncated:
+            tracing.info("답변 컨텍스트 축소", dropped=context.dropped, truncated=context.truncated)
+        return context
+    
+    def _answer_stage(self, enhanced_query: EnhancedQuery) -> str:
+        """
+        최종 답변 단계 선택 (복잡도가 낮은 쿼리는 빠른 모델로 답변)
         
-        context = "\n\n".join(context_parts)
+        Args:
+            enhanced_query: 증강된 쿼리
+            
+        Returns:
+            answer | fast_answer
+        """
+        stage = "answer"
+        max_complexity = Config.GEMINI_FAST_ANSWER_MAX_COMPLEXITY
+        if max_complexity > 0 and enhanced_query.complexity_score <= max_complexity:
+            stage = "fast_answer"
+        tracing.set_attribute("answer_model", self.gemini_client.model_for(stage))
+        return stage
+    
+    def _build_final_prompt(self, enhanced_query: EnhancedQuery, context: AnswerContext) -> str:
+        """
+        최종 답변 프롬프트 생성
         
+        Args:
+            enhanced_query: 증강된 쿼리
+            context: 답변 컨텍스트
+            
+        Returns:
+            프롬프트
+        """
         # 에러가 있었던 경우 프롬프트에 명시
         error_note = ""
-        if error_results:
+        if context.has_errors:
             error_note = f"\n\n참고: 일부 검색에서 오류가 발생했지만, 가능한 정보로 답변을 제공합니다."
         
+        # 이전에 저장된 문서만 있는 경우 답할 수 없으면 웹 검색으로 다시 답변하도록 표시 요청
+        if self._is_local_kb_context(context):
+            error_note += (
+                "\n\n참고: 위 정보는 이전 검색에서 저장된 문서입니다. 이 정보로 질문에 답할 수 없다면 "
+                f"다른 설명 없이 {self.LOCAL_KB_INSUFFICIENT} 만 출력해주세요."
+            )
+        
         # Gemini로 최종 답변 생성
         final_prompt = f"""
         사용자의 질문: {enhanced_query.enhanced_query}
         
         검색된 정보:
-        {context}{error_note}
+        {context.text}{error_note}
         
         위의 정보를 바탕으로 사용자의 질문에 대해 정확하고 유용한 답변을 제공해주세요.
         답변은 한국어로 작성하고, 가능한 한 구체적이고 도움이 되도록 해주세요.
         만약 정보가 불완전하거나 오류가 있었다면, 그 점도 언급해주세요.
         """
         
+        return final_prompt
+    
+    def _fallback_answer(self, context: AnswerContext, e: Exception) -> str:
+        """Gemini 실패 시 기본적인 정보 요약 제공"""
+        tracing.record_error(f"최종 답변 생성 중 오류: {e}")
+        if context.has_valid_results:
+            summary = f"검색 결과를 요약하면:\n\n{context.text}"
+        else:
+            summary = f"검색 중 일부 오류가 발생했습니다:\n\n{context.text}"
+        
+        return summary + f"\n\n(참고: AI 응답 생성 중 오류가 발생하여 원본 검색 결과를 제공합니다.)"
+    
+    def _generate_final_answer(self, enhanced_query: EnhancedQuery, context: AnswerContext) -> Tuple[str, bool]:
+        """
+        최종 응답 생성 (에러 방어적)
+        
+        Args:
+            enhanced_query: 증강된 쿼리
+            context: 답변 컨텍스트
+            
+        Returns:
+            (최종 답변, 기본 답변으로 대체되었는지 여부)
+        """
+        if context.empty:
+            return "죄송합니다. 관련된 정보를 찾을 수 없습니다.", False
+        
+        final_prompt = self._build_final_prompt(enhanced_query, context)
+        
         try:
-            final_answer = self.gemini_client.generate_content(final_prompt)
-            return final_answer
+            return self.gemini_client.generate_answer(final_prompt, self._answer_stage(enhanced_query)), False
         except Exception as e:
-            print(f"❌ 최종 답변 생성 중 오류: {e}")
-            # Gemini 실패 시 기본적인 정보 요약 제공
-            if valid_results:
-                summary = f"검색 결과를 요약하면:\n\n{context}"
-            else:
-                summary = f"검색 중 일부 오류가 발생했습니다:\n\n{context}"
+            return self._fallback_answer(context, e), True
+    
+    async def _agenerate_final_answer(self, enhanced_query: EnhancedQuery, context: AnswerContext) -> Tuple[str, bool]:
+        """
+        최종 응답 생성 (비동기, 에러 방어적)
+        
+        Args:
+            enhanced_query: 증강된 쿼리
+            context: 답변 컨텍스트
             
-            return summary + f"\n\n(참고: AI 응답 생성 중 오류가 발생하여 원본 검색 결과를 제공합니다.)"
+        Returns:
+            (최종 답변, 기본 답변으로 대체되었는지 여부)
+        """
+        if context.empty:
+            return "죄송합니다. 관련된 정보를 찾을 수 없습니다.", False
+        
+        final_prompt = self._build_final_prompt(enhanced_query, context)
+        
+        try:
+            return await self.gemini_client.agenerate_answer(final_prompt, self._answer_stage(enhanced_query)), False
+        except Exception as e:
+            return self._fallback_answer(context, e), True
+    
+    async def _astream_final_answer(
+        self,
+        enhanced_query: EnhancedQuery,
+        context: AnswerContext
+    ) -> AsyncIterator[Tuple[str, bool]]:
+        """
+        최종 응답 스트리밍 생성 (에러 방어적)
+        
+        Args:
+            enhanced_query: 증강된 쿼리
+            context: 답변 컨텍스트
+            
+        Yields:
+            (답변 텍스트 조각, 기본 답변으로 대체 / 중단되었는지 여부)
+        """
+        if context.empty:
+            yield "죄송합니다. 관련된 정보를 찾을 수 없습니다.", False
+            return
+        
+        final_prompt = self._build_final_prompt(enhanced_query, context)
+        
+        # 로컬 지식 베이스 문서만 있으면 답할 수 없다는 표시인지 확인될 때까지 앞부분을 모아서 전달
+        pending = "" if self._is_local_kb_context(context) else None
+        streamed = False
+        try:
+            stream = self.gemini_client.astream_answer(final_prompt, self._answer_stage(enhanced_query))
+            async with aclosing(stream):
+                async for chunk in stream:
+                    if pending is not None:
+                        pending += chunk
+                        head = pending.lstrip()
+                        if head.startswith(self.LOCAL_KB_INSUFFICIENT):
+                            yield self.LOCAL_KB_INSUFFICIENT, False
+                            return
+                        if self.LOCAL_KB_INSUFFICIENT.startswith(head):
+                            continue
+                        chunk, pending = pending, None
+                    streamed = True
+                    yield chunk, False
+            if pending:
+                yield pending, False
+        except Exception as e:
+            if not streamed:
+                yield self._fallback_answer(context, e), True
+            else:
+                tracing.record_error(f"최종 답변 스트리밍 중단: {e}")
+                yield "\n\n(참고: AI 응답 생성 중 오류가 발생하여 답변이 중단되었습니다.)", True
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """컴포넌트별 캐시 통계"""
+        return {
+            "gemini": self.gemini_client.cache_stats(),
+            "web_search": self.web_search_handler.cache_stats(),
+            "realtime_api": self.realtime_api_handler.cache_stats(),
+            "vector_db": self.vector_db_handler.cache.stats(),
+            "semantic": self.semantic_cache.stats()
+        }
     
     def health_check(self) -> Dict[str, Any]:
-        """시스템 상태 확인"""
+        """시스템 상태 확인 (회로 차단 중인 업스트림이 있으면 degraded)"""
+        components = {
+            component: "connected" if resilience.is_available(upstream) else "circuit_open"
+            for component, upstream in (
+                ("gemini_client", "gemini"),
+                ("web_search", "tavily"),
+                ("realtime_api", "coingecko")
+            )
+        }
         return {
-            "status": "healthy",
-            "components": {
-                "gemini_client": "connected",
-                "web_search": "connected",
-                "realtime_api": "connected"
-            },
+            "status": "healthy" if all(state == "connected" for state in components.values()) else "degraded",
+            "components": components,
+            "circuits": resilience.breaker_stats(),
+            "upstream_limits": resilience.limiter_stats(),
+            "gemini_latency": self.gemini_client.latency.stats(),
+            "gemini_models": dict(Config.GEMINI_STAGE_MODELS),
+            "prompt_cache": self.gemini_client.prompt_cache.stats(),
+            "vector_db": self.vector_db_handler.stats(),
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
         }
@@ -0,0 +1,690 @@
+"""
+Pipeline Benchmark - 로컬 스텁 업스트림으로 AI Agent API 성능 측정
+
+실제 API 키 없이 FastAPI 앱을 프로세스 안에서 실행하고, Gemini / Tavily / CoinGecko를
+지연 분포, 오류율, 동시 요청 할당량을 설정할 수 있는 로컬 스텁 서버로 대체한 뒤
+고정 동시성(closed loop) 또는 고정 QPS(open loop)로 부하를 주어
+처리량과 단계별 p50 / p95 / p99 지연 시간을 보고합니다.
+
+    python benchmark.py --concurrency 16 --requests 200
+    python benchmark.py --qps 20 --duration 30 --gemini-latency 800 --gemini-error-rate 0.02
+    python benchmark.py --requests 200 --save baseline.json
+    python benchmark.py --requests 200 --compare baseline.json --tolerance 0.1
+    python benchmark.py --concurrency 24 --requests 200 --gemini-quota 6
+    python benchmark.py --requests 200 --gemini-latency 2000 --gemini-fast-ratio 0.3
+    python benchmark.py --requests 200 --gemini-input-latency 400 --prompt-cache
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+
+import httpx
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from text_utils import estimate_tokens
+
+UPSTREAMS = ["gemini", "tavily", "coingecko"]
+
+# 보고 대상 단계 (client: 클라이언트 측 왕복 시간, server: 서버 처리 시간)
+STAGES = ["client", "server", "plan", "execute", "answer"]
+
+# 기본 쿼리 구성 (실시간 / 웹 검색 / 하이브리드)
+DEFAULT_QUERIES = [
+    "현재 시간을 알려주세요",
+    "비트코인 가격이 궁금해요",
+    "이더리움 지금 얼마야",
+    "2024년 최신 AI 뉴스를 알려주세요",
+    "Python FastAPI 튜토리얼을 찾아주세요",
+    "양자 컴퓨터의 원리를 설명해줘",
+    "오늘 날씨와 관련된 최신 뉴스를 알려주세요",
+    "비트코인 현재 가격과 최근 전망 뉴스",
+]
+
+REALTIME_WORDS = ["가격", "시세", "얼마", "시간", "날씨", "주가", "price", "time", "weather"]
+SEARCH_WORDS = ["뉴스", "전망", "분석", "news"]
+
+
+class LatencyProfile:
+    """업스트림 지연 분포 (로그 정규 분포), 오류율, 동시 요청 할당량"""
+
+    def __init__(self, median_ms: float, sigma: float = 0.3, error_rate: float = 0.0, quota: int = 0):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        # 동시 요청 수가 할당량을 넘으면 즉시 429 (0이면 제한 없음)
+        self.quota = quota
+
+    def sample(self, rng: random.Random) -> float:
+        """지연 시간 샘플 (초 단위)"""
+        if self.median_ms <= 0:
+            return 0.0
+        return rng.lognormvariate(math.log(self.median_ms / 1000), self.sigma)
+
+    def should_fail(self, rng: random.Random) -> bool:
+        """이번 호출을 실패시킬지 여부"""
+        return rng.random() < self.error_rate
+
+
+class StubUpstreams:
+    """Gemini / Tavily / CoinGecko 스텁 서버"""
+
+    def __init__(
+        self,
+        profiles: Dict[str, LatencyProfile],
+        seed: Optional[int] = None,
+        gemini_fast_ratio: float = 1.0,
+        gemini_input_latency: float = 0.0,
+        tavily_duplicates: int = 0
+    ):
+        self.profiles = profiles
+        # 빠른(flash) 모델 요청의 Gemini 지연 시간 배율
+        self.gemini_fast_ratio = gemini_fast_ratio
+        # 캐시되지 않은 입력 1000토큰당 추가 지연 시간 (ms)
+        self.gemini_input_latency = gemini_input_latency
+        # Tavily 결과 중 첫 결과의 전재(미러) 본문으로 채울 결과 수
+        self.tavily_duplicates = tavily_duplicates
+        self.gemini_models: Dict[str, int] = {}
+        # 스텁 컨텍스트 캐시 (cachedContents 이름 → 접두사)
+        self.cached_contents: Dict[str, str] = {}
+        self.cached_tokens = 0
+        self.rng = random.Random(seed)
+        self.calls = {name: 0 for name in UPSTREAMS}
+        self.failures = {name: 0 for name in UPSTREAMS}
+        self.throttled = {name: 0 for name in UPSTREAMS}
+        self.in_flight = {name: 0 for name in UPSTREAMS}
+        self.app = self._create_app()
+        self.server: Optional[uvicorn.Server] = None
+        self.base_url = ""
+
+    async def _simulate(self, upstream: str, scale: float = 1.0, extra: float = 0.0) -> Optional[JSONResponse]:
+        """지연 시간(× scale + extra 초)만큼 대기 후 오류 응답 (실패하지 않으면 None)"""
+        profile = self.profiles[upstream]
+        self.calls[upstream] += 1
+        if profile.quota and self.in_flight[upstream] >= profile.quota:
+            self.throttled[upstream] += 1
+            return JSONResponse(
+                status_code=429,
+                content={"error": f"stub {upstream} quota exceeded"},
+                headers={"Retry-After": "1"}
+            )
+
+        self.in_flight[upstream] += 1
+        try:
+            await asyncio.sleep(profile.sample(self.rng) * scale + extra)
+        finally:
+            self.in_flight[upstream] -= 1
+        if profile.should_fail(self.rng):
+            self.failures[upstream] += 1
+            status = self.rng.choice([429, 500, 503])
+            return JSONResponse(status_code=status, content={"error": f"stub {upstream} failure"})
+        return None
+
+    def _create_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/v1beta/models/{model_action}")
+        async def gemini(model_action: str, request: Request):
+            body = await request.json()
+            model = model_action.split(":")[0]
+            self.gemini_models[model] = self.gemini_models.get(model, 0) + 1
+
+            prompt = body["contents"][0]["parts"][0]["text"]
+            prefix = ""
+            if body.get("cachedContent"):
+                prefix = self.cached_contents.get(body["cachedContent"])
+                if prefix is None:
+                    return JSONResponse(status_code=404, content={"error": "cached content not found"})
+
+            input_tokens = estimate_tokens(prompt)
+            cached_tokens = estimate_tokens(prefix)
+            self.cached_tokens += cached_tokens
+            error = await self._simulate(
+                "gemini",
+                self.gemini_fast_ratio if "flash" in model else 1.0,
+                input_tokens / 1000 * self.gemini_input_latency / 1000
+            )
+            if error is not None:
+                return error
+
+            text = gemini_text(prefix + prompt)
+            if model_action.endswith(":streamGenerateContent"):
+                return StreamingResponse(gemini_stream(text), media_type="text/event-stream")
+            return {
+                "candidates": [{"content": {"parts": [{"text": text}]}}],
+                "usageMetadata": {
+                    "promptTokenCount": input_tokens + cached_tokens,
+                    "cachedContentTokenCount": cached_tokens
+                }
+            }
+
+        @app.post("/v1beta/cachedContents")
+        async def create_cached_content(request: Request):
+            body = await request.json()
+            name = f"cachedContents/stub-{len(self.cached_contents) + 1}"
+            text = body["contents"][0]["parts"][0]["text"]
+            self.cached_contents[name] = text
+            return {"name": name, "model": body.get("model"), "usageMetadata": {"totalTokenCount": estimate_tokens(text)}}
+
+        @app.patch("/v1beta/cachedContents/{cache_id}")
+        async def update_cached_content(cache_id: str):
+            name = f"cachedContents/{cache_id}"
+            if name not in self.cached_contents:
+                return JSONResponse(status_code=404, content={"error": "cached content not found"})
+            return {"name": name}
+
+        @app.post("/tavily/search")
+        async def tavily(request: Request):
+            body = await request.json()
+            error = await self._simulate("tavily")
+            if error is not None:
+                return error
+
+            query = body.get("query", "")
+            max_results = body.get("max_results", 5)
+            return {
+                "answer": f"{query}에 대한 요약 답변",
+                "results": [
+                    {
+                        "title": f"{query} 결과 {i + 1}",
+                        "url": f"https://example.com/{quote(query)}/{i + 1}",
+                        "content": tavily_content(query, i, max_results, self.tavily_duplicates),
+                        "score": round(0.9 - i * 0.1, 2),
+                        "raw_content": None
+                    }
+                    for i in range(max_results)
+                ]
+            }
+
+        @app.get("/coingecko/simple/price")
+        async def coingecko(ids: str = "", vs_currencies: str = "usd"):
+            error = await self._simulate("coingecko")
+            if error is not None:
+                return error
+
+            currencies = vs_currencies.split(",")
+            prices = {}
+            for coin_id in filter(None, ids.split(",")):
+                prices[coin_id] = {currency: 100.0 for currency in currencies}
+                prices[coin_id].update({f"{currency}_24h_change": 1.5 for currency in currencies})
+            return prices
+
+        return app
+
+    def start(self):
+        """별도 스레드에서 스텁 서버 시작"""
+        port = free_port()
+        self.server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=port, log_level="warning"))
+        threading.Thread(target=self.server.run, daemon=True).start()
+        while not self.server.started:
+            time.sleep(0.01)
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    def stop(self):
+        if self.server is not None:
+            self.server.should_exit = True
+
+
+def tavily_content(query: str, index: int, total: int, duplicates: int = 0) -> str:
+    """
+    결과별로 서로 다른 Tavily 스텁 본문 (뒤쪽 duplicates개는 첫 결과의 전재 본문)
+
+    Args:
+        query: 검색 쿼리
+        index: 결과 순서
+        total: 전체 결과 수
+        duplicates: 전재 본문으로 채울 결과 수
+    """
+    if index > 0 and index >= total - duplicates:
+        return f"[전재] {tavily_content(query, 0, total)} 무단 전재 금지"
+
+    rng = random.Random(f"{query}:{index}")
+
+    def word() -> str:
+        # 임의의 한글 2~3음절 단어
+        return "".join(chr(0xAC00 + rng.randrange(11172)) for _ in range(rng.randint(2, 3)))
+
+    sentences = [" ".join(word() for _ in range(8)) + "." for _ in range(4)]
+    return f"{query}에 관한 검색 결과 {index + 1}. " + " ".join(sentences)
+
+
+def gemini_text(prompt: str) -> str:
+    """프롬프트 종류(증강 / 분류 / 계획 / 답변)에 맞는 Gemini 응답 텍스트 생성"""
+    query_match = re.search(r"(?:원본 질문|증강된 질문):\s*(.+)", prompt)
+    query = query_match.group(1).strip() if query_match else ""
+
+    has_enhancement = '"enhanced_query"' in prompt
+    has_action = '"action_type"' in prompt
+
+    if not has_enhancement and not has_action:
+        return "스텁 최종 답변입니다. " * 20
+
+    realtime = any(word in query.lower() for word in REALTIME_WORDS)
+    search = any(word in query.lower() for word in SEARCH_WORDS)
+
+    data: Dict[str, Any] = {}
+    if has_enhancement:
+        data.update({
+            "enhanced_query": query,
+            "keywords": query.split()[:3],
+            "intent": "정보 조회",
+            # 단순 조회는 낮은 복잡도, 뉴스 / 분석 / 설명 요청은 높은 복잡도
+            "complexity_score": 7 if search or "설명" in query else 3
+        })
+    if has_action:
+        action = "hybrid" if realtime and search else "realtime_api" if realtime else "web_search"
+        data.update({"action_type": action, "confidence": 0.9, "reasoning": "스텁 분류", "parameters": {}})
+
+    return "```json\n" + json.dumps(data, ensure_ascii=False) + "\n```"
+
+
+async def gemini_stream(text: str):
+    """Gemini SSE 스트림 (단어 단위 조각)"""
+    for word in text.split(" "):
+        chunk = {"candidates": [{"content": {"parts": [{"text": word + " "}]}}]}
+        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\r\n\r\n"
+        await asyncio.sleep(0)
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def configure_environment(base_url: str, use_cache: bool, use_prompt_cache: bool = False, use_local_kb: bool = False):
+    """
+    스텁 서버를 가리키도록 환경 변수 설정 (config 모듈 import 전에 호출해야 함)
+
+    Args:
+        base_url: 스텁 서버 주소
+        use_cache: 캐시 사용 여부 (False면 모든 캐시 TTL을 0으로 설정)
+        use_prompt_cache: 고정 프롬프트 접두사를 스텁 컨텍스트 캐시에 등록할지 여부 (최소 크기 제한 없음)
+        use_local_kb: 가져온 웹 검색 결과를 벡터 DB(메모리)에 저장하고 로컬 지식 베이스 액션을 사용할지 여부
+    """
+    os.environ.update({
+        "GEMINI_API_KEY": "benchmark",
+        "TAVILY_API_KEY": "benchmark",
+        "GEMINI_API_URL": base_url + "/v1beta/models/{model}:generateContent",
+        "GEMINI_STREAM_API_URL": base_url + "/v1beta/models/{model}:streamGenerateContent",
+        "TAVILY_API_URL": base_url + "/tavily/search",
+        "COINGECKO_API_URL": base_url + "/coingecko/simple/price",
+        "GEMINI_CACHE_API_URL": base_url + "/v1beta/cachedContents",
+        "PROMPT_CACHE_ENABLED": "true" if use_prompt_cache else "false",
+        "PROMPT_CACHE_MIN_TOKENS": "0",
+        "INTENT_LOG_PATH": "",
+        "VECTOR_DB_ENABLED": "true" if use_local_kb else "false",
+        "LOCAL_KB_ENABLED": "true" if use_local_kb else "false",
+        "VECTOR_DB_PATH": "",
+    })
+    # 트레이스 파일은 명시적으로 지정한 경우에만 기록
+    os.environ.setdefault("TRACE_EXPORT_PATH", "")
+    if not use_cache:
+        for name in [
+            "GEMINI_ENHANCE_CACHE_TTL", "GEMINI_CLASSIFY_CACHE_TTL", "GEMINI_PLAN_CACHE_TTL",
+            "GEMINI_ANSWER_CACHE_TTL", "WEB_SEARCH_CACHE_TTL", "REALTIME_CACHE_MAX_ENTRIES",
+            "SEMANTIC_CACHE_MAX_ENTRIES"
+        ]:
+            os.environ[name] = "0"
+
+
+class LoadResult:
+    """요청별 측정 결과 수집"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.statuses: Dict[str, int] = {}
+        self.actions: Dict[str, int] = {}
+        self.completed = 0
+        self.errors = 0
+        self.degraded = 0
+        self.cache_hits = 0
+        self.elapsed = 0.0
+
+    def record(self, status: int, client_time: float, body: Optional[Dict[str, Any]]):
+        self.completed += 1
+        self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+        if status != 200 or body is None:
+            self.errors += 1
+            return
+
+        # 의미 기반 응답 캐시에서 재사용한 응답 (semantic_cache 단계만 기록됨)
+        stage_timings = body.get("stage_timings", {})
+        if body.get("cache_similarity") is not None or set(stage_timings) == {"semantic_cache"}:
+            self.cache_hits += 1
+        # 200이지만 파이프라인 중간 오류로 기본 응답을 받은 경우
+        elif "answer" not in stage_timings:
+            self.degraded += 1
+
+        self.samples["client"].append(client_time)
+        self.samples["server"].append(body.get("processing_time", 0.0))
+        for stage, seconds in stage_timings.items():
+            self.samples.setdefault(stage, []).append(seconds)
+        action = body.get("action_taken", "unknown")
+        self.actions[action] = self.actions.get(action, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        stages = {}
+        for stage, values in self.samples.items():
+            if not values:
+                continue
+            ms = np.asarray(values) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            stages[stage] = {
+                "count": len(values),
+                "mean_ms": round(float(ms.mean()), 2),
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "max_ms": round(float(ms.max()), 2),
+            }
+
+        return {
+            "completed": self.completed,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.completed, 4) if self.completed else 0.0,
+            "degraded": self.degraded,
+            "cache_hits": self.cache_hits,
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_rps": round(self.completed / self.elapsed, 2) if self.elapsed else 0.0,
+            "statuses": self.statuses,
+            "actions": self.actions,
+            "stages": stages,
+        }
+
+
+async def send_query(client: httpx.AsyncClient, query: str, result: LoadResult):
+    """쿼리 1건 전송 및 측정"""
+    started = time.perf_counter()
+    try:
+        response = await client.post("/query", json={"query": query})
+        body = response.json() if response.status_code == 200 else None
+        result.record(response.status_code, time.perf_counter() - started, body)
+    except Exception:
+        result.record(0, time.perf_counter() - started, None)
+
+
+async def closed_loop(client: httpx.AsyncClient, queries: List[str], concurrency: int,
+                      total: Optional[int], duration: Optional[float]) -> LoadResult:
+    """
+    고정 동시성 부하: concurrency 개의 워커가 응답을 받는 즉시 다음 요청 전송
+
+    Args:
+        client: 앱 클라이언트
+        queries: 순환 사용할 쿼리 목록
+        concurrency: 동시 요청 수
+        total: 총 요청 수 (None이면 duration 동안)
+        duration: 부하 시간 (초)
+    """
+    result = LoadResult()
+    counter = iter(range(sys.maxsize))
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        while True:
+            index = next(counter)
+            if total is not None and index >= total:
+                return
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            await send_query(client, queries[index % len(queries)], result)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+async def open_loop(client: httpx.AsyncClient, queries: List[str], qps: float,
+                    total: Optional[int], duration: Optional[float], poisson: bool, seed: Optional[int]) -> LoadResult:
+    """
+    고정 QPS 부하: 응답 여부와 관계없이 일정 간격(또는 포아송 도착)으로 요청 전송
+
+    Args:
+        client: 앱 클라이언트
+        queries: 순환 사용할 쿼리 목록
+        qps: 초당 요청 수
+        total: 총 요청 수 (None이면 duration 동안)
+        duration: 부하 시간 (초)
+        poisson: True면 지수 분포 간격으로 요청 도착
+        seed: 난수 시드
+    """
+    result = LoadResult()
+    rng = random.Random(seed)
+    tasks = []
+
+    started = time.perf_counter()
+    next_at = started
+    index = 0
+    while True:
+        if total is not None and index >= total:
+            break
+        if duration is not None and next_at - started >= duration:
+            break
+
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(send_query(client, queries[index % len(queries)], result)))
+        index += 1
+        next_at += rng.expovariate(qps) if poisson else 1 / qps
+
+    await asyncio.gather(*tasks)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+async def run_benchmark(args: argparse.Namespace, stub: StubUpstreams) -> Dict[str, Any]:
+    """앱을 프로세스 안에서 실행하고 부하 생성"""
+    import main  # 환경 변수 설정 후 import
+
+    queries = load_queries(args.queries)
+    transport = httpx.ASGITransport(app=main.app)
+    timeout = httpx.Timeout(args.timeout)
+
+    async with main.lifespan(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=timeout) as client:
+            if args.warmup:
+                await closed_loop(client, queries, min(args.concurrency, args.warmup), args.warmup, None)
+                stub.calls = {name: 0 for name in UPSTREAMS}
+                stub.failures = {name: 0 for name in UPSTREAMS}
+                stub.throttled = {name: 0 for name in UPSTREAMS}
+                stub.gemini_models = {}
+                stub.cached_tokens = 0
+
+            if args.qps:
+                result = await open_loop(client, queries, args.qps, args.requests, args.duration, args.poisson, args.seed)
+            else:
+                result = await closed_loop(client, queries, args.concurrency, args.requests, args.duration)
+
+    summary = result.summary()
+    summary["upstream_calls"] = dict(stub.calls)
+    summary["upstream_failures"] = dict(stub.failures)
+    summary["upstream_throttled"] = dict(stub.throttled)
+    summary["gemini_models"] = dict(stub.gemini_models)
+    summary["gemini_cached_tokens"] = stub.cached_tokens
+    summary["settings"] = {
+        "mode": f"qps={args.qps}" if args.qps else f"concurrency={args.concurrency}",
+        "cache": args.cache,
+        "prompt_cache": args.prompt_cache,
+        "local_kb": args.local_kb,
+        "profiles": {name: vars(profile) for name, profile in stub.profiles.items()},
+        "gemini_fast_ratio": stub.gemini_fast_ratio,
+        "gemini_input_latency": stub.gemini_input_latency,
+        "tavily_duplicates": stub.tavily_duplicates,
+    }
+    return summary
+
+
+def load_queries(path: Optional[str]) -> List[str]:
+    """쿼리 파일(줄 단위) 로드, 없으면 기본 쿼리"""
+    if not path:
+        return DEFAULT_QUERIES
+    with open(path, encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+    if not queries:
+        raise ValueError(f"쿼리 파일이 비어있습니다: {path}")
+    return queries
+
+
+def print_report(summary: Dict[str, Any]):
+    """결과 표 출력"""
+    print(f"\n=== 벤치마크 결과 ({summary['settings']['mode']}, 캐시 {'사용' if summary['settings']['cache'] else '미사용'}) ===")
+    print(
+        f"완료 요청: {summary['completed']}  오류: {summary['errors']} ({summary['error_rate']:.2%})"
+        f"  기본 응답: {summary['degraded']}  의미 캐시 응답: {summary.get('cache_hits', 0)}"
+    )
+    print(f"소요 시간: {summary['elapsed_s']:.2f}초  처리량: {summary['throughput_rps']:.2f} req/s")
+    print(f"상태 코드: {summary['statuses']}  액션: {summary['actions']}")
+    print(f"업스트림 호출: {summary['upstream_calls']}  실패 주입: {summary['upstream_failures']}")
+    print(f"할당량 초과(429): {summary.get('upstream_throttled', {})}")
+    print(f"Gemini 모델별 호출: {summary.get('gemini_models', {})}  캐시된 입력 토큰: {summary.get('gemini_cached_tokens', 0)}")
+
+    print(f"\n{'단계':<16}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    for stage, stats in summary["stages"].items():
+        print(
+            f"{stage:<16}{stats['count']:>8}{stats['mean_ms']:>10.1f}{stats['p50_ms']:>10.1f}"
+            f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}"
+        )
+
+
+def compare(summary: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    기준 결과 대비 회귀 항목 찾기
+
+    Args:
+        summary: 이번 결과
+        baseline: 기준 결과
+        tolerance: 허용 악화 비율 (0.1 = 10%)
+
+    Returns:
+        회귀 설명 리스트 (없으면 빈 리스트)
+    """
+    regressions = []
+
+    if summary["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(f"throughput {baseline['throughput_rps']} → {summary['throughput_rps']} req/s")
+    if summary["error_rate"] > baseline["error_rate"] + tolerance / 10:
+        regressions.append(f"error_rate {baseline['error_rate']} → {summary['error_rate']}")
+
+    for stage, stats in baseline["stages"].items():
+        current = summary["stages"].get(stage)
+        if current is None:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if current[key] > stats[key] * (1 + tolerance):
+                regressions.append(f"{stage} {key} {stats[key]} → {current[key]}")
+
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="AI Agent 파이프라인 벤치마크 (로컬 스텁 업스트림)")
+    load = parser.add_argument_group("부하")
+    load.add_argument("--concurrency", type=int, default=8, help="고정 동시성 모드의 동시 요청 수")
+    load.add_argument("--qps", type=float, default=None, help="고정 QPS 모드 (지정 시 동시성 모드 대신 사용)")
+    load.add_argument("--poisson", action="store_true", help="QPS 모드에서 포아송 도착 사용")
+    load.add_argument("--requests", type=int, default=None, help="총 요청 수 (기본값: 100, --duration 지정 시 제한 없음)")
+    load.add_argument("--duration", type=float, default=None, help="부하 시간 (초)")
+    load.add_argument("--warmup", type=int, default=0, help="측정 전 워밍업 요청 수")
+    load.add_argument("--queries", default=None, help="쿼리 파일 (한 줄에 하나)")
+    load.add_argument("--cache", action="store_true", help="캐시 사용 (기본값: 모든 캐시 비활성화)")
+    load.add_argument("--prompt-cache", action="store_true", help="고정 프롬프트 접두사 컨텍스트 캐시 사용")
+    load.add_argument("--local-kb", action="store_true", help="웹 검색 결과 벡터 DB 저장 및 로컬 지식 베이스 액션 사용")
+    load.add_argument("--timeout", type=float, default=120, help="요청 타임아웃 (초)")
+    load.add_argument("--seed", type=int, default=None, help="난수 시드")
+
+    defaults = {"gemini": 300, "tavily": 400, "coingecko": 80}
+    upstream = parser.add_argument_group("스텁 업스트림")
+    for name in UPSTREAMS:
+        upstream.add_argument(f"--{name}-latency", type=float, default=defaults[name], help=f"{name} 지연 중앙값 (ms)")
+        upstream.add_argument(f"--{name}-sigma", type=float, default=0.3, help=f"{name} 로그 정규 분포 sigma")
+        upstream.add_argument(f"--{name}-error-rate", type=float, default=0.0, help=f"{name} 오류율 (0~1)")
+        upstream.add_argument(f"--{name}-quota", type=int, default=0, help=f"{name} 동시 요청 할당량 (초과 시 429, 0이면 제한 없음)")
+
+    upstream.add_argument("--gemini-fast-ratio", type=float, default=1.0, help="빠른(flash) 모델 요청의 Gemini 지연 시간 배율")
+    upstream.add_argument("--tavily-duplicates", type=int, default=0, help="Tavily 결과 중 첫 결과의 전재 본문으로 채울 결과 수")
+    upstream.add_argument("--gemini-input-latency", type=float, default=0.0, help="캐시되지 않은 Gemini 입력 1000토큰당 추가 지연 시간 (ms)")
+
+    output = parser.add_argument_group("출력")
+    output.add_argument("--save", default=None, help="결과 JSON 저장 경로")
+    output.add_argument("--compare", default=None, help="기준 결과 JSON (회귀 시 종료 코드 1)")
+    output.add_argument("--tolerance", type=float, default=0.1, help="회귀 판단 허용 비율")
+    output.add_argument("--verbose", action="store_true", help="에이전트 로그 출력")
+
+    args = parser.parse_args(argv)
+    if args.requests is None and args.duration is None:
+        args.requests = 100
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    profiles = {
+        name: LatencyProfile(
+            getattr(args, f"{name}_latency"),
+            getattr(args, f"{name}_sigma"),
+            getattr(args, f"{name}_error_rate"),
+            getattr(args, f"{name}_quota")
+        )
+        for name in UPSTREAMS
+    }
+
+    stub = StubUpstreams(
+        profiles,
+        seed=args.seed,
+        gemini_fast_ratio=args.gemini_fast_ratio,
+        gemini_input_latency=args.gemini_input_latency,
+        tavily_duplicates=args.tavily_duplicates
+    )
+    stub.start()
+    configure_environment(stub.base_url, args.cache, args.prompt_cache, args.local_kb)
+
+    try:
+        if args.verbose:
+            summary = asyncio.run(run_benchmark(args, stub))
+        else:
+            logging.getLogger("ai_agent").setLevel(logging.CRITICAL)
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                summary = asyncio.run(run_benchmark(args, stub))
+    finally:
+        stub.stop()
+
+    print_report(summary)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(summary, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ 성능 회귀 ({args.tolerance:.0%} 허용 범위 초과):")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"\n✅ 기준 대비 회귀 없음 ({args.tolerance:.0%} 허용 범위)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+In-process Cache - TTL + LRU 기반 메모리 캐시 및 동시 호출 병합
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from text_utils import normalize_text
+
+
+def make_key(*parts: Any) -> str:
+    """
+    정규화된 입력으로 캐시 키 생성
+    문자열은 소문자화 및 공백 정리 후 사용하고, 나머지는 JSON으로 직렬화
+
+    Args:
+        parts: 키를 구성하는 값들
+
+    Returns:
+        고정 길이 캐시 키
+    """
+    normalized = []
+    for part in parts:
+        if isinstance(part, str):
+            normalized.append(normalize_text(part))
+        else:
+            normalized.append(json.dumps(part, ensure_ascii=False, sort_keys=True, default=str))
+    return hashlib.sha256("\x1f".join(normalized).encode("utf-8")).hexdigest()
+
+
+def estimate_size(value: Any) -> int:
+    """캐시 값의 대략적인 크기 (bytes)"""
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class TTLCache:
+    """
+    TTL 만료 + LRU 제거 캐시 (스레드 안전)
+
+    항목 수(max_entries)와 전체 크기(max_bytes) 중 하나라도 초과하면
+    가장 오래 사용되지 않은 항목부터 제거합니다. ttl이 0 이하이면 캐시를 사용하지 않습니다.
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int = 1024, max_bytes: Optional[int] = None):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # key -> (value, 만료 시각, 크기)
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        """캐시 사용 여부"""
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        캐시 조회 (조회된 항목은 최근 사용으로 갱신)
+
+        Args:
+            key: 캐시 키
+            default: 없거나 만료된 경우 반환값
+
+        Returns:
+            캐시된 값 또는 default
+        """
+        if not self.enabled:
+            return default
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        캐시 저장 (용량 초과 시 LRU 항목 제거)
+
+        Args:
+            key: 캐시 키
+            value: 저장할 값
+            ttl: 항목별 TTL (기본값: 캐시 TTL)
+        """
+        if not self.enabled:
+            return
+
+        size = estimate_size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, time.monotonic() + (ttl or self.ttl), size)
+            self._bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        """캐시 항목 삭제"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """캐시 전체 비우기"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        """항목 제거 (잠금 보유 상태에서 호출)"""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class SingleFlight:
+    """
+    동일 키에 대한 동시 호출 병합 (스레드용)
+
+    같은 키로 진행 중인 호출이 있으면 새로 호출하지 않고 그 결과를 함께 기다립니다.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        키별로 한 번만 fn을 실행하고 결과(또는 예외)를 모든 호출자에게 전달
+
+        Args:
+            key: 병합 키
+            fn: 실제 호출 함수
+
+        Returns:
+            fn의 결과
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class AsyncSingleFlight:
+    """
+    동일 키에 대한 동시 호출 병합 (asyncio용)
+
+    실제 호출은 별도 태스크로 실행되므로 기다리던 호출자 하나가 취소되어도
+    다른 호출자에게 전달될 결과에는 영향이 없습니다.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, "asyncio.Task[Any]"] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, coro_fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        키별로 한 번만 coro_fn을 실행하고 결과(또는 예외)를 모든 호출자에게 전달
+
+        Args:
+            key: 병합 키
+            coro_fn: 실제 호출 코루틴 함수
+
+        Returns:
+            coro_fn의 결과
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coro_fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: "asyncio.Task[Any]"):
+        """완료된 호출 정리 (기다리는 호출자가 없어도 예외 경고가 남지 않도록 조회)"""
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()
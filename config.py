@@ -16,18 +16,267 @@ class Config:
     TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
     
     # Gemini API 설정
-    GEMINI_MODEL = "gemini-2.5-pro"
-    GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-pro")
+    GEMINI_FAST_MODEL = os.getenv("GEMINI_FAST_MODEL", "gemini-2.5-flash")
+    GEMINI_API_URL = os.getenv(
+        "GEMINI_API_URL",
+        "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+    )
+    GEMINI_STREAM_API_URL = os.getenv(
+        "GEMINI_STREAM_API_URL",
+        "https://generativelanguage.googleapis.com/v1beta/models/{model}:streamGenerateContent"
+    )
+    
+    # 외부 API 엔드포인트 (벤치마크 등에서 로컬 스텁 서버로 대체 가능)
+    TAVILY_API_URL = os.getenv("TAVILY_API_URL", "https://api.tavily.com/search")
+    COINGECKO_API_URL = os.getenv("COINGECKO_API_URL", "https://api.coingecko.com/api/v3/simple/price")
     
     # Gemini 2.5 Pro 전용 설정
-    GEMINI_THINKING_BUDGET = -1  # 무제한 사고 과정
+    GEMINI_THINKING_BUDGET = int(os.getenv("GEMINI_THINKING_BUDGET", -1))  # 무제한 사고 과정
+    
+    # Gemini 단계별 모델 (증강 / 분류 / 계획은 빠른 모델, 최종 답변은 GEMINI_MODEL)
+    # fast_answer: 복잡도가 낮은 쿼리의 최종 답변
+    GEMINI_STAGE_MODELS = {
+        "enhance": os.getenv("GEMINI_ENHANCE_MODEL", GEMINI_FAST_MODEL),
+        "classify": os.getenv("GEMINI_CLASSIFY_MODEL", GEMINI_FAST_MODEL),
+        "plan": os.getenv("GEMINI_PLAN_MODEL", GEMINI_FAST_MODEL),
+        "answer": os.getenv("GEMINI_ANSWER_MODEL", GEMINI_MODEL),
+        "fast_answer": os.getenv("GEMINI_FAST_ANSWER_MODEL", GEMINI_FAST_MODEL),
+        "default": GEMINI_MODEL,
+    }
+    
+    # Gemini 단계별 사고 예산 (thinkingBudget 토큰 수, -1 = 동적, 0 = 사고 비활성화 - Pro 모델은 0 불가)
+    GEMINI_STAGE_THINKING_BUDGETS = {
+        "enhance": int(os.getenv("GEMINI_ENHANCE_THINKING_BUDGET", 0)),
+        "classify": int(os.getenv("GEMINI_CLASSIFY_THINKING_BUDGET", 0)),
+        "plan": int(os.getenv("GEMINI_PLAN_THINKING_BUDGET", 0)),
+        "answer": int(os.getenv("GEMINI_ANSWER_THINKING_BUDGET", GEMINI_THINKING_BUDGET)),
+        "fast_answer": int(os.getenv("GEMINI_FAST_ANSWER_THINKING_BUDGET", 0)),
+        "default": GEMINI_THINKING_BUDGET,
+    }
+    
+    # 증강된 쿼리의 복잡도(1-10)가 이 값 이하이면 최종 답변을 fast_answer 모델로 생성 (0이면 비활성화)
+    GEMINI_FAST_ANSWER_MAX_COMPLEXITY = float(os.getenv("GEMINI_FAST_ANSWER_MAX_COMPLEXITY", 4))
+
+    # HTTP 연결 풀 / 타임아웃 설정 (초 단위)
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+    GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", 30))
+    TAVILY_TIMEOUT = float(os.getenv("TAVILY_TIMEOUT", 30))
+    REALTIME_API_TIMEOUT = float(os.getenv("REALTIME_API_TIMEOUT", 10))
+    
+    # 업스트림별 적응형 동시 요청 한도 (AIMD, 429 / 지연 시간 증가 시 감소)
+    UPSTREAM_LIMIT_ENABLED = os.getenv("UPSTREAM_LIMIT_ENABLED", "true").lower() == "true"
+    UPSTREAM_LIMIT_INITIAL = int(os.getenv("UPSTREAM_LIMIT_INITIAL", 8))
+    UPSTREAM_LIMIT_MIN = int(os.getenv("UPSTREAM_LIMIT_MIN", 1))
+    UPSTREAM_LIMIT_MAX = int(os.getenv("UPSTREAM_LIMIT_MAX", HTTP_POOL_SIZE))
+    UPSTREAM_LIMIT_BACKOFF = float(os.getenv("UPSTREAM_LIMIT_BACKOFF", 0.5))
+    UPSTREAM_LIMIT_LATENCY_BACKOFF = float(os.getenv("UPSTREAM_LIMIT_LATENCY_BACKOFF", 0.9))
+    UPSTREAM_LIMIT_LATENCY_TOLERANCE = float(os.getenv("UPSTREAM_LIMIT_LATENCY_TOLERANCE", 2.0))
+    UPSTREAM_LIMIT_WAIT_TIMEOUT = float(os.getenv("UPSTREAM_LIMIT_WAIT_TIMEOUT", 5))
+    
+    # 업스트림별 회로 차단기 (최근 BREAKER_WINDOW초 동안 오류율 / 느린 요청 비율이 임계값 이상이면 차단)
+    BREAKER_ENABLED = os.getenv("BREAKER_ENABLED", "true").lower() == "true"
+    BREAKER_WINDOW = float(os.getenv("BREAKER_WINDOW", 30))
+    BREAKER_MIN_REQUESTS = int(os.getenv("BREAKER_MIN_REQUESTS", 10))
+    BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", 0.5))
+    BREAKER_SLOW_RATE = float(os.getenv("BREAKER_SLOW_RATE", 0.8))
+    BREAKER_SLOW_CALL_SECONDS = {
+        "gemini": float(os.getenv("BREAKER_GEMINI_SLOW_CALL_SECONDS", 20)),
+        "tavily": float(os.getenv("BREAKER_TAVILY_SLOW_CALL_SECONDS", 8)),
+        "coingecko": float(os.getenv("BREAKER_COINGECKO_SLOW_CALL_SECONDS", 3)),
+        "default": float(os.getenv("BREAKER_DEFAULT_SLOW_CALL_SECONDS", 10)),
+    }
+    BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", 15))
+    BREAKER_HALF_OPEN_PROBES = int(os.getenv("BREAKER_HALF_OPEN_PROBES", 2))
+    
+    # 재시도 (지수 백오프 + jitter, 초 단위) / 재시도 예산 (추가 요청 수 ≤ 원래 요청 수 × ratio)
+    RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", 0.2))
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", 2.0))
+    RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", 0.1))
+    RETRY_BUDGET_MAX_TOKENS = float(os.getenv("RETRY_BUDGET_MAX_TOKENS", 10))
+    
+    # Gemini 단계별 최대 시도 횟수 (헤지 요청 포함)
+    GEMINI_MAX_ATTEMPTS = {
+        "enhance": int(os.getenv("GEMINI_ENHANCE_MAX_ATTEMPTS", 2)),
+        "classify": int(os.getenv("GEMINI_CLASSIFY_MAX_ATTEMPTS", 2)),
+        "plan": int(os.getenv("GEMINI_PLAN_MAX_ATTEMPTS", 2)),
+        "answer": int(os.getenv("GEMINI_ANSWER_MAX_ATTEMPTS", 3)),
+        "fast_answer": int(os.getenv("GEMINI_FAST_ANSWER_MAX_ATTEMPTS", 3)),
+        "default": int(os.getenv("GEMINI_DEFAULT_MAX_ATTEMPTS", 2)),
+    }
+    
+    # Gemini 헤지 요청 (비동기 호출이 단계별 최근 지연 시간 분위수를 넘으면 두 번째 요청)
+    GEMINI_HEDGE_ENABLED = os.getenv("GEMINI_HEDGE_ENABLED", "true").lower() == "true"
+    GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", 0.95))
+    GEMINI_HEDGE_MIN_SAMPLES = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", 20))
+    GEMINI_HEDGE_MIN_DELAY = float(os.getenv("GEMINI_HEDGE_MIN_DELAY", 0.2))
+    GEMINI_LATENCY_WINDOW = int(os.getenv("GEMINI_LATENCY_WINDOW", 500))
+    
+    # Gemini 컨텍스트 캐시 (고정 프롬프트 접두사를 cachedContents로 등록하고 요청마다 핸들로 참조)
+    # 등록 / 갱신은 백그라운드에서 수행하며, 등록 전이나 실패 시에는 접두사를 요청에 그대로 포함
+    # Gemini는 일정 크기(모델별 1024 ~ 4096 토큰) 미만의 캐시를 허용하지 않으므로 작은 접두사는 등록하지 않음
+    GEMINI_CACHE_API_URL = os.getenv(
+        "GEMINI_CACHE_API_URL",
+        "https://generativelanguage.googleapis.com/v1beta/cachedContents"
+    )
+    PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() == "true"
+    PROMPT_CACHE_TTL = int(os.getenv("PROMPT_CACHE_TTL", 3600))
+    PROMPT_CACHE_REFRESH_MARGIN = int(os.getenv("PROMPT_CACHE_REFRESH_MARGIN", 300))  # 만료 전 이 시간(초) 안에 들어오면 TTL 연장
+    PROMPT_CACHE_MIN_TOKENS = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", 1024))
+    PROMPT_CACHE_RETRY_SECONDS = float(os.getenv("PROMPT_CACHE_RETRY_SECONDS", 300))  # 등록 실패 후 재시도까지 대기
+    
+    # 하이브리드 액션 소스별 마감 시간 (초 단위, 초과 시 해당 소스 결과 제외)
+    HYBRID_WEB_DEADLINE = float(os.getenv("HYBRID_WEB_DEADLINE", 8))
+    HYBRID_REALTIME_DEADLINE = float(os.getenv("HYBRID_REALTIME_DEADLINE", 3))
+
+    # Gemini 단계별 결과 캐시 (TTL 초 단위, 0이면 비활성화)
+    GEMINI_CACHE_TTL = {
+        "enhance": float(os.getenv("GEMINI_ENHANCE_CACHE_TTL", 3600)),
+        "classify": float(os.getenv("GEMINI_CLASSIFY_CACHE_TTL", 3600)),
+        "plan": float(os.getenv("GEMINI_PLAN_CACHE_TTL", 3600)),
+        "answer": float(os.getenv("GEMINI_ANSWER_CACHE_TTL", 300)),
+    }
+    GEMINI_CACHE_MAX_ENTRIES = int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", 2048))
+    GEMINI_CACHE_MAX_BYTES = int(os.getenv("GEMINI_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+    
+    # 웹 검색 결과 수 (재정렬 후 상위 결과만 답변에 사용하므로 적게 요청해도 됨)
+    WEB_SEARCH_MAX_RESULTS = int(os.getenv("WEB_SEARCH_MAX_RESULTS", 5))
+    HYBRID_WEB_MAX_RESULTS = int(os.getenv("HYBRID_WEB_MAX_RESULTS", 3))
+    
+    # 검색 결과 재정렬 (증강된 쿼리 / 키워드 기준 BM25 점수와 업스트림 관련도의 가중 평균)
+    RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() == "true"
+    RERANK_WEIGHT = float(os.getenv("RERANK_WEIGHT", 0.5))  # BM25 점수 비중 (0 ~ 1)
+    RERANK_KEYWORD_WEIGHT = float(os.getenv("RERANK_KEYWORD_WEIGHT", 1.0))  # 키워드 용어 추가 가중치
+    RERANK_SOURCES = [
+        source.strip()
+        for source in os.getenv("RERANK_SOURCES", "web_search,web_search_summary,news_search,local_kb").split(",")
+        if source.strip()
+    ]  # 점수를 다시 계산할 결과 소스 (실시간 데이터는 업스트림 관련도 유지)
+    
+    # 유사 중복 검색 결과 병합 (본문 문자 n-gram SimHash 지문의 해밍 거리가 임계값 이하이면 병합, 64비트 중)
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", 8))
+    DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", 3))
+    DEDUP_MIN_CHARS = int(os.getenv("DEDUP_MIN_CHARS", 80))  # 이보다 짧은 결과는 병합하지 않음
+    
+    # 로컬 벡터 DB (가져온 웹 검색 결과를 float16 메모리 맵 + IVF 역색인으로 저장, 경로가 비어 있으면 메모리에만 보관)
+    VECTOR_DB_ENABLED = os.getenv("VECTOR_DB_ENABLED", "true").lower() == "true"
+    VECTOR_DB_PATH = os.getenv("VECTOR_DB_PATH", "vector_db")
+    VECTOR_DB_DIM = int(os.getenv("VECTOR_DB_DIM", 512))
+    VECTOR_DB_NPROBE = int(os.getenv("VECTOR_DB_NPROBE", 8))  # 검색 시 비교할 역색인 목록 수
+    VECTOR_DB_TRAIN_MIN = int(os.getenv("VECTOR_DB_TRAIN_MIN", 256))  # 이 문서 수부터 역색인 사용 (그 전에는 전체 비교)
+    VECTOR_DB_MAX_DOCUMENTS = int(os.getenv("VECTOR_DB_MAX_DOCUMENTS", 100000))
+    VECTOR_DB_MAX_AGE = float(os.getenv("VECTOR_DB_MAX_AGE", 86400))  # 초 단위, 이보다 오래된 문서는 검색 / 재사용하지 않음
+    VECTOR_DB_MIN_SCORE = float(os.getenv("VECTOR_DB_MIN_SCORE", 0.4))  # 코사인 유사도 (같은 주제 0.3 ~ 0.7, 무관한 주제 0.1 이하)
+    VECTOR_DB_MAX_RESULTS = int(os.getenv("VECTOR_DB_MAX_RESULTS", 5))
+    VECTOR_DB_SOURCES = [
+        source.strip()
+        for source in os.getenv("VECTOR_DB_SOURCES", "web_search,web_search_summary").split(",")
+        if source.strip()
+    ]  # 저장할 검색 결과 소스
+    VECTOR_DB_SEARCH_CACHE_TTL = float(os.getenv("VECTOR_DB_SEARCH_CACHE_TTL", 30))
+    VECTOR_DB_SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("VECTOR_DB_SEARCH_CACHE_MAX_ENTRIES", 1024))
+    
+    # 로컬 지식 베이스 액션 (웹 검색 액션이 선택돼도 벡터 DB에 유사 문서가 충분하면 Tavily 대신 사용)
+    LOCAL_KB_ENABLED = os.getenv("LOCAL_KB_ENABLED", "true").lower() == "true"
+    LOCAL_KB_MIN_HITS = int(os.getenv("LOCAL_KB_MIN_HITS", 2))  # 최소 유사도 이상 문서 수
+    # 문서를 가져온 원래 검색 쿼리와의 최고 코사인 유사도 (같은 질문의 다른 표현 0.75 이상, 같은 주제의 다른 질문 0.7 미만)
+    LOCAL_KB_MIN_QUERY_SCORE = float(os.getenv("LOCAL_KB_MIN_QUERY_SCORE", 0.75))
+    
+    # 최종 답변 컨텍스트 토큰 예산 (관련도 비례로 결과별 배분, 초과분은 잘라내고 예산이 부족한 결과는 제외)
+    ANSWER_CONTEXT_MAX_TOKENS = int(os.getenv("ANSWER_CONTEXT_MAX_TOKENS", 2000))
+    ANSWER_CONTEXT_MAX_RESULTS = int(os.getenv("ANSWER_CONTEXT_MAX_RESULTS", 5))
+    ANSWER_CONTEXT_MIN_RESULT_TOKENS = int(os.getenv("ANSWER_CONTEXT_MIN_RESULT_TOKENS", 60))
+    ANSWER_CONTEXT_USE_RAW_CONTENT = os.getenv("ANSWER_CONTEXT_USE_RAW_CONTENT", "true").lower() == "true"
+    
+    # 의미 기반 응답 캐시 (정규화된 쿼리 임베딩 유사도가 임계값 이상이고 내용어 집합 / 컨텍스트가 같으면 이전 응답 재사용)
+    # 액션 타입별 신선도 (초 단위, 0이면 저장하지 않음) - 실시간 데이터 응답은 짧게 유지
+    SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.85))  # 코사인 유사도 (어순 / 어미만 다른 질문 0.85 이상)
+    SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 2048))
+    SEMANTIC_CACHE_DIM = int(os.getenv("SEMANTIC_CACHE_DIM", 512))
+    SEMANTIC_CACHE_TTL = {
+        "realtime_api": float(os.getenv("SEMANTIC_CACHE_REALTIME_TTL", 10)),
+        "hybrid": float(os.getenv("SEMANTIC_CACHE_HYBRID_TTL", 60)),
+        "web_search": float(os.getenv("SEMANTIC_CACHE_WEB_SEARCH_TTL", 600)),
+        "local_kb": float(os.getenv("SEMANTIC_CACHE_LOCAL_KB_TTL", 600)),
+    }
+    
+    # Tavily 검색 결과 캐시 (TTL 초 단위, 0이면 비활성화)
+    WEB_SEARCH_CACHE_TTL = float(os.getenv("WEB_SEARCH_CACHE_TTL", 600))
+    WEB_SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("WEB_SEARCH_CACHE_MAX_ENTRIES", 1024))
+    WEB_SEARCH_CACHE_MAX_BYTES = int(os.getenv("WEB_SEARCH_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    
+    # 실시간 데이터 캐시 정책 (초 단위)
+    # ttl: 신선한 값으로 취급하는 시간, stale: ttl 이후 백그라운드 갱신 동안 오래된 값을 제공하는 시간
+    # closed_ttl: 주식 장 마감 중 ttl
+    REALTIME_CACHE_POLICIES = {
+        "crypto_price": {
+            "ttl": float(os.getenv("REALTIME_CRYPTO_TTL", 10)),
+            "stale": float(os.getenv("REALTIME_CRYPTO_STALE", 60)),
+        },
+        "weather": {
+            "ttl": float(os.getenv("REALTIME_WEATHER_TTL", 600)),
+            "stale": float(os.getenv("REALTIME_WEATHER_STALE", 1800)),
+        },
+        "stock_price": {
+            "ttl": float(os.getenv("REALTIME_STOCK_TTL", 15)),
+            "stale": float(os.getenv("REALTIME_STOCK_STALE", 60)),
+            "closed_ttl": float(os.getenv("REALTIME_STOCK_CLOSED_TTL", 3600)),
+        },
+    }
+    REALTIME_CACHE_MAX_ENTRIES = int(os.getenv("REALTIME_CACHE_MAX_ENTRIES", 4096))
+    
+    # 요청 트레이싱 (스팬 JSONL 내보내기)
+    # 샘플링된 요청과 오류가 발생한 요청만 기록하며, 원본 페이로드는 샘플링된 요청에서만 수집
+    TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() == "true"
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.01))
+    TRACE_LEVEL = os.getenv("TRACE_LEVEL", "info")  # debug | info | warning | error
+    TRACE_CONSOLE_LEVEL = os.getenv("TRACE_CONSOLE_LEVEL", "warning")  # 이 레벨 이상 이벤트는 로그로도 출력
+    TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")  # 비어 있으면 내보내지 않음
+    TRACE_EXPORT_BATCH_SIZE = int(os.getenv("TRACE_EXPORT_BATCH_SIZE", 100))
+    TRACE_EXPORT_INTERVAL = float(os.getenv("TRACE_EXPORT_INTERVAL", 1.0))
+    TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", 10000))
+    TRACE_PAYLOAD_MAX_CHARS = int(os.getenv("TRACE_PAYLOAD_MAX_CHARS", 8000))
+    
+    # 계획 모드: "two_step" (증강 → 분류 2회 호출) | "single" (1회 호출로 증강 + 분류)
+    PLANNER_MODE = os.getenv("PLANNER_MODE", "two_step")
+    
+    # 로컬 액션 분류기 (신뢰도가 임계값 이상이면 Gemini 액션 분류 호출 생략, two_step 모드)
+    # 기본 예시만으로 학습된 모델은 분류 정확도가 낮으므로, 분류 로그로 재학습한 뒤 활성화
+    INTENT_CLASSIFIER_ENABLED = os.getenv("INTENT_CLASSIFIER_ENABLED", "false").lower() == "true"
+    INTENT_CLASSIFIER_THRESHOLD = float(os.getenv("INTENT_CLASSIFIER_THRESHOLD", 0.85))
+    INTENT_MODEL_PATH = os.getenv("INTENT_MODEL_PATH", "intent_model.npz")
+    INTENT_LOG_PATH = os.getenv("INTENT_LOG_PATH", "intent_decisions.jsonl")
+    
+    # 추측 웹 검색: 계획 호출과 동시에 원본 쿼리로 웹 검색을 시작하고,
+    # 웹 검색 계열 액션이 선택되고 증강된 쿼리가 충분히 유사하면 결과를 재사용 (비동기 경로)
+    SPECULATIVE_WEB_SEARCH = os.getenv("SPECULATIVE_WEB_SEARCH", "false").lower() == "true"
+    SPECULATIVE_SIMILARITY_THRESHOLD = float(os.getenv("SPECULATIVE_SIMILARITY_THRESHOLD", 0.35))
+    
+    # 승인 제어 (동시 처리 파이프라인 수 제한, 0이면 비활성화)
+    # 대기열이 가득 차면 429, 대기 시간이 목표(초)를 넘으면 503 + Retry-After로 즉시 거절
+    ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", 32))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 64))
+    ADMISSION_MAX_QUEUE_WAIT = float(os.getenv("ADMISSION_MAX_QUEUE_WAIT", 2.0))
+    ADMISSION_RETRY_AFTER_MAX = int(os.getenv("ADMISSION_RETRY_AFTER_MAX", 30))
+    
+    # 배치 쿼리 설정
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 8))
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 32))
+    BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", 500))
     
     # API 서버 설정
     API_HOST = os.getenv("API_HOST", "localhost")
     API_PORT = int(os.getenv("API_PORT", 8000))
     
+    # 프롬프트는 고정 지시문(접두사) + 요청별 입력 순서로 구성
+    # 고정 지시문이 항상 프롬프트 앞부분에 같은 내용으로 오므로 Gemini 접두사 캐시(암시적 / cachedContents)로 재사용됨
+    
     # 쿼리 증강 프롬프트
-    QUERY_ENHANCEMENT_PROMPT = """
+    QUERY_ENHANCEMENT_INSTRUCTIONS = """
     당신은 사용자의 질문을 분석하고 개선하는 전문가입니다.
     주어진 질문을 다음과 같이 분석하고 개선해주세요:
 
@@ -36,35 +285,69 @@ class Config:
     3. 질문을 더 구체적이고 명확하게 재구성
     4. 질문의 복잡도 평가 (1-10 점수)
 
-    원본 질문: {original_query}
-
     다음 JSON 형태로 응답해주세요:
-    {{
+    {
         "enhanced_query": "개선된 질문",
         "keywords": ["키워드1", "키워드2", "키워드3"],
         "intent": "질문의 의도",
         "complexity_score": 점수
-    }}
+    }
+    """
+    QUERY_ENHANCEMENT_INPUT = """
+    원본 질문: {original_query}
     """
     
     # 액션 분류 프롬프트
-    ACTION_CLASSIFICATION_PROMPT = """
-    다음 증강된 질문을 분석하여 어떤 데이터 소스가 필요한지 판단해주세요:
+    ACTION_CLASSIFICATION_INSTRUCTIONS = """
+    다음 증강된 질문을 분석하여 어떤 데이터 소스가 필요한지 판단해주세요.
+
+    판단 기준:
+    - realtime_api: 실시간 데이터나 최신 정보가 필요한 경우
+    - web_search: 일반적인 웹 검색이 필요한 경우
+    - hybrid: 여러 소스의 정보가 모두 필요한 경우
 
+    다음 JSON 형태로 응답해주세요:
+    {
+        "action_type": "선택된_액션",
+        "confidence": 신뢰도_점수_0_to_1,
+        "reasoning": "선택 이유",
+        "parameters": {"추가_매개변수": "값"}
+    }
+    """
+    ACTION_CLASSIFICATION_INPUT = """
     증강된 질문: {enhanced_query}
     키워드: {keywords}
     의도: {intent}
+    """
+    
+    # 계획 프롬프트 (쿼리 증강 + 액션 분류 단일 호출)
+    QUERY_PLAN_INSTRUCTIONS = """
+    당신은 사용자의 질문을 분석하고 개선한 뒤, 답변에 필요한 데이터 소스를 판단하는 전문가입니다.
+    주어진 질문을 다음과 같이 분석해주세요:
 
-    판단 기준:
+    1. 질문의 핵심 의도 파악
+    2. 검색에 효과적인 키워드 추출
+    3. 질문을 더 구체적이고 명확하게 재구성
+    4. 질문의 복잡도 평가 (1-10 점수)
+    5. 개선된 질문에 필요한 데이터 소스 판단
+
+    데이터 소스 판단 기준:
     - realtime_api: 실시간 데이터나 최신 정보가 필요한 경우
     - web_search: 일반적인 웹 검색이 필요한 경우
     - hybrid: 여러 소스의 정보가 모두 필요한 경우
 
     다음 JSON 형태로 응답해주세요:
-    {{
+    {
+        "enhanced_query": "개선된 질문",
+        "keywords": ["키워드1", "키워드2", "키워드3"],
+        "intent": "질문의 의도",
+        "complexity_score": 점수,
         "action_type": "선택된_액션",
         "confidence": 신뢰도_점수_0_to_1,
         "reasoning": "선택 이유",
-        "parameters": {{"추가_매개변수": "값"}}
-    }}
+        "parameters": {"추가_매개변수": "값"}
+    }
+    """
+    QUERY_PLAN_INPUT = """
+    원본 질문: {original_query}
     """
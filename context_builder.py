@@ -0,0 +1,153 @@
+"""
+Context Builder - 최종 답변 프롬프트에 넣을 검색 결과 컨텍스트를 토큰 예산 안에서 구성
+
+검색 결과를 관련도 순으로 정렬한 뒤 토큰 예산을 관련도에 비례해 나누고(짧은 결과가 남긴 예산은 나머지에 재분배),
+배정된 예산보다 긴 결과는 앞부분만 남기고, 예산이 너무 적게 배정되는 결과는 제외합니다.
+결과 크기와 관계없이 최종 답변 프롬프트 크기(= Gemini 응답 지연 시간)가 일정하게 유지됩니다.
+"""
+from typing import List, Optional
+
+from config import Config
+from models import SearchResult
+from text_utils import estimate_tokens, truncate_to_tokens
+
+
+class AnswerContext:
+    """구성된 답변 컨텍스트"""
+
+    def __init__(
+        self,
+        text: str,
+        tokens: int,
+        sources: List[SearchResult],
+        has_valid_results: bool,
+        has_errors: bool,
+        dropped: int = 0,
+        truncated: int = 0
+    ):
+        self.text = text
+        self.tokens = tokens
+        self.sources = sources
+        self.has_valid_results = has_valid_results
+        self.has_errors = has_errors
+        self.dropped = dropped
+        self.truncated = truncated
+
+    @property
+    def empty(self) -> bool:
+        """사용할 검색 결과가 없는지"""
+        return not self.sources
+
+
+class ContextBuilder:
+    """토큰 예산 기반 답변 컨텍스트 구성"""
+
+    # 관련도 점수가 0이어도 최소한의 비중 보장
+    MIN_WEIGHT = 0.05
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        max_results: Optional[int] = None,
+        min_result_tokens: Optional[int] = None,
+        use_raw_content: Optional[bool] = None
+    ):
+        self.max_tokens = max_tokens if max_tokens is not None else Config.ANSWER_CONTEXT_MAX_TOKENS
+        self.max_results = max_results if max_results is not None else Config.ANSWER_CONTEXT_MAX_RESULTS
+        self.min_result_tokens = min_result_tokens if min_result_tokens is not None else Config.ANSWER_CONTEXT_MIN_RESULT_TOKENS
+        self.use_raw_content = use_raw_content if use_raw_content is not None else Config.ANSWER_CONTEXT_USE_RAW_CONTENT
+
+    def build(self, search_results: List[SearchResult]) -> AnswerContext:
+        """
+        검색 결과로 답변 컨텍스트 구성
+
+        Args:
+            search_results: 검색 결과들 (유효한 결과가 있으면 오류 결과는 제외)
+
+        Returns:
+            토큰 예산 이내의 답변 컨텍스트
+        """
+        valid_results = [r for r in search_results if "error" not in r.source]
+        has_errors = len(valid_results) < len(search_results)
+
+        # 유효한 결과가 있으면 그것만, 관련도 높은 순으로 사용
+        candidates = valid_results if valid_results else search_results
+        ranked = sorted(candidates, key=lambda r: r.relevance_score, reverse=True)
+        selected = ranked[:self.max_results]
+        dropped = len(ranked) - len(selected)
+
+        bodies = [self._body(result) for result in selected]
+        needs = [estimate_tokens(body) for body in bodies]
+
+        # 예산이 너무 적게 배정되는 결과는 관련도 낮은 것부터 제외 (최소 1개는 유지)
+        while True:
+            allocation = self._allocate(selected, needs)
+            starved = [
+                i for i in range(len(selected))
+                if allocation[i] < min(needs[i], self.min_result_tokens)
+            ]
+            if not starved or len(selected) <= 1:
+                break
+            drop = max(starved)
+            del selected[drop], bodies[drop], needs[drop]
+            dropped += 1
+
+        parts = []
+        truncated = 0
+        for i, result in enumerate(selected):
+            body = bodies[i]
+            if allocation[i] < needs[i]:
+                body = truncate_to_tokens(body, allocation[i])
+                truncated += 1
+            parts.append(f"{self._header(i, result)}{body}")
+
+        text = "\n\n".join(parts)
+        return AnswerContext(
+            text=text,
+            tokens=estimate_tokens(text),
+            sources=selected,
+            has_valid_results=bool(valid_results),
+            has_errors=has_errors,
+            dropped=dropped,
+            truncated=truncated
+        )
+
+    def _header(self, index: int, result: SearchResult) -> str:
+        if "error" in result.source:
+            return f"⚠️ {result.source}: "
+        return f"출처 {index + 1} ({result.source}): "
+
+    def _body(self, result: SearchResult) -> str:
+        """결과 본문 (예산이 남으면 raw_content까지 사용, 잘릴 때는 content가 먼저 남음)"""
+        body = result.content
+        raw_content = result.metadata.get("raw_content") if self.use_raw_content else None
+        if raw_content and raw_content not in body:
+            body = f"{body}\n{raw_content}" if body else raw_content
+        return body
+
+    def _allocate(self, results: List[SearchResult], needs: List[int]) -> List[int]:
+        """
+        토큰 예산을 관련도에 비례해 배분 (필요량보다 큰 몫은 나머지 결과에 재분배)
+
+        Args:
+            results: 검색 결과들
+            needs: 결과별 본문 토큰 수
+
+        Returns:
+            결과별 배정 토큰 수
+        """
+        headers = sum(estimate_tokens(self._header(i, r)) for i, r in enumerate(results))
+        separators = 2 * max(0, len(results) - 1)
+        remaining = max(0, self.max_tokens - headers - separators)
+
+        weights = [max(self.MIN_WEIGHT, r.relevance_score) for r in results]
+        total_weight = sum(weights)
+        allocation = [0] * len(results)
+
+        # 몫에 비해 필요량이 작은 결과부터 채워 남는 예산을 뒤의 결과에 넘김
+        for i in sorted(range(len(results)), key=lambda i: needs[i] / weights[i]):
+            share = int(remaining * weights[i] / total_weight) if total_weight > 0 else 0
+            allocation[i] = min(needs[i], share)
+            remaining -= allocation[i]
+            total_weight -= weights[i]
+        return allocation
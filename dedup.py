@@ -0,0 +1,134 @@
+"""
+Result Deduplication - 내용이 거의 같은 검색 결과(전재 기사, 미러 페이지 등)를 하나로 병합
+
+결과별 본문(content + raw_content)의 문자 n-gram으로 64비트 SimHash 지문을 만들고,
+해밍 거리가 임계값 이하인 결과는 관련도가 가장 높은 결과 하나로 합칩니다.
+병합된 결과의 출처(URL / 제목)는 대표 결과의 metadata["alternate_sources"]에 남겨
+최종 답변 프롬프트는 같은 토큰으로 더 다양한 정보를 담을 수 있습니다.
+"""
+import hashlib
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from models import SearchResult
+from text_utils import char_ngrams
+
+SIMHASH_BITS = 64
+
+
+def simhash(text: str, n: int = 3) -> int:
+    """
+    문자 n-gram 기반 64비트 SimHash 지문
+
+    Args:
+        text: 입력 텍스트
+        n: n-gram 길이
+
+    Returns:
+        지문 (특징이 없으면 0)
+    """
+    weights = [0] * SIMHASH_BITS
+    for gram in char_ngrams(text, n):
+        value = int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """두 지문의 해밍 거리"""
+    return bin(a ^ b).count("1")
+
+
+class ResultDeduplicator:
+    """SimHash 기반 유사 중복 결과 병합"""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        max_distance: Optional[int] = None,
+        shingle_size: Optional[int] = None,
+        min_chars: Optional[int] = None
+    ):
+        self.enabled = enabled if enabled is not None else Config.DEDUP_ENABLED
+        self.max_distance = max_distance if max_distance is not None else Config.DEDUP_MAX_DISTANCE
+        self.shingle_size = shingle_size if shingle_size is not None else Config.DEDUP_SHINGLE_SIZE
+        self.min_chars = min_chars if min_chars is not None else Config.DEDUP_MIN_CHARS
+
+    def collapse(self, search_results: List[SearchResult]) -> List[SearchResult]:
+        """
+        유사 중복 결과 병합 (오류 결과와 너무 짧은 결과는 그대로 유지, 원래 순서 유지)
+
+        Args:
+            search_results: 검색 결과들
+
+        Returns:
+            병합된 검색 결과들 (대표 결과의 metadata["alternate_sources"]에 병합된 출처 기록)
+        """
+        if not self.enabled or len(search_results) < 2:
+            return search_results
+
+        # 관련도 높은 결과가 대표가 되도록 관련도 순으로 비교
+        order = sorted(range(len(search_results)), key=lambda i: search_results[i].relevance_score, reverse=True)
+        fingerprints: Dict[int, int] = {}
+        for i in order:
+            text = self._text(search_results[i])
+            if "error" not in search_results[i].source and len(text) >= self.min_chars:
+                fingerprints[i] = simhash(text, self.shingle_size)
+
+        # 대표 결과 인덱스 → 병합된 결과 인덱스들
+        groups: Dict[int, List[int]] = {}
+        for i in order:
+            if i not in fingerprints:
+                continue
+            representative = next(
+                (
+                    j for j in groups
+                    if hamming_distance(fingerprints[i], fingerprints[j]) <= self.max_distance
+                ),
+                None
+            )
+            if representative is None:
+                groups[i] = []
+            else:
+                groups[representative].append(i)
+
+        merged = {i for members in groups.values() for i in members}
+        if not merged:
+            return search_results
+
+        results = []
+        for i, result in enumerate(search_results):
+            if i in merged:
+                continue
+            if groups.get(i):
+                result = self._merge(result, [search_results[j] for j in groups[i]])
+            results.append(result)
+        return results
+
+    def _text(self, result: SearchResult) -> str:
+        raw_content = result.metadata.get("raw_content") or ""
+        return f"{result.content}\n{raw_content}" if raw_content else result.content
+
+    def _merge(self, representative: SearchResult, duplicates: List[SearchResult]) -> SearchResult:
+        """대표 결과에 중복 결과의 출처 추가 (원본 결과는 수정하지 않음)"""
+        metadata = dict(representative.metadata)
+        alternates = list(metadata.get("alternate_sources") or [])
+        for duplicate in duplicates:
+            alternates.append(self._source_of(duplicate))
+            alternates.extend(duplicate.metadata.get("alternate_sources") or [])
+        metadata["alternate_sources"] = alternates
+        return representative.model_copy(update={"metadata": metadata})
+
+    @staticmethod
+    def _source_of(result: SearchResult) -> Dict[str, Any]:
+        return {
+            "source": result.source,
+            "url": result.metadata.get("url", ""),
+            "title": result.metadata.get("title", ""),
+        }
@@ -1,38 +1,76 @@
 """
 Gemini API Client - HTTP 요청으로 Gemini API 호출
 """
+import copy
 import json
+import httpx
 import requests
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple, AsyncIterator
 from config import Config
+from cache import TTLCache, make_key
+import tracing
+from metrics import timed_stage
+from tracing import traced
+from http_pool import create_session, create_async_client, sync_timeout, async_timeout
+from prompt_cache import PromptCache
+from resilience import LatencyTracker, acall_hedged, call_with_retries, check_throttled, upstream_error
 
 
 class GeminiClient:
     """Gemini API 클라이언트 (HTTP 요청 기반)"""
     
+    # 만료 / 삭제된 cachedContents 핸들을 참조했을 때의 응답 상태 코드
+    CACHE_REJECTED_STATUSES = (400, 403, 404)
+    
     def __init__(self):
         self.api_key = Config.GEMINI_API_KEY
         self.model = Config.GEMINI_MODEL
-        self.api_url = Config.GEMINI_API_URL.format(model=self.model)
+        self.timeout = Config.GEMINI_TIMEOUT
+        
+        # 단계별 응답 지연 시간 (헤지 요청 시점 계산용)
+        self.latency = LatencyTracker()
         
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY가 설정되지 않았습니다.")
-    
-    def generate_content(self, prompt: str) -> str:
-        """
-        Gemini API로 콘텐츠 생성 (단순화된 버전)
         
-        Args:
-            prompt: 입력 프롬프트
-            
-        Returns:
-            생성된 텍스트
-        """
-        headers = {
-            "Content-Type": "application/json",
-        }
+        # keep-alive 연결 풀 (동기 / 비동기)
+        self.session = create_session("gemini")
+        self._async_client: Optional[httpx.AsyncClient] = None
         
-        payload = {
+        # 고정 프롬프트 접두사 컨텍스트 캐시 (cachedContents)
+        self.prompt_cache = PromptCache(self.api_key)
+        
+        # 단계별 결과 캐시 (정규화된 입력 기준)
+        self.stage_caches = {
+            stage: TTLCache(
+                f"gemini_{stage}",
+                ttl=ttl,
+                max_entries=Config.GEMINI_CACHE_MAX_ENTRIES,
+                max_bytes=Config.GEMINI_CACHE_MAX_BYTES
+            )
+            for stage, ttl in Config.GEMINI_CACHE_TTL.items()
+        }
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """비동기 클라이언트 (첫 사용 시 실행 중인 이벤트 루프에서 생성)"""
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = create_async_client("gemini", self.timeout)
+        return self._async_client
+    
+    async def aclose(self):
+        """비동기 연결 풀 정리"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+    
+    def close(self):
+        """동기 연결 풀 및 프롬프트 캐시 작업 정리"""
+        self.prompt_cache.close()
+        self.session.close()
+    
+    def _build_payload(self, prompt: str, stage: str = "default") -> Dict[str, Any]:
+        """generateContent 요청 본문 생성 (단계별 사고 예산 포함)"""
+        return {
             "contents": [{
                 "parts": [{
                     "text": prompt
@@ -43,62 +81,439 @@ class GeminiClient:
                 "topK": 1,
                 "topP": 1,
                 "maxOutputTokens": 9000,
-                "responseMimeType": "text/plain"
+                "responseMimeType": "text/plain",
+                "thinkingConfig": {
+                    "thinkingBudget": self.thinking_budget(stage)
+                }
             }
         }
+    
+    def _prompt_payload(
+        self,
+        prompt: str,
+        stage: str,
+        prefix: Optional[str],
+        use_cache: bool = True
+    ) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        요청 본문 생성 (고정 접두사가 캐시되어 있으면 핸들로 참조, 아니면 접두사를 본문에 포함)
+        
+        Args:
+            prompt: 요청별 입력
+            stage: 파이프라인 단계
+            prefix: 고정 프롬프트 접두사 (없으면 None)
+            use_cache: 캐시 핸들 사용 여부
+            
+        Returns:
+            (요청 본문, 사용한 캐시 핸들 또는 None)
+        """
+        handle = None
+        if prefix and use_cache:
+            handle = self.prompt_cache.lookup(self.model_for(stage), prefix)
         
-        # API 키를 URL 파라미터로 추가
-        url = f"{self.api_url}?key={self.api_key}"
+        if handle is None:
+            return self._build_payload(f"{prefix}{prompt}" if prefix else prompt, stage), None
+        
+        payload = self._build_payload(prompt, stage)
+        payload["cachedContent"] = handle
+        return payload, handle
+    
+    def model_for(self, stage: str) -> str:
+        """단계별 모델"""
+        return Config.GEMINI_STAGE_MODELS.get(stage, Config.GEMINI_STAGE_MODELS["default"])
+    
+    def thinking_budget(self, stage: str) -> int:
+        """단계별 사고 예산 (thinkingBudget)"""
+        return Config.GEMINI_STAGE_THINKING_BUDGETS.get(stage, Config.GEMINI_STAGE_THINKING_BUDGETS["default"])
+    
+    def _request_url(self, stage: str = "default") -> str:
+        """단계별 모델과 API 키를 URL 파라미터로 추가한 요청 URL"""
+        api_url = Config.GEMINI_API_URL.format(model=self.model_for(stage))
+        return f"{api_url}?key={self.api_key}"
+    
+    def _stream_url(self, stage: str = "default") -> str:
+        """단계별 모델의 스트리밍(SSE) 요청 URL"""
+        stream_api_url = Config.GEMINI_STREAM_API_URL.format(model=self.model_for(stage))
+        return f"{stream_api_url}?alt=sse&key={self.api_key}"
+    
+    def _max_attempts(self, stage: str) -> int:
+        """단계별 최대 시도 횟수"""
+        return Config.GEMINI_MAX_ATTEMPTS.get(stage, Config.GEMINI_MAX_ATTEMPTS["default"])
+    
+    def _hedge_delay(self, stage: str) -> Optional[float]:
+        """헤지 요청 시점 (단계별 최근 지연 시간 분위수, 표본이 부족하면 None)"""
+        if not Config.GEMINI_HEDGE_ENABLED:
+            return None
+        delay = self.latency.percentile(stage, Config.GEMINI_HEDGE_PERCENTILE, Config.GEMINI_HEDGE_MIN_SAMPLES)
+        if delay is None:
+            return None
+        return max(Config.GEMINI_HEDGE_MIN_DELAY, delay)
+    
+    @traced("gemini.generate_content")
+    def generate_content(
+        self,
+        prompt: str,
+        timeout: Optional[float] = None,
+        stage: str = "default",
+        prefix: Optional[str] = None
+    ) -> str:
+        """
+        Gemini API로 콘텐츠 생성 (단순화된 버전)
+        
+        재시도 가능한 오류(429, 5xx, 타임아웃)는 단계별 최대 시도 횟수 안에서 재시도합니다.
+        
+        Args:
+            prompt: 입력 프롬프트
+            timeout: 호출별 응답 타임아웃 (기본값: Config.GEMINI_TIMEOUT)
+            stage: 파이프라인 단계 (모델 / 사고 예산 / 최대 시도 횟수 / 지연 시간 기록 기준)
+            prefix: 고정 프롬프트 접두사 (컨텍스트 캐시로 재사용, 최종 프롬프트 = prefix + prompt)
+            
+        Returns:
+            생성된 텍스트
+        """
+        tracing.set_attribute("model", self.model_for(stage))
+        tracing.capture("prompt", prompt)
+        data = call_with_retries(
+            "gemini",
+            lambda: self._post(prompt, timeout, stage, prefix),
+            self._max_attempts(stage),
+            tracker=self.latency,
+            key=stage
+        )
+        self._record_usage(data)
+        return self._parse_response(data)
+    
+    @traced("gemini.generate_content")
+    async def agenerate_content(
+        self,
+        prompt: str,
+        timeout: Optional[float] = None,
+        stage: str = "default",
+        prefix: Optional[str] = None
+    ) -> str:
+        """
+        Gemini API로 콘텐츠 생성 (비동기, 연결 풀 재사용)
+        
+        단계별 최근 p95 지연 시간이 지나도 응답이 없으면 헤지 요청을 보내 먼저 도착한 응답을 사용하고,
+        재시도 가능한 오류(429, 5xx, 타임아웃)는 단계별 최대 시도 횟수 안에서 재시도합니다.
+        
+        Args:
+            prompt: 입력 프롬프트
+            timeout: 호출별 응답 타임아웃 (기본값: Config.GEMINI_TIMEOUT)
+            stage: 파이프라인 단계 (모델 / 사고 예산 / 최대 시도 횟수 / 헤지 시점 기준)
+            prefix: 고정 프롬프트 접두사 (컨텍스트 캐시로 재사용, 최종 프롬프트 = prefix + prompt)
+            
+        Returns:
+            생성된 텍스트
+        """
+        tracing.set_attribute("model", self.model_for(stage))
+        tracing.capture("prompt", prompt)
+        data = await acall_hedged(
+            "gemini",
+            lambda: self._apost(prompt, timeout, stage, prefix),
+            self._max_attempts(stage),
+            hedge_delay=self._hedge_delay(stage),
+            tracker=self.latency,
+            key=stage
+        )
+        self._record_usage(data)
+        return self._parse_response(data)
+    
+    def _post(
+        self,
+        prompt: str,
+        timeout: Optional[float],
+        stage: str = "default",
+        prefix: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """generateContent 1회 요청 (응답 JSON, 캐시 핸들이 거부되면 접두사를 포함해 다시 요청)"""
+        headers = {
+            "Content-Type": "application/json",
+        }
         
         try:
-            response = requests.post(
-                url,
+            payload, handle = self._prompt_payload(prompt, stage, prefix)
+            response = self.session.post(
+                self._request_url(stage),
                 headers=headers,
                 json=payload,
-                timeout=30
+                timeout=sync_timeout(timeout or self.timeout)
             )
             
-            response.raise_for_status()
+            if handle is not None and response.status_code in self.CACHE_REJECTED_STATUSES:
+                self.prompt_cache.invalidate(handle)
+                payload, _ = self._prompt_payload(prompt, stage, prefix, use_cache=False)
+                response = self.session.post(
+                    self._request_url(stage),
+                    headers=headers,
+                    json=payload,
+                    timeout=sync_timeout(timeout or self.timeout)
+                )
             
-            data = response.json()
-            print(f"📨 Gemini API 원본 응답: {data}")
+            check_throttled("gemini", response)
+            response.raise_for_status()
             
-            # 안전한 응답 파싱
-            try:
-                # 기본 구조 확인
-                if 'candidates' not in data or not data['candidates']:
-                    raise Exception("응답에 candidates가 없습니다")
-                
-                candidate = data['candidates'][0]
-                
-                # content 구조 확인 및 파싱
-                if 'content' in candidate:
-                    content = candidate['content']
-                    if 'parts' in content and content['parts']:
-                        text = content['parts'][0].get('text', '')
-                        if text:
-                            return text.strip()
-                
-                # finishReason이 'SAFETY' 등인 경우 처리
-                if 'finishReason' in candidate:
-                    finish_reason = candidate['finishReason']
-                    if finish_reason == 'SAFETY':
-                        raise Exception("안전 필터로 인해 응답이 차단되었습니다")
-                    elif finish_reason == 'MAX_TOKENS':
-                        raise Exception("최대 토큰 수 초과로 응답이 잘렸습니다")
-                
-                # 모든 파싱 시도 실패
-                raise Exception(f"예상과 다른 응답 구조: {data}")
-                
-            except Exception as parse_error:
-                print(f"❌ 응답 파싱 중 세부 오류: {parse_error}")
-                raise Exception(f"Gemini API 응답 파싱 실패: {parse_error}")
+            return response.json()
                 
+        except json.JSONDecodeError as e:
+            raise Exception(f"Gemini API 응답 JSON 파싱 실패: {e}")
         except requests.exceptions.RequestException as e:
-            raise Exception(f"Gemini API 요청 실패: {e}")
+            raise upstream_error(f"Gemini API 요청 실패: {e}", e)
+    
+    async def _apost(
+        self,
+        prompt: str,
+        timeout: Optional[float],
+        stage: str = "default",
+        prefix: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """generateContent 1회 요청 (비동기, 응답 JSON, 캐시 핸들이 거부되면 접두사를 포함해 다시 요청)"""
+        headers = {
+            "Content-Type": "application/json",
+        }
+        
+        try:
+            payload, handle = self._prompt_payload(prompt, stage, prefix)
+            response = await self._get_async_client().post(
+                self._request_url(stage),
+                headers=headers,
+                json=payload,
+                timeout=async_timeout(timeout or self.timeout)
+            )
+            
+            if handle is not None and response.status_code in self.CACHE_REJECTED_STATUSES:
+                self.prompt_cache.invalidate(handle)
+                payload, _ = self._prompt_payload(prompt, stage, prefix, use_cache=False)
+                response = await self._get_async_client().post(
+                    self._request_url(stage),
+                    headers=headers,
+                    json=payload,
+                    timeout=async_timeout(timeout or self.timeout)
+                )
+            
+            check_throttled("gemini", response)
+            response.raise_for_status()
+            
+            return response.json()
+                
+        except httpx.HTTPError as e:
+            raise upstream_error(f"Gemini API 요청 실패: {e}", e)
         except json.JSONDecodeError as e:
             raise Exception(f"Gemini API 응답 JSON 파싱 실패: {e}")
     
+    async def astream_content(self, prompt: str, timeout: Optional[float] = None, stage: str = "default") -> AsyncIterator[str]:
+        """
+        Gemini API 스트리밍 생성 (streamGenerateContent, SSE)
+        
+        첫 조각을 전달하기 전(연결 / 응답 상태 확인)까지는 재시도 가능한 오류(429, 5xx, 타임아웃)를
+        단계별 최대 시도 횟수와 재시도 예산 안에서 재시도합니다. 전달을 시작한 뒤의 오류는 그대로 발생합니다.
+        
+        Args:
+            prompt: 입력 프롬프트
+            timeout: 청크 사이 최대 대기 시간 (기본값: Config.GEMINI_TIMEOUT)
+            stage: 파이프라인 단계 (모델 / 사고 예산 / 최대 시도 횟수 기준)
+            
+        Yields:
+            생성된 텍스트 조각
+        """
+        with tracing.span("gemini.stream_content"):
+            tracing.set_attribute("model", self.model_for(stage))
+            tracing.capture("prompt", prompt)
+            response = await acall_hedged(
+                "gemini",
+                lambda: self._aopen_stream(prompt, timeout, stage),
+                self._max_attempts(stage)
+            )
+            
+            chunks = 0
+            try:
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    
+                    text = self._parse_stream_chunk(json.loads(line[5:]))
+                    if text:
+                        chunks += 1
+                        yield text
+                        
+            except httpx.HTTPError as e:
+                raise upstream_error(f"Gemini API 스트리밍 요청 실패: {e}", e)
+            except json.JSONDecodeError as e:
+                raise Exception(f"Gemini API 스트리밍 응답 JSON 파싱 실패: {e}")
+            finally:
+                await response.aclose()
+                tracing.set_attribute("chunks", chunks)
+    
+    async def _aopen_stream(self, prompt: str, timeout: Optional[float], stage: str = "default") -> httpx.Response:
+        """streamGenerateContent 연결 1회 (응답 상태까지 확인, 본문은 호출자가 읽은 뒤 닫음)"""
+        headers = {
+            "Content-Type": "application/json",
+        }
+        client = self._get_async_client()
+        request = client.build_request(
+            "POST",
+            self._stream_url(stage),
+            headers=headers,
+            json=self._build_payload(prompt, stage),
+            timeout=async_timeout(timeout or self.timeout)
+        )
+        
+        try:
+            response = await client.send(request, stream=True)
+        except httpx.HTTPError as e:
+            raise upstream_error(f"Gemini API 스트리밍 요청 실패: {e}", e)
+        
+        try:
+            check_throttled("gemini", response)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            await response.aclose()
+            raise upstream_error(f"Gemini API 스트리밍 요청 실패: {e}", e)
+        except Exception:
+            await response.aclose()
+            raise
+        return response
+    
+    def _record_usage(self, data: Dict[str, Any]):
+        """응답 토큰 사용량 기록 (cachedContentTokenCount: 명시적 / 암시적 캐시로 재사용된 입력 토큰)"""
+        usage = data.get("usageMetadata")
+        if not usage:
+            return
+        tracing.set_attribute("prompt_tokens", usage.get("promptTokenCount"))
+        tracing.set_attribute("cached_tokens", usage.get("cachedContentTokenCount", 0))
+    
+    def _parse_stream_chunk(self, data: Dict[str, Any]) -> str:
+        """스트리밍 청크에서 텍스트 추출 (텍스트가 없는 청크는 빈 문자열)"""
+        candidates = data.get("candidates") or []
+        if not candidates:
+            return ""
+        
+        candidate = candidates[0]
+        if candidate.get("finishReason") == "SAFETY":
+            raise Exception("안전 필터로 인해 응답이 차단되었습니다")
+        
+        parts = candidate.get("content", {}).get("parts") or []
+        return "".join(part.get("text", "") for part in parts)
+    
+    def _parse_response(self, data: Dict[str, Any]) -> str:
+        """
+        generateContent 응답에서 텍스트 추출
+        
+        Args:
+            data: API 응답 JSON
+            
+        Returns:
+            생성된 텍스트
+        """
+        tracing.capture("response", data)
+        
+        # 안전한 응답 파싱
+        try:
+            # 기본 구조 확인
+            if 'candidates' not in data or not data['candidates']:
+                raise Exception("응답에 candidates가 없습니다")
+            
+            candidate = data['candidates'][0]
+            
+            # content 구조 확인 및 파싱
+            if 'content' in candidate:
+                content = candidate['content']
+                if 'parts' in content and content['parts']:
+                    text = content['parts'][0].get('text', '')
+                    if text:
+                        return text.strip()
+            
+            # finishReason이 'SAFETY' 등인 경우 처리
+            if 'finishReason' in candidate:
+                finish_reason = candidate['finishReason']
+                if finish_reason == 'SAFETY':
+                    raise Exception("안전 필터로 인해 응답이 차단되었습니다")
+                elif finish_reason == 'MAX_TOKENS':
+                    raise Exception("최대 토큰 수 초과로 응답이 잘렸습니다")
+            
+            # 모든 파싱 시도 실패
+            raise Exception(f"예상과 다른 응답 구조: {data}")
+            
+        except Exception as parse_error:
+            tracing.record_error(f"응답 파싱 중 세부 오류: {parse_error}", payload=data)
+            raise Exception(f"Gemini API 응답 파싱 실패: {parse_error}")
+    
+    def _clean_json_response(self, response: str) -> str:
+        """Gemini가 ```json으로 래핑할 수 있으므로 정리"""
+        cleaned_response = response.strip()
+        if cleaned_response.startswith("```json"):
+            cleaned_response = cleaned_response[7:]
+        if cleaned_response.endswith("```"):
+            cleaned_response = cleaned_response[:-3]
+        return cleaned_response.strip()
+    
+    def _cached(self, stage: str, cache_key: str) -> Any:
+        """단계별 캐시 조회 (적중 시 호출자가 수정해도 안전하도록 복사본 반환)"""
+        cached = self.stage_caches[stage].get(cache_key)
+        if cached is None:
+            return None
+        
+        tracing.set_attribute("cache_hit", True)
+        return copy.deepcopy(cached)
+    
+    def _finish_stage(self, stage: str, cache_key: str, parsed: Any, fallback: Any) -> Any:
+        """파싱 성공 시 캐시에 저장하고, 실패 시 기본값 반환 (기본값은 캐시하지 않음)"""
+        if parsed is None:
+            tracing.warning(f"Gemini {stage} 기본값으로 대체", fallback=fallback)
+            return fallback
+        
+        self.stage_caches[stage].set(cache_key, parsed)
+        return copy.deepcopy(parsed)
+    
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """단계별 캐시 통계"""
+        return {stage: cache.stats() for stage, cache in self.stage_caches.items()}
+    
+    def _build_enhancement_prompt(self, original_query: str) -> Tuple[str, str]:
+        """쿼리 증강 프롬프트 생성 (고정 지시문, 요청별 입력)"""
+        return Config.QUERY_ENHANCEMENT_INSTRUCTIONS, Config.QUERY_ENHANCEMENT_INPUT.format(
+            original_query=original_query
+        )
+    
+    def _parse_enhancement(self, original_query: str, response: str) -> Optional[Dict[str, Any]]:
+        """쿼리 증강 응답 파싱 (실패 시 None)"""
+        try:
+            # JSON 응답을 파싱
+            enhanced_data = json.loads(self._clean_json_response(response))
+            enhanced_data["original_query"] = original_query
+            
+            tracing.debug(
+                "쿼리 증강 완료",
+                enhanced_query=enhanced_data.get("enhanced_query"),
+                keywords=enhanced_data.get("keywords", []),
+                intent=enhanced_data.get("intent"),
+                complexity_score=enhanced_data.get("complexity_score")
+            )
+            
+            return enhanced_data
+        except json.JSONDecodeError as e:
+            tracing.record_error(f"증강 JSON 파싱 실패: {e}", payload=response)
+            return None
+    
+    def _enhancement_fallback(self, original_query: str) -> Dict[str, Any]:
+        """쿼리 증강 실패 시 기본값"""
+        return {
+            "original_query": original_query,
+            "enhanced_query": original_query,
+            "keywords": [original_query],
+            "intent": "정보 검색",
+            "complexity_score": 5.0
+        }
+    
+    def _cached_enhancement(self, original_query: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        """캐시된 증강 결과 (원본 쿼리는 현재 요청 값으로 교체)"""
+        cached = self._cached("enhance", cache_key)
+        if cached is not None:
+            cached["original_query"] = original_query
+        return cached
+    
+    @timed_stage("enhance")
+    @traced("gemini.enhance")
     def enhance_query(self, original_query: str) -> Dict[str, Any]:
         """
         사용자 쿼리를 증강
@@ -109,49 +524,82 @@ class GeminiClient:
         Returns:
             증강된 쿼리 정보
         """
-        print(f"🔧 쿼리 증강 시작: '{original_query}'")
+        cache_key = make_key(original_query)
+        cached = self._cached_enhancement(original_query, cache_key)
+        if cached is not None:
+            return cached
         
-        prompt = Config.QUERY_ENHANCEMENT_PROMPT.format(
-            original_query=original_query
+        prefix, prompt = self._build_enhancement_prompt(original_query)
+        response = self.generate_content(prompt, stage="enhance", prefix=prefix)
+        return self._finish_stage(
+            "enhance", cache_key,
+            self._parse_enhancement(original_query, response),
+            self._enhancement_fallback(original_query)
         )
+    
+    @timed_stage("enhance")
+    @traced("gemini.enhance")
+    async def aenhance_query(self, original_query: str) -> Dict[str, Any]:
+        """
+        사용자 쿼리를 증강 (비동기)
         
-        response = self.generate_content(prompt)
-        print(f"📝 Gemini 증강 원본 응답:\n{response}")
+        Args:
+            original_query: 원본 쿼리
+            
+        Returns:
+            증강된 쿼리 정보
+        """
+        cache_key = make_key(original_query)
+        cached = self._cached_enhancement(original_query, cache_key)
+        if cached is not None:
+            return cached
         
+        prefix, prompt = self._build_enhancement_prompt(original_query)
+        response = await self.agenerate_content(prompt, stage="enhance", prefix=prefix)
+        return self._finish_stage(
+            "enhance", cache_key,
+            self._parse_enhancement(original_query, response),
+            self._enhancement_fallback(original_query)
+        )
+    
+    def _build_classification_prompt(self, enhanced_query: str, keywords: list, intent: str) -> Tuple[str, str]:
+        """액션 분류 프롬프트 생성 (고정 지시문, 요청별 입력)"""
+        return Config.ACTION_CLASSIFICATION_INSTRUCTIONS, Config.ACTION_CLASSIFICATION_INPUT.format(
+            enhanced_query=enhanced_query,
+            keywords=", ".join(keywords),
+            intent=intent
+        )
+    
+    def _parse_classification(self, response: str) -> Optional[Dict[str, Any]]:
+        """액션 분류 응답 파싱 (실패 시 None)"""
         try:
             # JSON 응답을 파싱
-            # Gemini가 ```json으로 래핑할 수 있으므로 정리
-            cleaned_response = response.strip()
-            if cleaned_response.startswith("```json"):
-                cleaned_response = cleaned_response[7:]
-            if cleaned_response.endswith("```"):
-                cleaned_response = cleaned_response[:-3]
-            cleaned_response = cleaned_response.strip()
-            
-            enhanced_data = json.loads(cleaned_response)
-            enhanced_data["original_query"] = original_query
+            action_data = json.loads(self._clean_json_response(response))
             
-            print("✅ 쿼리 증강 완료:")
-            print(f"   📈 증강된 쿼리: '{enhanced_data.get('enhanced_query', 'N/A')}'")
-            print(f"   🔑 키워드: {enhanced_data.get('keywords', [])}")
-            print(f"   🎯 의도: {enhanced_data.get('intent', 'N/A')}")
-            print(f"   📊 복잡도: {enhanced_data.get('complexity_score', 'N/A')}/10")
+            tracing.debug(
+                "액션 분류 완료",
+                action_type=action_data.get("action_type"),
+                confidence=action_data.get("confidence"),
+                reasoning=action_data.get("reasoning"),
+                parameters=action_data.get("parameters", {})
+            )
             
-            return enhanced_data
+            return action_data
         except json.JSONDecodeError as e:
-            print(f"❌ JSON 파싱 실패: {e}")
-            print(f"❌ 응답 내용: {response}")
-            # JSON 파싱 실패 시 기본값 반환
-            fallback_data = {
-                "original_query": original_query,
-                "enhanced_query": original_query,
-                "keywords": [original_query],
-                "intent": "정보 검색",
-                "complexity_score": 5.0
-            }
-            print(f"🔄 기본값으로 대체: {fallback_data}")
-            return fallback_data
+            tracing.record_error(f"분류 JSON 파싱 실패: {e}", payload=response)
+            return None
+    
+    def _classification_fallback(self) -> Dict[str, Any]:
+        """액션 분류 실패 시 기본값"""
+        return {
+            "action_type": "web_search",
+            "confidence": 0.5,
+            "reasoning": "기본 웹 검색으로 설정 (파싱 실패)",
+            "parameters": {}
+        }
     
+    @timed_stage("classify")
+    @traced("gemini.classify")
     def classify_action(self, enhanced_query: str, keywords: list, intent: str) -> Dict[str, Any]:
         """
         액션 분류
@@ -164,49 +612,217 @@ class GeminiClient:
         Returns:
             액션 분류 결과
         """
-        print(f"🎯 액션 분류 시작:")
-        print(f"   📝 증강된 쿼리: '{enhanced_query}'")
-        print(f"   🔑 키워드: {keywords}")
-        print(f"   💭 의도: '{intent}'")
+        cache_key = make_key(enhanced_query, keywords, intent)
+        cached = self._cached("classify", cache_key)
+        if cached is not None:
+            return cached
         
-        prompt = Config.ACTION_CLASSIFICATION_PROMPT.format(
-            enhanced_query=enhanced_query,
-            keywords=", ".join(keywords),
-            intent=intent
+        prefix, prompt = self._build_classification_prompt(enhanced_query, keywords, intent)
+        response = self.generate_content(prompt, stage="classify", prefix=prefix)
+        return self._finish_stage(
+            "classify", cache_key,
+            self._parse_classification(response),
+            self._classification_fallback()
         )
+    
+    @timed_stage("classify")
+    @traced("gemini.classify")
+    async def aclassify_action(self, enhanced_query: str, keywords: list, intent: str) -> Dict[str, Any]:
+        """
+        액션 분류 (비동기)
         
-        response = self.generate_content(prompt)
-        print(f"📝 Gemini 분류 원본 응답:\n{response}")
+        Args:
+            enhanced_query: 증강된 쿼리
+            keywords: 키워드 리스트
+            intent: 의도
+            
+        Returns:
+            액션 분류 결과
+        """
+        cache_key = make_key(enhanced_query, keywords, intent)
+        cached = self._cached("classify", cache_key)
+        if cached is not None:
+            return cached
         
-        try:
-            # JSON 응답을 파싱
-            # Gemini가 ```json으로 래핑할 수 있으므로 정리
-            cleaned_response = response.strip()
-            if cleaned_response.startswith("```json"):
-                cleaned_response = cleaned_response[7:]
-            if cleaned_response.endswith("```"):
-                cleaned_response = cleaned_response[:-3]
-            cleaned_response = cleaned_response.strip()
-            
-            action_data = json.loads(cleaned_response)
-            
-            print("✅ 액션 분류 완료:")
-            print(f"   🚀 선택된 액션: {action_data.get('action_type', 'N/A')}")
-            print(f"   📊 신뢰도: {action_data.get('confidence', 'N/A')}")
-            print(f"   💡 선택 이유: {action_data.get('reasoning', 'N/A')}")
-            print(f"   ⚙️ 매개변수: {action_data.get('parameters', {})}")
+        prefix, prompt = self._build_classification_prompt(enhanced_query, keywords, intent)
+        response = await self.agenerate_content(prompt, stage="classify", prefix=prefix)
+        return self._finish_stage(
+            "classify", cache_key,
+            self._parse_classification(response),
+            self._classification_fallback()
+        )
+    
+    def _build_plan_prompt(self, original_query: str) -> Tuple[str, str]:
+        """계획 (증강 + 분류) 프롬프트 생성 (고정 지시문, 요청별 입력)"""
+        return Config.QUERY_PLAN_INSTRUCTIONS, Config.QUERY_PLAN_INPUT.format(
+            original_query=original_query
+        )
+    
+    def _parse_plan(self, original_query: str, response: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        계획 응답을 증강 결과와 분류 결과로 분리 (누락된 필드는 기본값)
+        
+        Args:
+            original_query: 원본 쿼리
+            response: Gemini 응답 텍스트
             
-            return action_data
+        Returns:
+            (증강된 쿼리 정보, 액션 분류 결과), JSON 파싱 실패 시 None
+        """
+        try:
+            plan_data = json.loads(self._clean_json_response(response))
         except json.JSONDecodeError as e:
-            print(f"❌ JSON 파싱 실패: {e}")
-            print(f"❌ 응답 내용: {response}")
-            # JSON 파싱 실패 시 기본값 반환
-            fallback_data = {
-                "action_type": "web_search",
-                "confidence": 0.5,
-                "reasoning": "기본 웹 검색으로 설정 (파싱 실패)",
-                "parameters": {}
-            }
-            print(f"🔄 기본값으로 대체: {fallback_data}")
-            return fallback_data
-
+            tracing.record_error(f"계획 JSON 파싱 실패: {e}", payload=response)
+            return None
+        
+        enhanced_data, action_data = self._plan_fallback(original_query)
+        for key in ("enhanced_query", "keywords", "intent", "complexity_score"):
+            if key in plan_data:
+                enhanced_data[key] = plan_data[key]
+        for key in ("action_type", "confidence", "reasoning", "parameters"):
+            if key in plan_data:
+                action_data[key] = plan_data[key]
+        
+        tracing.debug(
+            "쿼리 계획 완료",
+            enhanced_query=enhanced_data["enhanced_query"],
+            keywords=enhanced_data["keywords"],
+            action_type=action_data["action_type"],
+            confidence=action_data["confidence"]
+        )
+        
+        return enhanced_data, action_data
+    
+    def _plan_fallback(self, original_query: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """계획 실패 시 기본값"""
+        return self._enhancement_fallback(original_query), self._classification_fallback()
+    
+    def fallback_plan(self, original_query: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Gemini를 호출할 수 없을 때 사용할 계획 (원본 쿼리 + 기본 웹 검색)"""
+        enhanced_data, action_data = self._plan_fallback(original_query)
+        action_data["reasoning"] = "Gemini 사용 불가 - 기본 웹 검색"
+        return enhanced_data, action_data
+    
+    def _cached_plan(self, original_query: str, cache_key: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """캐시된 계획 결과 (원본 쿼리는 현재 요청 값으로 교체)"""
+        cached = self._cached("plan", cache_key)
+        if cached is not None:
+            cached[0]["original_query"] = original_query
+        return cached
+    
+    @timed_stage("plan")
+    @traced("gemini.plan")
+    def plan_query(self, original_query: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        쿼리 증강과 액션 분류를 한 번의 호출로 수행
+        
+        Args:
+            original_query: 원본 쿼리
+            
+        Returns:
+            (증강된 쿼리 정보, 액션 분류 결과)
+        """
+        cache_key = make_key(original_query)
+        cached = self._cached_plan(original_query, cache_key)
+        if cached is not None:
+            return cached
+        
+        prefix, prompt = self._build_plan_prompt(original_query)
+        response = self.generate_content(prompt, stage="plan", prefix=prefix)
+        return self._finish_stage(
+            "plan", cache_key,
+            self._parse_plan(original_query, response),
+            self._plan_fallback(original_query)
+        )
+    
+    @timed_stage("plan")
+    @traced("gemini.plan")
+    async def aplan_query(self, original_query: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        쿼리 증강과 액션 분류를 한 번의 호출로 수행 (비동기)
+        
+        Args:
+            original_query: 원본 쿼리
+            
+        Returns:
+            (증강된 쿼리 정보, 액션 분류 결과)
+        """
+        cache_key = make_key(original_query)
+        cached = self._cached_plan(original_query, cache_key)
+        if cached is not None:
+            return cached
+        
+        prefix, prompt = self._build_plan_prompt(original_query)
+        response = await self.agenerate_content(prompt, stage="plan", prefix=prefix)
+        return self._finish_stage(
+            "plan", cache_key,
+            self._parse_plan(original_query, response),
+            self._plan_fallback(original_query)
+        )
+    
+    @traced("gemini.answer")
+    def generate_answer(self, prompt: str, stage: str = "answer") -> str:
+        """
+        최종 답변 생성 (동일 모델 / 프롬프트는 캐시 재사용)
+        
+        Args:
+            prompt: 최종 답변 프롬프트
+            stage: answer | fast_answer (복잡도가 낮은 쿼리용 빠른 모델)
+            
+        Returns:
+            생성된 답변
+        """
+        cache_key = make_key(self.model_for(stage), prompt)
+        cached = self._cached("answer", cache_key)
+        if cached is not None:
+            return cached
+        
+        answer = self.generate_content(prompt, stage=stage)
+        self.stage_caches["answer"].set(cache_key, answer)
+        return answer
+    
+    @traced("gemini.answer")
+    async def agenerate_answer(self, prompt: str, stage: str = "answer") -> str:
+        """
+        최종 답변 생성 (비동기, 동일 모델 / 프롬프트는 캐시 재사용)
+        
+        Args:
+            prompt: 최종 답변 프롬프트
+            stage: answer | fast_answer (복잡도가 낮은 쿼리용 빠른 모델)
+            
+        Returns:
+            생성된 답변
+        """
+        cache_key = make_key(self.model_for(stage), prompt)
+        cached = self._cached("answer", cache_key)
+        if cached is not None:
+            return cached
+        
+        answer = await self.agenerate_content(prompt, stage=stage)
+        self.stage_caches["answer"].set(cache_key, answer)
+        return answer
+    
+    async def astream_answer(self, prompt: str, stage: str = "answer") -> AsyncIterator[str]:
+        """
+        최종 답변 스트리밍 생성 (캐시 적중 시 전체 답변을 한 번에 전달)
+        
+        Args:
+            prompt: 최종 답변 프롬프트
+            stage: answer | fast_answer (복잡도가 낮은 쿼리용 빠른 모델)
+            
+        Yields:
+            답변 텍스트 조각
+        """
+        cache_key = make_key(self.model_for(stage), prompt)
+        cached = self._cached("answer", cache_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        parts = []
+        async for chunk in self.astream_content(prompt, stage=stage):
+            parts.append(chunk)
+            yield chunk
+        
+        # 스트림이 끝까지 완료된 경우에만 저장
+        self.stage_caches["answer"].set(cache_key, "".join(parts).strip())
@@ -0,0 +1,153 @@
+"""
+HTTP Connection Pool - 업스트림 API 호출용 keep-alive 연결 풀 생성
+"""
+import time
+from typing import Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+import resilience
+from config import Config
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """
+    요청별 상태 코드 / 소요 시간을 지표로 기록하고
+    업스트림별 회로 차단기와 동시 요청 한도를 적용하는 requests 어댑터
+    """
+
+    def __init__(self, upstream: str, **kwargs):
+        self.upstream = upstream
+        self.breaker = resilience.get_breaker(upstream)
+        self.limiter = resilience.get_limiter(upstream)
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        probe = self.breaker.before_call() if self.breaker else False
+        slot = None
+        outcome = "ignore"
+        failed = None
+        started = time.perf_counter()
+        try:
+            slot = self.limiter.acquire() if self.limiter else None
+            started = time.perf_counter()
+            response = super().send(request, **kwargs)
+            outcome = resilience.outcome_for_status(response.status_code)
+            failed = response.status_code >= 500
+        except requests.Timeout:
+            outcome = "dropped"
+            failed = True
+            metrics.observe_upstream(self.upstream, "timeout", time.perf_counter() - started)
+            raise
+        except requests.RequestException:
+            failed = True
+            metrics.observe_upstream(self.upstream, "error", time.perf_counter() - started)
+            raise
+        finally:
+            if slot is not None:
+                self.limiter.release(slot, outcome)
+            if self.breaker is not None:
+                self.breaker.after_call(probe, failed, time.perf_counter() - started)
+
+        metrics.observe_upstream(self.upstream, str(response.status_code), time.perf_counter() - started)
+        return response
+
+
+class InstrumentedAsyncTransport(httpx.AsyncHTTPTransport):
+    """
+    요청별 상태 코드 / 소요 시간을 지표로 기록하고
+    업스트림별 회로 차단기와 동시 요청 한도를 적용하는 httpx 전송 계층
+    """
+
+    def __init__(self, upstream: str, **kwargs):
+        self.upstream = upstream
+        self.breaker = resilience.get_breaker(upstream)
+        self.limiter = resilience.get_limiter(upstream)
+        super().__init__(**kwargs)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # 스트리밍 응답은 헤더 수신까지만 슬롯 사용
+        probe = self.breaker.before_call() if self.breaker else False
+        slot = None
+        outcome = "ignore"
+        failed = None
+        started = time.perf_counter()
+        try:
+            slot = await self.limiter.aacquire() if self.limiter else None
+            started = time.perf_counter()
+            response = await super().handle_async_request(request)
+            outcome = resilience.outcome_for_status(response.status_code)
+            failed = response.status_code >= 500
+        except httpx.TimeoutException:
+            outcome = "dropped"
+            failed = True
+            metrics.observe_upstream(self.upstream, "timeout", time.perf_counter() - started)
+            raise
+        except httpx.HTTPError:
+            failed = True
+            metrics.observe_upstream(self.upstream, "error", time.perf_counter() - started)
+            raise
+        finally:
+            if slot is not None:
+                self.limiter.release(slot, outcome)
+            if self.breaker is not None:
+                self.breaker.after_call(probe, failed, time.perf_counter() - started)
+
+        metrics.observe_upstream(self.upstream, str(response.status_code), time.perf_counter() - started)
+        return response
+
+
+def create_session(upstream: str, pool_size: Optional[int] = None) -> requests.Session:
+    """
+    동기 호출용 requests 세션 생성 (연결 재사용)
+
+    Args:
+        upstream: 지표에 사용할 업스트림 이름
+        pool_size: 호스트당 최대 연결 수
+
+    Returns:
+        연결 풀이 설정된 세션
+    """
+    pool_size = pool_size or Config.HTTP_POOL_SIZE
+
+    session = requests.Session()
+    adapter = InstrumentedAdapter(upstream, pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def create_async_client(upstream: str, timeout: float, pool_size: Optional[int] = None) -> httpx.AsyncClient:
+    """
+    비동기 호출용 httpx 클라이언트 생성 (연결 재사용)
+
+    Args:
+        upstream: 지표에 사용할 업스트림 이름
+        timeout: 기본 응답 타임아웃
+        pool_size: 최대 동시 연결 수
+
+    Returns:
+        연결 풀이 설정된 비동기 클라이언트
+    """
+    pool_size = pool_size or Config.HTTP_POOL_SIZE
+
+    limits = httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY
+    )
+    transport = InstrumentedAsyncTransport(upstream, limits=limits)
+    return httpx.AsyncClient(transport=transport, timeout=async_timeout(timeout))
+
+
+def sync_timeout(timeout: float) -> Tuple[float, float]:
+    """requests용 (연결, 읽기) 타임아웃"""
+    return (Config.HTTP_CONNECT_TIMEOUT, timeout)
+
+
+def async_timeout(timeout: float) -> httpx.Timeout:
+    """httpx용 타임아웃 (연결 타임아웃은 별도 적용)"""
+    return httpx.Timeout(timeout, connect=Config.HTTP_CONNECT_TIMEOUT)
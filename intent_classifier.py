@@ -0,0 +1,384 @@
+"""
+Local Intent Classifier - Gemini 호출 없이 액션을 분류하는 로컬 분류기
+
+해시된 문자 n-gram + 단어 특징을 사용하는 NumPy 다항 로지스틱 회귀 모델입니다.
+내장 예시 문장으로 기본 학습되며, Gemini가 내린 분류 결과를 JSONL로 기록해 두었다가
+다시 학습할 수 있습니다.
+
+    python intent_classifier.py train --log intent_decisions.jsonl --out intent_model.npz
+"""
+import argparse
+import json
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import tracing
+from config import Config
+from models import ActionType
+from text_utils import tokenize
+
+# 분류 대상 액션 (로컬 분류기는 Gemini 분류기와 같은 3가지만 예측)
+LABELS = [ActionType.REALTIME_API, ActionType.WEB_SEARCH, ActionType.HYBRID]
+
+# 분류 로그는 요청 경로 밖의 단일 스레드에서 순서대로 기록
+_log_lock = threading.Lock()
+_log_executor: Optional[ThreadPoolExecutor] = None
+
+# 로그가 없을 때 사용하는 기본 학습 예시
+SEED_EXAMPLES = [
+    ("현재 시간을 알려주세요", ActionType.REALTIME_API),
+    ("지금 몇 시야", ActionType.REALTIME_API),
+    ("비트코인 가격이 궁금해요", ActionType.REALTIME_API),
+    ("비트코인 현재 가격 시세", ActionType.REALTIME_API),
+    ("이더리움 지금 얼마야", ActionType.REALTIME_API),
+    ("BTC 가격 알려줘", ActionType.REALTIME_API),
+    ("bitcoin price now", ActionType.REALTIME_API),
+    ("current ethereum price in usd", ActionType.REALTIME_API),
+    ("서울 날씨 어때", ActionType.REALTIME_API),
+    ("오늘 부산 날씨 알려줘", ActionType.REALTIME_API),
+    ("weather in seoul today", ActionType.REALTIME_API),
+    ("애플 주가 알려줘", ActionType.REALTIME_API),
+    ("테슬라 주식 현재 가격", ActionType.REALTIME_API),
+    ("AAPL stock price", ActionType.REALTIME_API),
+    ("what time is it now", ActionType.REALTIME_API),
+    ("2024년 최신 AI 뉴스를 알려주세요", ActionType.WEB_SEARCH),
+    ("Python FastAPI 사용법을 알려주세요", ActionType.WEB_SEARCH),
+    ("Python FastAPI 튜토리얼을 찾아주세요", ActionType.WEB_SEARCH),
+    ("양자 컴퓨터의 원리를 설명해줘", ActionType.WEB_SEARCH),
+    ("조선 왕조의 역사에 대해 알려줘", ActionType.WEB_SEARCH),
+    ("김치찌개 만드는 방법", ActionType.WEB_SEARCH),
+    ("리액트와 뷰의 차이점 비교", ActionType.WEB_SEARCH),
+    ("how to install docker on ubuntu", ActionType.WEB_SEARCH),
+    ("what is retrieval augmented generation", ActionType.WEB_SEARCH),
+    ("best practices for python async programming", ActionType.WEB_SEARCH),
+    ("블록체인 기술이란 무엇인가", ActionType.WEB_SEARCH),
+    ("머신러닝 입문 강의 추천", ActionType.WEB_SEARCH),
+    ("history of the roman empire", ActionType.WEB_SEARCH),
+    ("오늘 날씨와 관련된 최신 뉴스를 알려주세요", ActionType.HYBRID),
+    ("비트코인 현재 가격과 최근 전망 뉴스", ActionType.HYBRID),
+    ("테슬라 주가와 최근 실적 발표 분석", ActionType.HYBRID),
+    ("지금 이더리움 시세와 가격 변동 원인", ActionType.HYBRID),
+    ("서울 날씨와 이번 주말 여행지 추천", ActionType.HYBRID),
+    ("current bitcoin price and latest news", ActionType.HYBRID),
+    ("apple stock price and analyst opinions", ActionType.HYBRID),
+    ("오늘 주식 시장 동향과 현재 지수", ActionType.HYBRID),
+    ("현재 환율과 환율 전망 기사", ActionType.HYBRID),
+    ("weather today and news about the storm", ActionType.HYBRID),
+]
+
+
+class IntentClassifier:
+    """해시 특징 기반 다항 로지스틱 회귀 액션 분류기"""
+
+    # 온도 탐색 범위 (교차 검증 로그 우도 최대화)
+    TEMPERATURES = np.geomspace(0.5, 50.0, 80)
+
+    def __init__(
+        self,
+        dim: int = 2 ** 15,
+        weights: Optional[np.ndarray] = None,
+        bias: Optional[np.ndarray] = None,
+        temperature: float = 1.0
+    ):
+        self.dim = dim
+        self.weights = weights if weights is not None else np.zeros((dim, len(LABELS)), dtype=np.float32)
+        self.bias = bias if bias is not None else np.zeros(len(LABELS), dtype=np.float32)
+        # 신뢰도 보정 온도 (logits / temperature로 softmax, 예측 액션은 바뀌지 않음)
+        self.temperature = temperature
+
+    def _features(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        텍스트를 해시 특징으로 변환 (단어 + 단어 내부 문자 1~3-gram, L2 정규화)
+
+        Returns:
+            (특징 인덱스, 특징 값)
+        """
+        grams = []
+        for token in tokenize(text):
+            grams.append(f"w:{token}")
+            padded = f"<{token}>"
+            for n in (1, 2, 3):
+                grams.extend(f"c{n}:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+
+        if not grams:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        hashed = np.fromiter((zlib.crc32(g.encode("utf-8")) % self.dim for g in grams), dtype=np.int64, count=len(grams))
+        indices, counts = np.unique(hashed, return_counts=True)
+        values = counts.astype(np.float32)
+        values /= np.linalg.norm(values)
+        return indices, values
+
+    def _batch_features(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """여러 텍스트의 희소 특징 (인덱스, 값, 각 특징이 속한 샘플 번호)"""
+        features = [self._features(text) for text in texts]
+        indices = np.concatenate([f[0] for f in features]) if features else np.zeros(0, dtype=np.int64)
+        values = np.concatenate([f[1] for f in features]) if features else np.zeros(0, dtype=np.float32)
+        rows = np.repeat(np.arange(len(texts)), [len(f[0]) for f in features])
+        return indices, values, rows
+
+    def _scores(self, indices: np.ndarray, values: np.ndarray, rows: np.ndarray, n_samples: int) -> np.ndarray:
+        """샘플별 클래스 점수 (logits)"""
+        scores = np.zeros((n_samples, len(LABELS)), dtype=np.float32)
+        np.add.at(scores, rows, self.weights[indices] * values[:, None])
+        return scores + self.bias
+
+    @staticmethod
+    def _softmax(scores: np.ndarray) -> np.ndarray:
+        scores = scores - scores.max(axis=1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def logits(self, texts: List[str]) -> np.ndarray:
+        """여러 텍스트의 클래스 점수 (온도 보정 전)"""
+        indices, values, rows = self._batch_features(texts)
+        return self._scores(indices, values, rows, len(texts))
+
+    def predict(self, text: str) -> Tuple[ActionType, float]:
+        """
+        액션 예측
+
+        Args:
+            text: 분류할 텍스트 (증강된 쿼리 + 키워드)
+
+        Returns:
+            (예측된 액션, 보정된 신뢰도 0~1)
+        """
+        probabilities = self._softmax(self.logits([text]) / self.temperature)[0]
+        best = int(np.argmax(probabilities))
+        return LABELS[best], float(probabilities[best])
+
+    def fit(self, texts: List[str], labels: List[ActionType], epochs: int = 300, learning_rate: float = 0.5, l2: float = 1e-4):
+        """
+        전체 배치 경사 하강법(Adagrad)으로 학습 (클래스 빈도 역수로 가중)
+
+        Args:
+            texts: 학습 텍스트
+            labels: 정답 액션
+            epochs: 반복 횟수
+            learning_rate: 학습률
+            l2: L2 정규화 계수
+        """
+        n_samples = len(texts)
+        indices, values, rows = self._batch_features(texts)
+        targets = np.zeros((n_samples, len(LABELS)), dtype=np.float32)
+        targets[np.arange(n_samples), [LABELS.index(ActionType(label)) for label in labels]] = 1.0
+
+        class_counts = targets.sum(axis=0)
+        sample_weights = (targets / np.maximum(class_counts, 1)).sum(axis=1) * n_samples / len(LABELS)
+
+        weight_accum = np.full_like(self.weights, 1e-8)
+        bias_accum = np.full_like(self.bias, 1e-8)
+
+        for _ in range(epochs):
+            probabilities = self._softmax(self._scores(indices, values, rows, n_samples))
+            error = (probabilities - targets) * sample_weights[:, None] / n_samples
+
+            grad_weights = l2 * self.weights
+            np.add.at(grad_weights, indices, error[rows] * values[:, None])
+            grad_bias = error.sum(axis=0)
+
+            weight_accum += grad_weights ** 2
+            bias_accum += grad_bias ** 2
+            self.weights -= learning_rate * grad_weights / np.sqrt(weight_accum)
+            self.bias -= learning_rate * grad_bias / np.sqrt(bias_accum)
+
+    def fit_calibrated(self, texts: List[str], labels: List[ActionType], folds: int = 5, epochs: int = 300):
+        """
+        학습 후 교차 검증으로 신뢰도 온도 보정 (temperature scaling)
+
+        학습 예시에 대한 신뢰도는 항상 과신하므로, 각 폴드를 제외하고 학습한 모델의
+        폴드 예측(학습에 쓰지 않은 예시)으로 로그 우도가 가장 높은 온도를 고른 뒤 전체 예시로 다시 학습합니다.
+
+        Args:
+            texts: 학습 텍스트
+            labels: 정답 액션
+            folds: 교차 검증 폴드 수
+            epochs: 반복 횟수
+        """
+        targets = np.array([LABELS.index(ActionType(label)) for label in labels])
+        # 액션별로 번갈아 폴드 배정 (폴드마다 액션 비율 유지)
+        order = np.argsort(targets, kind="stable")
+        fold_of = np.empty(len(texts), dtype=np.int64)
+        fold_of[order] = np.arange(len(texts)) % folds
+
+        held_out_logits = np.zeros((len(texts), len(LABELS)), dtype=np.float32)
+        for fold in range(folds):
+            train = np.flatnonzero(fold_of != fold)
+            test = np.flatnonzero(fold_of == fold)
+            if not len(test) or len(np.unique(targets[train])) < len(LABELS):
+                continue
+            model = IntentClassifier(dim=self.dim)
+            model.fit([texts[i] for i in train], [labels[i] for i in train], epochs=epochs)
+            held_out_logits[test] = model.logits([texts[i] for i in test])
+
+        self.temperature = self.calibrate(held_out_logits, targets)
+        self.fit(texts, labels, epochs=epochs)
+
+    @classmethod
+    def calibrate(cls, logits: np.ndarray, targets: np.ndarray) -> float:
+        """
+        검증 예측의 음의 로그 우도가 가장 작은 온도
+
+        Args:
+            logits: 학습에 쓰지 않은 예시의 클래스 점수
+            targets: 정답 액션 인덱스
+
+        Returns:
+            온도
+        """
+        best, best_loss = 1.0, np.inf
+        for temperature in cls.TEMPERATURES:
+            probabilities = cls._softmax(logits / temperature)
+            loss = -np.log(probabilities[np.arange(len(targets)), targets] + 1e-12).mean()
+            if loss < best_loss:
+                best, best_loss = float(temperature), loss
+        return best
+
+    def save(self, path: str):
+        """모델 저장 (.npz)"""
+        np.savez_compressed(path, weights=self.weights, bias=self.bias, dim=self.dim, temperature=self.temperature)
+
+    @classmethod
+    def load(cls, path: str) -> "IntentClassifier":
+        """저장된 모델 로드 (온도가 없는 이전 모델은 보정 없이 사용)"""
+        data = np.load(path)
+        temperature = float(data["temperature"]) if "temperature" in data.files else 1.0
+        return cls(dim=int(data["dim"]), weights=data["weights"], bias=data["bias"], temperature=temperature)
+
+    @classmethod
+    def load_or_train(cls, model_path: Optional[str] = None, log_path: Optional[str] = None) -> "IntentClassifier":
+        """
+        저장된 모델이 있으면 로드하고, 없으면 기본 예시 + 분류 로그로 학습 (교차 검증으로 신뢰도 보정)
+
+        Args:
+            model_path: 모델 파일 경로
+            log_path: Gemini 분류 결과 로그 경로 (JSONL)
+
+        Returns:
+            분류기
+        """
+        if model_path and os.path.exists(model_path):
+            return cls.load(model_path)
+
+        texts, labels = training_data(log_path)
+        classifier = cls()
+        classifier.fit_calibrated(texts, labels)
+        return classifier
+
+
+def record_decision(text: str, action_type: str, confidence: float, log_path: Optional[str] = None):
+    """
+    Gemini 분류 결과를 재학습용 로그에 백그라운드에서 기록
+
+    Args:
+        text: 분류한 텍스트
+        action_type: Gemini가 선택한 액션
+        confidence: Gemini가 보고한 신뢰도
+        log_path: 로그 경로 (기본값: Config.INTENT_LOG_PATH, 비어 있으면 기록 안 함)
+    """
+    global _log_executor
+    log_path = log_path or Config.INTENT_LOG_PATH
+    if not log_path:
+        return
+
+    try:
+        line = json.dumps(
+            {"text": text, "action_type": ActionType(action_type).value, "confidence": float(confidence)},
+            ensure_ascii=False
+        )
+    except (TypeError, ValueError):
+        return
+
+    with _log_lock:
+        if _log_executor is None:
+            _log_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="intent-log")
+        _log_executor.submit(_append_line, log_path, line)
+
+
+def _append_line(log_path: str, line: str):
+    """분류 로그 한 줄 추가 (백그라운드 스레드에서 실행)"""
+    try:
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        tracing.warning(f"분류 로그 기록 실패: {e}", path=log_path)
+
+
+def flush_decisions():
+    """대기 중인 분류 로그 기록 완료까지 대기 후 기록 스레드 종료 (다음 기록 시 다시 시작)"""
+    global _log_executor
+    with _log_lock:
+        executor, _log_executor = _log_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def classification_text(enhanced_query: str, keywords: Iterable[str]) -> str:
+    """분류기 입력 텍스트 (증강된 쿼리 + 키워드)"""
+    return f"{enhanced_query} {' '.join(keywords)}"
+
+
+def training_data(log_path: Optional[str] = None, min_confidence: float = 0.7) -> Tuple[List[str], List[ActionType]]:
+    """
+    기본 예시 + 분류 로그에서 학습 데이터 구성
+
+    Args:
+        log_path: 분류 로그 경로 (JSONL)
+        min_confidence: 로그에서 사용할 최소 신뢰도
+
+    Returns:
+        (텍스트 리스트, 액션 리스트)
+    """
+    texts = [text for text, _ in SEED_EXAMPLES]
+    labels = [label for _, label in SEED_EXAMPLES]
+
+    if log_path and os.path.exists(log_path):
+        with open(log_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    label = ActionType(entry["action_type"])
+                except (json.JSONDecodeError, KeyError, ValueError):
+                    continue
+                if label in LABELS and float(entry.get("confidence", 1.0)) >= min_confidence:
+                    texts.append(entry["text"])
+                    labels.append(label)
+
+    return texts, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 액션 분류기 학습")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    train = subparsers.add_parser("train", help="기본 예시 + 분류 로그로 학습 후 저장")
+    train.add_argument("--log", default=Config.INTENT_LOG_PATH, help="분류 로그 경로 (JSONL)")
+    train.add_argument("--out", default=Config.INTENT_MODEL_PATH, help="모델 저장 경로 (.npz)")
+    train.add_argument("--epochs", type=int, default=300)
+
+    predict = subparsers.add_parser("predict", help="텍스트 분류")
+    predict.add_argument("text")
+    predict.add_argument("--model", default=Config.INTENT_MODEL_PATH)
+
+    args = parser.parse_args()
+
+    if args.command == "train":
+        texts, labels = training_data(args.log)
+        classifier = IntentClassifier()
+        classifier.fit_calibrated(texts, labels, epochs=args.epochs)
+        classifier.save(args.out)
+        print(f"✅ {len(texts)}개 예시로 학습 완료 (보정 온도 {classifier.temperature:.2f}): {args.out}")
+    else:
+        classifier = IntentClassifier.load_or_train(args.model)
+        action_type, confidence = classifier.predict(args.text)
+        print(f"{action_type.value} ({confidence:.3f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,43 @@
 """
 FastAPI 서버 - AI Agent를 위한 REST API
 """
+import json
+import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
 import uvicorn
 from typing import Dict, Any
 
-from models import QueryRequest, AgentResponse
+from models import (
+    QueryRequest, AgentResponse,
+    BatchQueryRequest, BatchQueryResponse, BatchItemResponse
+)
 from ai_agent import AIAgent
+from admission import AdmissionController, AdmissionRejected
 from config import Config
+import metrics
+import tracing
 
 # AI Agent 인스턴스 (전역)
 agent = None
+cache_collector = None
+
+# 동시 처리 파이프라인 수 제한 (과부하 시 429 / 503으로 빠르게 거절)
+admission = AdmissionController()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """애플리케이션 라이프사이클 관리"""
     # 시작 시
-    global agent
+    global agent, cache_collector
     try:
         print("AI Agent 초기화 중...")
         agent = AIAgent()
+        cache_collector = metrics.register_cache_collector(agent.cache_stats)
         print("AI Agent 초기화 완료!")
     except Exception as e:
         print(f"AI Agent 초기화 실패: {e}")
@@ -32,6 +47,13 @@ async def lifespan(app: FastAPI):
     
     # 종료 시 (필요한 경우)
     print("AI Agent 종료 중...")
+    if cache_collector is not None:
+        metrics.unregister_collector(cache_collector)
+        cache_collector = None
+    if agent is not None:
+        await agent.aclose()
+        agent.close()
+    tracing.shutdown()
 
 
 # FastAPI 앱 생성
@@ -75,6 +97,28 @@ async def health_check():
         raise HTTPException(status_code=500, detail=f"헬스 체크 실패: {str(e)}")
 
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """캐시 적중률 등 캐시 통계"""
+    if agent is None:
+        raise HTTPException(status_code=503, detail="AI Agent가 초기화되지 않았습니다.")
+    
+    return agent.cache_stats()
+
+
+@app.get("/admission/stats")
+async def admission_stats():
+    """승인 제어 통계 (처리 중 / 대기 중 요청 수, 거절 수)"""
+    return admission.stats()
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus 지표 (단계별 지연 시간, 업스트림 상태, 처리 중 쿼리 수, 캐시 적중률, 액션 분포)"""
+    content, content_type = metrics.export()
+    return Response(content=content, media_type=content_type)
+
+
 @app.post("/query", response_model=AgentResponse)
 async def process_query(request: QueryRequest):
     """
@@ -93,14 +137,158 @@ async def process_query(request: QueryRequest):
         raise HTTPException(status_code=400, detail="쿼리가 비어있습니다.")
     
     try:
-        print(f"쿼리 처리 요청: {request.query}")
-        response = agent.process_query(request)
+        async with admission.admit():
+            response = await agent.aprocess_query(request)
         return response
+    except AdmissionRejected as e:
+        raise rejected_exception(e)
     except Exception as e:
-        print(f"쿼리 처리 중 오류: {e}")
+        tracing.error(f"쿼리 처리 중 오류: {e}")
         raise HTTPException(status_code=500, detail=f"쿼리 처리 실패: {str(e)}")
 
 
+@app.post("/query/stream")
+async def stream_query(request: QueryRequest):
+    """
+    사용자 쿼리 처리 (Server-Sent Events 스트리밍)
+    
+    단계별 이벤트(enhanced_query, action, search_result, answer_delta, done)를
+    완료되는 즉시 전송합니다.
+    
+    Args:
+        request: 사용자 쿼리 요청
+        
+    Returns:
+        text/event-stream 응답
+    """
+    if agent is None:
+        raise HTTPException(status_code=503, detail="AI Agent가 초기화되지 않았습니다.")
+    
+    if not request.query or request.query.strip() == "":
+        raise HTTPException(status_code=400, detail="쿼리가 비어있습니다.")
+    
+    permit = await acquire_or_reject()
+    
+    async def event_stream():
+        try:
+            async for event in agent.astream_query(request):
+                yield format_sse(event["event"], event["data"])
+        finally:
+            permit.release()
+    
+    # 스트림이 시작되기 전에 연결이 끊겨도 슬롯 반환 (release는 한 번만 반영)
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(permit.release)
+    )
+
+
+@app.post("/query/batch", response_model=BatchQueryResponse)
+async def process_batch(batch: BatchQueryRequest):
+    """
+    여러 쿼리 일괄 처리
+    
+    동일한 쿼리는 한 번만 처리하고, concurrency 만큼 동시에 처리합니다.
+    stream=true이면 완료되는 순서대로 {"index", "response"} 줄을 NDJSON으로 전송합니다.
+    
+    Args:
+        batch: 배치 쿼리 요청
+        
+    Returns:
+        입력 순서의 응답 리스트 또는 application/x-ndjson 스트림
+    """
+    if agent is None:
+        raise HTTPException(status_code=503, detail="AI Agent가 초기화되지 않았습니다.")
+    
+    if not batch.queries:
+        raise HTTPException(status_code=400, detail="쿼리 목록이 비어있습니다.")
+    
+    if len(batch.queries) > Config.BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"배치 크기가 너무 큽니다. (최대 {Config.BATCH_MAX_SIZE}개)"
+        )
+    
+    for index, request in enumerate(batch.queries):
+        if not request.query or request.query.strip() == "":
+            raise HTTPException(status_code=400, detail=f"{index}번 쿼리가 비어있습니다.")
+    
+    def responses_for(indices, response):
+        # 병합된 쿼리는 각 입력의 원본 쿼리 문자열로 응답
+        return [
+            (index, response.model_copy(update={"query": batch.queries[index].query}))
+            for index in indices
+        ]
+    
+    # 배치는 동시에 처리하는 쿼리 수만큼 슬롯 사용
+    concurrency = min(batch.concurrency or Config.BATCH_CONCURRENCY, Config.BATCH_MAX_CONCURRENCY)
+    slots = min(concurrency, len(batch.queries))
+    
+    if batch.stream:
+        permit = await acquire_or_reject(slots)
+        
+        async def ndjson_stream():
+            try:
+                async for indices, response in agent.aprocess_batch(batch.queries, batch.concurrency):
+                    for index, item in responses_for(indices, response):
+                        line = BatchItemResponse(index=index, response=item)
+                        yield line.model_dump_json() + "\n"
+            finally:
+                permit.release()
+        
+        return StreamingResponse(
+            ndjson_stream(),
+            media_type="application/x-ndjson",
+            background=BackgroundTask(permit.release)
+        )
+    
+    start_time = time.time()
+    results = [None] * len(batch.queries)
+    unique_queries = 0
+    try:
+        async with admission.admit(slots):
+            async for indices, response in agent.aprocess_batch(batch.queries, batch.concurrency):
+                unique_queries += 1
+                for index, item in responses_for(indices, response):
+                    results[index] = item
+    except AdmissionRejected as e:
+        raise rejected_exception(e)
+    except Exception as e:
+        tracing.error(f"배치 처리 중 오류: {e}")
+        raise HTTPException(status_code=500, detail=f"배치 처리 실패: {str(e)}")
+    
+    return BatchQueryResponse(
+        results=results,
+        total_queries=len(batch.queries),
+        unique_queries=unique_queries,
+        processing_time=time.time() - start_time
+    )
+
+
+async def acquire_or_reject(slots: int = 1):
+    """실행 권한 획득 (거절되면 HTTPException)"""
+    try:
+        return await admission.acquire(slots)
+    except AdmissionRejected as e:
+        raise rejected_exception(e)
+
+
+def rejected_exception(e: AdmissionRejected) -> HTTPException:
+    """승인 거절을 Retry-After 헤더가 포함된 HTTP 응답으로 변환"""
+    return HTTPException(
+        status_code=e.status_code,
+        detail=e.reason,
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+def format_sse(event: str, data: Any) -> str:
+    """SSE 이벤트 문자열 생성"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @app.get("/demo")
 async def demo_queries():
     """데모용 쿼리 예시들"""
@@ -0,0 +1,303 @@
+"""
+Prometheus Metrics - 파이프라인 단계별 지연 시간, 업스트림 호출, 캐시 적중률 등 운영 지표
+"""
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# 지연 시간 버킷 (초 단위, 캐시 적중 ~ 느린 Gemini 호출)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+STAGE_DURATION = Histogram(
+    "agent_stage_duration_seconds",
+    "파이프라인 단계별 소요 시간 (semantic_cache, plan, enhance, classify, execute, web_search, realtime_api, vector_db, rerank, dedup, context, answer, local_kb_fallback, total)",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+
+UPSTREAM_DURATION = Histogram(
+    "agent_upstream_request_duration_seconds",
+    "업스트림 HTTP 요청 소요 시간 (응답 헤더 수신까지)",
+    ["upstream"],
+    buckets=LATENCY_BUCKETS
+)
+
+UPSTREAM_REQUESTS = Counter(
+    "agent_upstream_requests_total",
+    "업스트림 HTTP 요청 수 (status: HTTP 상태 코드 또는 timeout / error)",
+    ["upstream", "status"]
+)
+
+QUERIES_IN_FLIGHT = Gauge(
+    "agent_queries_in_flight",
+    "처리 중인 쿼리 수",
+    ["mode"]
+)
+
+QUERIES = Counter(
+    "agent_queries_total",
+    "처리 완료된 쿼리 수",
+    ["outcome"]
+)
+
+ACTIONS = Counter(
+    "agent_actions_total",
+    "선택된 액션 타입별 쿼리 수",
+    ["action_type"]
+)
+
+UPSTREAM_LIMIT = Gauge(
+    "agent_upstream_concurrency_limit",
+    "업스트림별 적응형 동시 요청 한도",
+    ["upstream"]
+)
+
+UPSTREAM_THROTTLED = Counter(
+    "agent_upstream_throttled_total",
+    "업스트림 요청 한도 초과 수 (reason: rate_limited = 429 응답, limit_wait = 동시 요청 한도 대기 시간 초과)",
+    ["upstream", "reason"]
+)
+
+UPSTREAM_RETRIES = Counter(
+    "agent_upstream_retries_total",
+    "업스트림 추가 요청 수 (kind: retry = 오류 후 재시도, hedge = 지연 시 헤지 요청)",
+    ["upstream", "kind"]
+)
+
+CIRCUIT_STATE = Gauge(
+    "agent_circuit_state",
+    "업스트림 회로 차단기 상태 (0 = closed, 1 = half_open, 2 = open)",
+    ["upstream"]
+)
+
+CIRCUIT_REJECTED = Counter(
+    "agent_circuit_rejected_total",
+    "회로 차단으로 즉시 거절된 업스트림 요청 수",
+    ["upstream"]
+)
+
+SEMANTIC_CACHE = Counter(
+    "agent_semantic_cache_lookups_total",
+    "의미 기반 응답 캐시 조회 결과 (hit, miss, expired = 같은 질문의 응답이 신선도 초과)",
+    ["result"]
+)
+
+SEMANTIC_CACHE_SIMILARITY = Histogram(
+    "agent_semantic_cache_similarity",
+    "의미 기반 응답 캐시 조회 시 같은 내용어 후보 중 최고 코사인 유사도",
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0)
+)
+
+PROMPT_CACHE = Counter(
+    "agent_prompt_cache_lookups_total",
+    "Gemini 프롬프트 접두사 캐시 조회 결과 (hit, miss, bypass = 등록 불가 / 재시도 대기, invalidated = 핸들 거부)",
+    ["result"]
+)
+
+ADMISSION_QUEUE = Gauge(
+    "agent_admission_queue_length",
+    "승인 대기 중인 요청 수"
+)
+
+ADMISSION_WAIT = Histogram(
+    "agent_admission_wait_seconds",
+    "승인된 요청의 대기열 대기 시간",
+    buckets=LATENCY_BUCKETS
+)
+
+ADMISSION_REJECTED = Counter(
+    "agent_admission_rejected_total",
+    "과부하로 거절된 요청 수 (reason: queue_full, queue_wait, overloaded)",
+    ["reason"]
+)
+
+
+def observe_stage(stage: str, seconds: float):
+    """단계 소요 시간 기록"""
+    STAGE_DURATION.labels(stage).observe(seconds)
+
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    """블록 실행 시간을 단계 소요 시간으로 기록 (예외 발생 시에도 기록)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def timed_stage(stage: str) -> Callable:
+    """
+    함수(동기 / 비동기) 실행 시간을 단계 소요 시간으로 기록하는 데코레이터
+
+    Args:
+        stage: 단계 이름
+    """
+    def decorator(fn: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with time_stage(stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with time_stage(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def observe_upstream(upstream: str, status: str, seconds: float):
+    """
+    업스트림 HTTP 요청 결과 기록
+
+    Args:
+        upstream: 업스트림 이름 (gemini, tavily, coingecko)
+        status: HTTP 상태 코드 또는 timeout / error
+        seconds: 소요 시간
+    """
+    UPSTREAM_REQUESTS.labels(upstream, status).inc()
+    UPSTREAM_DURATION.labels(upstream).observe(seconds)
+
+
+def set_upstream_limit(upstream: str, limit: float):
+    """업스트림 동시 요청 한도 기록"""
+    UPSTREAM_LIMIT.labels(upstream).set(limit)
+
+
+def observe_upstream_throttled(upstream: str, reason: str):
+    """업스트림 요청 한도 초과 기록"""
+    UPSTREAM_THROTTLED.labels(upstream, reason).inc()
+
+
+def observe_upstream_retry(upstream: str, kind: str):
+    """업스트림 재시도 / 헤지 요청 기록"""
+    UPSTREAM_RETRIES.labels(upstream, kind).inc()
+
+
+def set_circuit_state(upstream: str, state: int):
+    """회로 차단기 상태 기록"""
+    CIRCUIT_STATE.labels(upstream).set(state)
+
+
+def observe_circuit_rejected(upstream: str):
+    """회로 차단으로 거절된 요청 기록"""
+    CIRCUIT_REJECTED.labels(upstream).inc()
+
+
+def observe_prompt_cache(result: str):
+    """프롬프트 접두사 캐시 조회 결과 기록"""
+    PROMPT_CACHE.labels(result).inc()
+
+
+def observe_semantic_cache(result: str, similarity: Optional[float] = None):
+    """
+    의미 기반 응답 캐시 조회 결과 기록
+
+    Args:
+        result: hit, miss, expired
+        similarity: 같은 내용어 후보 중 최고 유사도 (후보가 없으면 None)
+    """
+    SEMANTIC_CACHE.labels(result).inc()
+    if similarity is not None:
+        SEMANTIC_CACHE_SIMILARITY.observe(similarity)
+
+
+def query_started(mode: str):
+    """쿼리 처리 시작 (mode: sync, async, stream)"""
+    QUERIES_IN_FLIGHT.labels(mode).inc()
+
+
+def query_finished(mode: str):
+    """쿼리 처리 종료"""
+    QUERIES_IN_FLIGHT.labels(mode).dec()
+
+
+def observe_response(action_type: str, processing_time: float, ok: bool):
+    """
+    쿼리 처리 결과 기록
+
+    Args:
+        action_type: 실행된 액션 타입
+        processing_time: 전체 처리 시간
+        ok: 정상 처리 여부 (False면 오류로 기본 응답)
+    """
+    observe_stage("total", processing_time)
+    QUERIES.labels("ok" if ok else "error").inc()
+    if ok:
+        ACTIONS.labels(action_type).inc()
+
+
+def set_admission_queue(length: int):
+    """승인 대기열 길이 기록"""
+    ADMISSION_QUEUE.set(length)
+
+
+def observe_admission_wait(seconds: float):
+    """승인까지 대기한 시간 기록"""
+    ADMISSION_WAIT.observe(seconds)
+
+
+def observe_admission_rejected(reason: str):
+    """요청 거절 기록"""
+    ADMISSION_REJECTED.labels(reason).inc()
+
+
+class CacheStatsCollector:
+    """수집 시점의 캐시 통계(AIAgent.cache_stats)를 지표로 변환"""
+
+    def __init__(self, stats_fn: Callable[[], Dict[str, Any]]):
+        self.stats_fn = stats_fn
+
+    def collect(self):
+        hit_ratio = GaugeMetricFamily("agent_cache_hit_ratio", "캐시 적중률", labels=["cache"])
+        entries = GaugeMetricFamily("agent_cache_entries", "캐시 항목 수", labels=["cache"])
+        size = GaugeMetricFamily("agent_cache_bytes", "캐시 크기 (bytes)", labels=["cache"])
+        hits = CounterMetricFamily("agent_cache_hits", "캐시 적중 수", labels=["cache"])
+        misses = CounterMetricFamily("agent_cache_misses", "캐시 미스 수", labels=["cache"])
+
+        for stats in _flatten_cache_stats(self.stats_fn()):
+            name = stats["name"]
+            hit_ratio.add_metric([name], stats["hit_ratio"])
+            entries.add_metric([name], stats["entries"])
+            size.add_metric([name], stats["bytes"])
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+
+        return [hit_ratio, entries, size, hits, misses]
+
+
+def _flatten_cache_stats(stats: Dict[str, Any]):
+    """중첩된 캐시 통계에서 TTLCache 통계(name 포함)만 추출"""
+    for value in stats.values():
+        if isinstance(value, dict):
+            if "name" in value and "hits" in value:
+                yield value
+            else:
+                yield from _flatten_cache_stats(value)
+
+
+def register_cache_collector(stats_fn: Callable[[], Dict[str, Any]]) -> CacheStatsCollector:
+    """캐시 통계 수집기 등록"""
+    collector = CacheStatsCollector(stats_fn)
+    REGISTRY.register(collector)
+    return collector
+
+
+def unregister_collector(collector: CacheStatsCollector):
+    """수집기 등록 해제"""
+    REGISTRY.unregister(collector)
+
+
+def export() -> Tuple[bytes, str]:
+    """Prometheus 텍스트 형식 지표 (본문, Content-Type)"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -11,6 +11,7 @@ class ActionType(str, Enum):
     REALTIME_API = "realtime_api"
     WEB_SEARCH = "web_search"
     HYBRID = "hybrid"  # 여러 액션이 필요한 경우
+    LOCAL_KB = "local_kb"  # 로컬 벡터 DB에 저장된 이전 웹 검색 결과로 답변 (웹 검색 대신)
 
 
 class QueryRequest(BaseModel):
@@ -54,3 +55,28 @@ class AgentResponse(BaseModel):
     final_answer: str
     confidence: float
     processing_time: float
+    stage_timings: Dict[str, float] = {}  # 단계별 소요 시간 (plan / execute / answer, 초 단위)
+    context_tokens: Optional[int] = None  # 최종 답변 프롬프트에 넣은 검색 컨텍스트 토큰 수 (추정치)
+    trace_id: Optional[str] = None  # 요청 트레이스 ID (트레이싱 비활성화 시 None)
+    cache_similarity: Optional[float] = None  # 의미 기반 응답 캐시에서 재사용한 경우 이전 질문과의 유사도
+
+
+class BatchQueryRequest(BaseModel):
+    """배치 쿼리 요청 모델"""
+    queries: List[QueryRequest]
+    concurrency: Optional[int] = None  # 동시 처리 수 (기본값: Config.BATCH_CONCURRENCY)
+    stream: bool = False  # True이면 완료 순서대로 NDJSON 스트리밍
+
+
+class BatchItemResponse(BaseModel):
+    """배치 개별 응답 (입력 순서 인덱스 포함)"""
+    index: int
+    response: AgentResponse
+
+
+class BatchQueryResponse(BaseModel):
+    """배치 쿼리 응답"""
+    results: List[AgentResponse]  # 입력 순서
+    total_queries: int
+    unique_queries: int
+    processing_time: float
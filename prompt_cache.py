@@ -0,0 +1,230 @@
+"""
+Prompt Cache - 고정 프롬프트 접두사를 Gemini 컨텍스트 캐시(cachedContents)에 등록하고 핸들로 참조
+
+요청 경로에서는 등록된 핸들을 조회만 하고(대기 없음), 등록 / TTL 연장은 백그라운드 스레드에서 수행합니다.
+핸들이 없거나 만료 직전이면 그 요청은 접두사를 본문에 그대로 포함해 보내고, 다음 요청부터 핸들을 사용합니다.
+"""
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Set
+
+import metrics
+import tracing
+from config import Config
+from http_pool import create_session, sync_timeout
+from text_utils import estimate_tokens
+
+
+class CachedPrefix:
+    """등록된 접두사 캐시"""
+
+    def __init__(self, name: str, model: str, tokens: int, expire_at: float):
+        self.name = name
+        self.model = model
+        self.tokens = tokens
+        self.expire_at = expire_at
+        self.hits = 0
+
+
+class PromptCache:
+    """모델 + 고정 접두사별 Gemini cachedContents 핸들 관리"""
+
+    def __init__(
+        self,
+        api_key: str,
+        enabled: Optional[bool] = None,
+        ttl: Optional[int] = None,
+        refresh_margin: Optional[int] = None,
+        min_tokens: Optional[int] = None,
+        retry_seconds: Optional[float] = None
+    ):
+        self.api_key = api_key
+        self.api_url = Config.GEMINI_CACHE_API_URL
+        self.enabled = enabled if enabled is not None else Config.PROMPT_CACHE_ENABLED
+        self.ttl = ttl if ttl is not None else Config.PROMPT_CACHE_TTL
+        self.refresh_margin = refresh_margin if refresh_margin is not None else Config.PROMPT_CACHE_REFRESH_MARGIN
+        self.min_tokens = min_tokens if min_tokens is not None else Config.PROMPT_CACHE_MIN_TOKENS
+        self.retry_seconds = retry_seconds if retry_seconds is not None else Config.PROMPT_CACHE_RETRY_SECONDS
+
+        self._entries: Dict[str, CachedPrefix] = {}
+        # 등록 실패한 접두사의 재시도 가능 시각
+        self._failed_until: Dict[str, float] = {}
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prompt-cache")
+        # 캐시 등록 / 연장 요청은 생성 요청과 지연 특성이 달라 별도 업스트림(동시 요청 한도 / 회로 차단기)으로 분리
+        self.session = create_session("gemini_cache", pool_size=1)
+
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.invalidated = 0
+
+    def lookup(self, model: str, prefix: str) -> Optional[str]:
+        """
+        접두사 캐시 핸들 조회 (없거나 만료 직전이면 백그라운드 등록 / 연장 예약)
+
+        Args:
+            model: 요청 모델 (캐시는 모델별로 등록)
+            prefix: 고정 프롬프트 접두사
+
+        Returns:
+            cachedContents 이름 (사용할 수 없으면 None - 접두사를 요청에 포함해야 함)
+        """
+        if not self.enabled or not prefix:
+            return None
+
+        key = self._key(model, prefix)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now >= entry.expire_at:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                name = None
+                if now < self._failed_until.get(key, 0.0):
+                    # 등록 불가(최소 크기 미만) 또는 재시도 대기 중
+                    self.bypassed += 1
+                    result = "bypass"
+                else:
+                    self.misses += 1
+                    self._schedule(key, self._create, key, model, prefix)
+                    result = "miss"
+            else:
+                self.hits += 1
+                entry.hits += 1
+                if now >= entry.expire_at - self.refresh_margin:
+                    self._schedule(key, self._refresh, key, entry)
+                result = "hit"
+                name = entry.name
+
+        metrics.observe_prompt_cache(result)
+        tracing.set_attribute("prompt_cache", result)
+        return name
+
+    def invalidate(self, name: str):
+        """
+        요청에서 거부된 캐시 핸들 제거 (제공자 측에서 만료 / 삭제된 경우, 다음 조회 시 재등록)
+
+        Args:
+            name: cachedContents 이름
+        """
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.name == name:
+                    del self._entries[key]
+                    self.invalidated += 1
+        metrics.observe_prompt_cache("invalidated")
+        tracing.warning("프롬프트 캐시 핸들 무효화", name=name)
+
+    def _schedule(self, key: str, fn, *args):
+        """같은 접두사에 대한 작업은 하나만 진행 (lock 보유 상태에서 호출)"""
+        if key in self._pending:
+            return
+        self._pending.add(key)
+        try:
+            self._executor.submit(self._run, key, fn, *args)
+        except RuntimeError:
+            # 종료 중
+            self._pending.discard(key)
+
+    def _run(self, key: str, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            with self._lock:
+                self._failed_until[key] = time.monotonic() + self.retry_seconds
+            tracing.warning(f"프롬프트 캐시 등록 / 연장 실패: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def _create(self, key: str, model: str, prefix: str):
+        """접두사를 cachedContents로 등록"""
+        tokens = estimate_tokens(prefix)
+        if tokens < self.min_tokens:
+            # 제공자 최소 크기 미만 - 등록하지 않고 접두사를 계속 요청에 포함 (암시적 접두사 캐시에 맡김)
+            with self._lock:
+                self._failed_until[key] = float("inf")
+            return
+
+        started = time.monotonic()
+        response = self.session.post(
+            f"{self.api_url}?key={self.api_key}",
+            json={
+                "model": f"models/{model}",
+                "contents": [{"role": "user", "parts": [{"text": prefix}]}],
+                "ttl": f"{self.ttl}s"
+            },
+            timeout=sync_timeout(Config.GEMINI_TIMEOUT)
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        usage = data.get("usageMetadata") or {}
+        entry = CachedPrefix(
+            name=data["name"],
+            model=model,
+            tokens=usage.get("totalTokenCount", tokens),
+            expire_at=started + self.ttl
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._failed_until.pop(key, None)
+        tracing.info("프롬프트 캐시 등록", name=entry.name, model=model, tokens=entry.tokens)
+
+    def _refresh(self, key: str, entry: CachedPrefix):
+        """등록된 캐시의 TTL 연장"""
+        started = time.monotonic()
+        cache_id = entry.name.split("/", 1)[-1]
+        response = self.session.patch(
+            f"{self.api_url}/{cache_id}?updateMask=ttl&key={self.api_key}",
+            json={"ttl": f"{self.ttl}s"},
+            timeout=sync_timeout(Config.GEMINI_TIMEOUT)
+        )
+        if response.status_code == 404:
+            # 이미 만료 / 삭제됨 - 다음 조회에서 새로 등록
+            self.invalidate(entry.name)
+            return
+        response.raise_for_status()
+        with self._lock:
+            entry.expire_at = started + self.ttl
+
+    @staticmethod
+    def _key(model: str, prefix: str) -> str:
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        return f"{model}:{digest}"
+
+    def stats(self) -> Dict[str, Any]:
+        """접두사 캐시 통계"""
+        now = time.monotonic()
+        with self._lock:
+            entries = [
+                {
+                    "name": entry.name,
+                    "model": entry.model,
+                    "tokens": entry.tokens,
+                    "hits": entry.hits,
+                    "expires_in": round(entry.expire_at - now, 1),
+                }
+                for entry in self._entries.values()
+            ]
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "invalidated": self.invalidated,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "entries": entries,
+        }
+
+    def close(self):
+        """백그라운드 작업 정리 (등록된 캐시는 TTL이 지나면 제공자 측에서 만료)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
@@ -1,17 +1,288 @@
 """
 Realtime API Handler - 실시간 API 데이터 처리
 """
-import requests
+import asyncio
+import re
+import threading
+import httpx
 import time
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
+from zoneinfo import ZoneInfo
+from config import Config
+from cache import TTLCache
 from models import SearchResult
+from text_utils import tokenize
+import resilience
+import tracing
+from metrics import timed_stage
+from tracing import traced
+from http_pool import create_session, create_async_client, sync_timeout, async_timeout
 
 
 class RealtimeAPIHandler:
     """실시간 API 핸들러"""
     
+    COINGECKO_PRICE_URL = Config.COINGECKO_API_URL
+    MARKET_TIMEZONE = ZoneInfo("America/New_York")
+    
+    # 정규 이름 -> 별칭 (영문은 소문자 단어, 한글은 부분 문자열로 비교)
+    CRYPTO_ALIASES = {
+        "bitcoin": ["bitcoin", "btc", "비트코인"],
+        "ethereum": ["ethereum", "eth", "이더리움"],
+        "solana": ["solana", "sol", "솔라나"],
+        "ripple": ["ripple", "xrp", "리플"],
+        "dogecoin": ["dogecoin", "doge", "도지코인"],
+        "cardano": ["cardano", "ada", "에이다"],
+    }
+    STOCK_ALIASES = {
+        "AAPL": ["aapl", "apple", "애플"],
+        "GOOGL": ["googl", "google", "구글", "알파벳"],
+        "TSLA": ["tsla", "tesla", "테슬라"],
+        "MSFT": ["msft", "microsoft", "마이크로소프트"],
+    }
+    LOCATION_ALIASES = {
+        "Seoul": ["seoul", "서울"],
+        "Busan": ["busan", "부산"],
+        "Incheon": ["incheon", "인천"],
+    }
+    
     def __init__(self):
-        pass
+        self.timeout = Config.REALTIME_API_TIMEOUT
+        
+        # keep-alive 연결 풀 (동기 / 비동기)
+        self.session = create_session("coingecko")
+        self._async_client: Optional[httpx.AsyncClient] = None
+        
+        # 데이터 타입별 신선도 정책을 따르는 캐시 (stale-while-revalidate)
+        # 항목별 TTL은 저장 시 정책(ttl + stale)에 따라 지정
+        self.cache = TTLCache("realtime_api", ttl=1, max_entries=Config.REALTIME_CACHE_MAX_ENTRIES)
+        self.stale_refreshes = 0
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self._refresh_tasks = set()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="realtime-refresh")
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """비동기 클라이언트 (첫 사용 시 실행 중인 이벤트 루프에서 생성)"""
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = create_async_client("coingecko", self.timeout)
+        return self._async_client
+    
+    async def aclose(self):
+        """비동기 연결 풀 정리"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+    
+    def close(self):
+        """동기 연결 풀 정리"""
+        self.session.close()
+        self._refresh_executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _policy_ttl(self, data_type: str) -> Tuple[float, float]:
+        """
+        데이터 타입별 (신선 유지 시간, 오래된 값 허용 시간)
+        주식은 장 마감 중에는 가격이 바뀌지 않으므로 closed_ttl 사용
+        """
+        policy = Config.REALTIME_CACHE_POLICIES.get(data_type, {"ttl": 0, "stale": 0})
+        ttl = policy["ttl"]
+        if data_type == "stock_price" and not self._is_market_open():
+            ttl = policy.get("closed_ttl", ttl)
+        return ttl, policy.get("stale", 0)
+    
+    def _is_market_open(self, now: Optional[datetime] = None) -> bool:
+        """미국 주식 시장 정규장 운영 여부 (평일 09:30~16:00, 뉴욕 시간)"""
+        now = now or datetime.now(self.MARKET_TIMEZONE)
+        if now.weekday() >= 5:
+            return False
+        minutes = now.hour * 60 + now.minute
+        return 9 * 60 + 30 <= minutes < 16 * 60
+    
+    def _cache_lookup(self, data_type: str, key: str) -> Tuple[Optional[List[SearchResult]], bool]:
+        """
+        캐시 조회
+        
+        Returns:
+            (캐시된 결과 복사본 또는 None, 오래된 값 여부)
+        """
+        entry = self.cache.get(f"{data_type}:{key}")
+        if entry is None:
+            return None, False
+        
+        results, fresh_until = entry
+        return [result.model_copy(deep=True) for result in results], time.monotonic() >= fresh_until
+    
+    def _cache_store(self, data_type: str, key: str, results: List[SearchResult]):
+        """캐시 저장 (오류 결과는 저장하지 않음)"""
+        if any("error" in result.metadata for result in results):
+            return
+        
+        ttl, stale = self._policy_ttl(data_type)
+        if ttl <= 0:
+            return
+        self.cache.set(f"{data_type}:{key}", (results, time.monotonic() + ttl), ttl=ttl + stale)
+    
+    def _cached_fetch(self, data_type: str, key: str, fetch_fn: Callable[[], List[SearchResult]]) -> List[SearchResult]:
+        """단일 항목 stale-while-revalidate 조회"""
+        return self._cached_fetch_many(
+            data_type, [key],
+            lambda keys: {key: fetch_fn()}
+        )[key]
+    
+    def _cached_fetch_many(
+        self,
+        data_type: str,
+        keys: List[str],
+        fetch_many: Callable[[List[str]], Dict[str, List[SearchResult]]]
+    ) -> Dict[str, List[SearchResult]]:
+        """
+        stale-while-revalidate 일괄 조회
+        신선한 값은 그대로, 오래된 값은 즉시 반환하면서 백그라운드에서 갱신,
+        캐시에 없는 항목만 모아 한 번에 조회
+        
+        Args:
+            data_type: 캐시 정책 이름
+            keys: 데이터 키 리스트 (심볼, 지역 등)
+            fetch_many: 키 리스트를 받아 키별 결과를 반환하는 업스트림 조회 함수
+            
+        Returns:
+            키별 검색 결과
+        """
+        results, stale_keys, missing_keys = self._partition_cached(data_type, keys)
+        
+        if stale_keys:
+            self._refresh_in_background(data_type, stale_keys, fetch_many)
+        
+        if missing_keys:
+            fetched = fetch_many(missing_keys)
+            self._cache_store_many(data_type, fetched)
+            results.update(fetched)
+        
+        return results
+    
+    async def _acached_fetch_many(
+        self,
+        data_type: str,
+        keys: List[str],
+        fetch_many: Callable[[List[str]], Awaitable[Dict[str, List[SearchResult]]]]
+    ) -> Dict[str, List[SearchResult]]:
+        """
+        stale-while-revalidate 일괄 조회 (비동기)
+        
+        Args:
+            data_type: 캐시 정책 이름
+            keys: 데이터 키 리스트 (심볼, 지역 등)
+            fetch_many: 키 리스트를 받아 키별 결과를 반환하는 업스트림 조회 코루틴 함수
+            
+        Returns:
+            키별 검색 결과
+        """
+        results, stale_keys, missing_keys = self._partition_cached(data_type, keys)
+        
+        if stale_keys:
+            self._arefresh_in_background(data_type, stale_keys, fetch_many)
+        
+        if missing_keys:
+            fetched = await fetch_many(missing_keys)
+            self._cache_store_many(data_type, fetched)
+            results.update(fetched)
+        
+        return results
+    
+    def _partition_cached(self, data_type: str, keys: List[str]) -> Tuple[Dict[str, List[SearchResult]], List[str], List[str]]:
+        """
+        키를 캐시 상태별로 분류
+        
+        Returns:
+            (캐시된 결과, 오래된 키 리스트, 캐시에 없는 키 리스트)
+        """
+        results = {}
+        stale_keys = []
+        missing_keys = []
+        for key in keys:
+            cached, stale = self._cache_lookup(data_type, key)
+            if cached is None:
+                missing_keys.append(key)
+                continue
+            
+            results[key] = cached
+            if stale:
+                stale_keys.append(key)
+        
+        return results, stale_keys, missing_keys
+    
+    def _cache_store_many(self, data_type: str, fetched: Dict[str, List[SearchResult]]):
+        """키별 결과 캐시 저장"""
+        for key, key_results in fetched.items():
+            self._cache_store(data_type, key, key_results)
+    
+    def _begin_refresh(self, data_type: str, keys: List[str]) -> List[str]:
+        """갱신이 진행 중이지 않은 키만 골라 갱신 중으로 표시"""
+        with self._refresh_lock:
+            claimed = [key for key in keys if f"{data_type}:{key}" not in self._refreshing]
+            for key in claimed:
+                self._refreshing.add(f"{data_type}:{key}")
+            if claimed:
+                self.stale_refreshes += 1
+            return claimed
+    
+    def _end_refresh(self, data_type: str, keys: List[str]):
+        """갱신 완료 처리"""
+        with self._refresh_lock:
+            for key in keys:
+                self._refreshing.discard(f"{data_type}:{key}")
+    
+    def _refresh_in_background(
+        self,
+        data_type: str,
+        keys: List[str],
+        fetch_many: Callable[[List[str]], Dict[str, List[SearchResult]]]
+    ):
+        """오래된 캐시 값을 스레드 풀에서 한 번에 갱신"""
+        keys = self._begin_refresh(data_type, keys)
+        if not keys:
+            return
+        
+        def refresh():
+            try:
+                self._cache_store_many(data_type, fetch_many(keys))
+            except Exception as e:
+                tracing.warning(f"실시간 캐시 갱신 실패 ({data_type}:{','.join(keys)}): {e}")
+            finally:
+                self._end_refresh(data_type, keys)
+        
+        self._refresh_executor.submit(refresh)
+    
+    def _arefresh_in_background(
+        self,
+        data_type: str,
+        keys: List[str],
+        fetch_many: Callable[[List[str]], Awaitable[Dict[str, List[SearchResult]]]]
+    ):
+        """오래된 캐시 값을 백그라운드 태스크로 한 번에 갱신"""
+        keys = self._begin_refresh(data_type, keys)
+        if not keys:
+            return
+        
+        async def refresh():
+            try:
+                self._cache_store_many(data_type, await fetch_many(keys))
+            except Exception as e:
+                tracing.warning(f"실시간 캐시 갱신 실패 ({data_type}:{','.join(keys)}): {e}")
+            finally:
+                self._end_refresh(data_type, keys)
+        
+        task = asyncio.ensure_future(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """실시간 데이터 캐시 통계"""
+        stats = self.cache.stats()
+        stats["stale_refreshes"] = self.stale_refreshes
+        return stats
     
     def get_current_time(self) -> List[SearchResult]:
         """현재 시간 정보 반환"""
@@ -30,6 +301,13 @@ class RealtimeAPIHandler:
         return [result]
     
     def get_weather_info(self, location: str = "Seoul") -> List[SearchResult]:
+        """날씨 정보 조회 (캐시 정책: weather)"""
+        return self._cached_fetch(
+            "weather", location.lower(),
+            lambda: self._fetch_weather_info(location)
+        )
+    
+    def _fetch_weather_info(self, location: str = "Seoul") -> List[SearchResult]:
         """
         날씨 정보 조회 (OpenWeatherMap API 예시)
         실제 구현 시 API 키 필요
@@ -61,6 +339,13 @@ class RealtimeAPIHandler:
         return [result]
     
     def get_stock_price(self, symbol: str) -> List[SearchResult]:
+        """주식 가격 정보 조회 (캐시 정책: stock_price, 장 운영 시간에 따라 TTL 변경)"""
+        return self._cached_fetch(
+            "stock_price", symbol.upper(),
+            lambda: self._fetch_stock_price(symbol)
+        )
+    
+    def _fetch_stock_price(self, symbol: str) -> List[SearchResult]:
         """
         주식 가격 정보 조회 (Alpha Vantage API 예시)
         실제 구현 시 API 키 필요
@@ -91,65 +376,133 @@ class RealtimeAPIHandler:
         
         return [result]
     
+    def _crypto_params(self, symbols: List[str]) -> Dict[str, str]:
+        """CoinGecko simple/price 요청 파라미터 (ids는 쉼표로 구분해 여러 개 요청 가능)"""
+        return {
+            "ids": ",".join(symbol.lower() for symbol in symbols),
+            "vs_currencies": "usd,krw",
+            "include_24hr_change": "true"
+        }
+    
     def get_crypto_price(self, symbol: str) -> List[SearchResult]:
+        """암호화폐 가격 정보 조회 (캐시 정책: crypto_price)"""
+        return self.get_crypto_prices([symbol])
+    
+    async def aget_crypto_price(self, symbol: str) -> List[SearchResult]:
+        """암호화폐 가격 정보 조회 (비동기, 캐시 정책: crypto_price)"""
+        return await self.aget_crypto_prices([symbol])
+    
+    def get_crypto_prices(self, symbols: List[str]) -> List[SearchResult]:
+        """
+        여러 암호화폐 가격을 한 번에 조회 (캐시에 없는 심볼만 단일 요청으로 조회)
+        
+        Args:
+            symbols: CoinGecko 코인 ID 리스트
+            
+        Returns:
+            심볼별 검색 결과 (요청 순서 유지)
+        """
+        keys = [symbol.lower() for symbol in symbols]
+        by_symbol = self._cached_fetch_many("crypto_price", keys, self._fetch_crypto_prices)
+        return [result for key in keys for result in by_symbol[key]]
+    
+    async def aget_crypto_prices(self, symbols: List[str]) -> List[SearchResult]:
+        """
+        여러 암호화폐 가격을 한 번에 조회 (비동기)
+        
+        Args:
+            symbols: CoinGecko 코인 ID 리스트
+            
+        Returns:
+            심볼별 검색 결과 (요청 순서 유지)
+        """
+        keys = [symbol.lower() for symbol in symbols]
+        by_symbol = await self._acached_fetch_many("crypto_price", keys, self._afetch_crypto_prices)
+        return [result for key in keys for result in by_symbol[key]]
+    
+    @traced("coingecko.price")
+    def _fetch_crypto_prices(self, symbols: List[str]) -> Dict[str, List[SearchResult]]:
         """
         암호화폐 가격 정보 조회
         CoinGecko API를 사용한 실제 구현 예시
         """
         try:
             # CoinGecko API는 무료로 사용 가능
-            url = f"https://api.coingecko.com/api/v3/simple/price"
-            params = {
-                "ids": symbol.lower(),
-                "vs_currencies": "usd,krw",
-                "include_24hr_change": "true"
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(
+                self.COINGECKO_PRICE_URL,
+                params=self._crypto_params(symbols),
+                timeout=sync_timeout(self.timeout)
+            )
             response.raise_for_status()
-            
             data = response.json()
-            
-            if symbol.lower() in data:
-                crypto_data = data[symbol.lower()]
-                usd_price = crypto_data.get("usd", 0)
-                krw_price = crypto_data.get("krw", 0)
-                change_24h = crypto_data.get("usd_24h_change", 0)
-                
-                content = f"{symbol.upper()} 가격: ${usd_price:,.2f} (₩{krw_price:,.0f}), 24시간 변동률: {change_24h:.2f}%"
-                
-                result = SearchResult(
-                    source="realtime_api",
-                    content=content,
-                    relevance_score=0.95,
-                    metadata={
-                        "type": "crypto_price",
-                        "symbol": symbol.upper(),
-                        "usd_price": usd_price,
-                        "krw_price": krw_price,
-                        "change_24h": change_24h
-                    }
-                )
                 
-                return [result]
-            else:
-                return self._get_crypto_not_found(symbol)
+        except Exception as e:
+            return {symbol: self._crypto_error_result(symbol, e) for symbol in symbols}
+        
+        return {symbol: self._build_crypto_result(symbol, data) for symbol in symbols}
+    
+    @traced("coingecko.price")
+    async def _afetch_crypto_prices(self, symbols: List[str]) -> Dict[str, List[SearchResult]]:
+        """
+        암호화폐 가격 정보 조회 (비동기, 연결 풀 재사용)
+        """
+        try:
+            response = await self._get_async_client().get(
+                self.COINGECKO_PRICE_URL,
+                params=self._crypto_params(symbols),
+                timeout=async_timeout(self.timeout)
+            )
+            response.raise_for_status()
+            data = response.json()
                 
         except Exception as e:
-            print(f"❌ 암호화폐 가격 조회 중 오류: {e}")
-            # 에러 시에도 유용한 정보 제공
-            error_result = SearchResult(
+            return {symbol: self._crypto_error_result(symbol, e) for symbol in symbols}
+        
+        return {symbol: self._build_crypto_result(symbol, data) for symbol in symbols}
+    
+    def _build_crypto_result(self, symbol: str, data: Dict[str, Any]) -> List[SearchResult]:
+        """CoinGecko 응답을 검색 결과로 변환"""
+        if symbol.lower() in data:
+            crypto_data = data[symbol.lower()]
+            usd_price = crypto_data.get("usd", 0)
+            krw_price = crypto_data.get("krw", 0)
+            change_24h = crypto_data.get("usd_24h_change", 0)
+            
+            content = f"{symbol.upper()} 가격: ${usd_price:,.2f} (₩{krw_price:,.0f}), 24시간 변동률: {change_24h:.2f}%"
+            
+            result = SearchResult(
                 source="realtime_api",
-                content=f"{symbol.upper()} 암호화폐 가격 조회에 실패했습니다. 네트워크 연결을 확인해주세요.",
-                relevance_score=0.2,
+                content=content,
+                relevance_score=0.95,
                 metadata={
                     "type": "crypto_price",
                     "symbol": symbol.upper(),
-                    "error": str(e),
-                    "suggestion": "나중에 다시 시도해보세요"
+                    "usd_price": usd_price,
+                    "krw_price": krw_price,
+                    "change_24h": change_24h
                 }
             )
-            return [error_result]
+            
+            return [result]
+        else:
+            return self._get_crypto_not_found(symbol)
+    
+    def _crypto_error_result(self, symbol: str, e: Exception) -> List[SearchResult]:
+        """암호화폐 가격 조회 실패 시 반환하는 결과"""
+        tracing.record_error(f"암호화폐 가격 조회 중 오류: {e}")
+        # 에러 시에도 유용한 정보 제공
+        error_result = SearchResult(
+            source="realtime_api",
+            content=f"{symbol.upper()} 암호화폐 가격 조회에 실패했습니다. 네트워크 연결을 확인해주세요.",
+            relevance_score=0.2,
+            metadata={
+                "type": "crypto_price",
+                "symbol": symbol.upper(),
+                "error": str(e),
+                "suggestion": "나중에 다시 시도해보세요"
+            }
+        )
+        return [error_result]
     
     def _get_crypto_not_found(self, symbol: str) -> List[SearchResult]:
         """암호화폐를 찾을 수 없을 때 반환하는 결과"""
@@ -165,9 +518,97 @@ class RealtimeAPIHandler:
         )
         return [result]
     
+    def _extract_entities(self, query: str, aliases: Dict[str, List[str]]) -> List[str]:
+        """
+        쿼리에 등장하는 엔티티를 등장 순서대로 추출
+        영문 별칭은 단어 단위로, 한글 별칭은 조사가 붙을 수 있으므로 부분 문자열로 비교
+        
+        Args:
+            query: 검색 쿼리
+            aliases: 정규 이름 -> 별칭 리스트
+            
+        Returns:
+            정규 이름 리스트 (중복 제거)
+        """
+        query_lower = query.lower()
+        words = set(tokenize(query_lower))
+        
+        found = []
+        for canonical, names in aliases.items():
+            positions = []
+            for name in names:
+                if name.isascii():
+                    if name in words:
+                        positions.append(re.search(rf"\b{re.escape(name)}\b", query_lower).start())
+                elif name in query_lower:
+                    positions.append(query_lower.index(name))
+            if positions:
+                found.append((min(positions), canonical))
+        
+        return [canonical for _, canonical in sorted(found)]
+    
+    def _canonical_entity(self, value: str, aliases: Dict[str, List[str]]) -> str:
+        """매개변수 값을 정규 이름으로 변환 (모르는 값은 그대로)"""
+        value_lower = str(value).lower()
+        for canonical, names in aliases.items():
+            if value_lower == canonical.lower() or value_lower in names:
+                return canonical
+        return str(value)
+    
+    def _requested_entities(
+        self,
+        query: str,
+        parameters: Dict[str, Any],
+        aliases: Dict[str, List[str]],
+        singular_key: str,
+        default: str
+    ) -> List[str]:
+        """
+        요청된 엔티티 목록 결정 (쿼리에서 추출 → 매개변수 → 기본값 순)
+        
+        Args:
+            query: 검색 쿼리
+            parameters: 액션 매개변수 (symbol / symbols, location / locations)
+            aliases: 정규 이름 -> 별칭 리스트
+            singular_key: 단일 매개변수 이름
+            default: 아무것도 없을 때 기본값
+            
+        Returns:
+            엔티티 리스트 (중복 제거, 순서 유지)
+        """
+        entities = self._extract_entities(query, aliases)
+        if not entities:
+            values = parameters.get(f"{singular_key}s") or [parameters.get(singular_key, default)]
+            if isinstance(values, str):
+                values = [v.strip() for v in values.split(",") if v.strip()]
+            entities = [self._canonical_entity(value, aliases) for value in values]
+        
+        return list(dict.fromkeys(entities))
+    
+    def _select_api(self, query_lower: str) -> str:
+        """쿼리 분석하여 호출할 API 종류 선택"""
+        if "시간" in query_lower or "time" in query_lower:
+            return "time"
+        elif "날씨" in query_lower or "weather" in query_lower:
+            return "weather"
+        elif "주식" in query_lower or "stock" in query_lower or self._extract_entities(query_lower, self.STOCK_ALIASES):
+            return "stock"
+        elif "암호화폐" in query_lower or "crypto" in query_lower or self._extract_entities(query_lower, self.CRYPTO_ALIASES):
+            return "crypto"
+        else:
+            # 기본적으로 현재 시간 반환
+            return "time"
+    
+    def is_available(self, query: str) -> bool:
+        """쿼리에 필요한 외부 API를 호출할 수 있는지 (CoinGecko 회로 차단 중이면 암호화폐 조회 불가)"""
+        return self._select_api(query.lower()) != "crypto" or resilience.is_available("coingecko")
+    
+    @timed_stage("realtime_api")
+    @traced("realtime_api")
     def search(self, query: str, parameters: Dict[str, Any] = None) -> List[SearchResult]:
         """
         실시간 API 검색 메인 함수 (에러 방어적)
+        쿼리에 여러 엔티티가 있으면 엔티티별 결과를 반환
         
         Args:
             query: 검색 쿼리
@@ -179,30 +620,55 @@ class RealtimeAPIHandler:
         if parameters is None:
             parameters = {}
         
-        query_lower = query.lower()
-        
         try:
             # 쿼리 분석하여 적절한 API 호출
-            if "시간" in query_lower or "time" in query_lower:
-                return self.get_current_time()
-            elif "날씨" in query_lower or "weather" in query_lower:
-                location = parameters.get("location", "Seoul")
-                return self.get_weather_info(location)
-            elif "주식" in query_lower or "stock" in query_lower:
-                symbol = parameters.get("symbol", "AAPL")
-                return self.get_stock_price(symbol)
-            elif "암호화폐" in query_lower or "crypto" in query_lower or "bitcoin" in query_lower:
-                symbol = parameters.get("symbol", "bitcoin")
-                return self.get_crypto_price(symbol)
+            api = self._select_api(query.lower())
+            if api == "weather":
+                locations = self._requested_entities(query, parameters, self.LOCATION_ALIASES, "location", "Seoul")
+                return [result for location in locations for result in self.get_weather_info(location)]
+            elif api == "stock":
+                symbols = self._requested_entities(query, parameters, self.STOCK_ALIASES, "symbol", "AAPL")
+                return [result for symbol in symbols for result in self.get_stock_price(symbol)]
+            elif api == "crypto":
+                symbols = self._requested_entities(query, parameters, self.CRYPTO_ALIASES, "symbol", "bitcoin")
+                return self.get_crypto_prices(symbols)
             else:
-                # 기본적으로 현재 시간 반환
                 return self.get_current_time()
         except Exception as e:
-            print(f"❌ 실시간 API 내부 오류: {e}")
-            # 에러 발생 시 기본 시간 정보라도 반환 시도
-            try:
-                return self.get_current_time()
-            except Exception as e2:
-                print(f"❌ 기본 시간 정보도 실패: {e2}")
-                # 완전 실패 시 예외 발생 (상위에서 처리)
-                raise Exception(f"실시간 API 완전 실패: {e}")
+            return self._fallback_time(e)
+    
+    @timed_stage("realtime_api")
+    @traced("realtime_api")
+    async def asearch(self, query: str, parameters: Dict[str, Any] = None) -> List[SearchResult]:
+        """
+        실시간 API 검색 메인 함수 (비동기)
+        네트워크 호출이 필요한 암호화폐 조회만 비동기로 수행하고 나머지는 동기 경로 재사용
+        
+        Args:
+            query: 검색 쿼리
+            parameters: 추가 매개변수
+            
+        Returns:
+            검색 결과 리스트
+        """
+        if parameters is None:
+            parameters = {}
+        
+        if self._select_api(query.lower()) != "crypto":
+            return self.search(query, parameters)
+        
+        try:
+            symbols = self._requested_entities(query, parameters, self.CRYPTO_ALIASES, "symbol", "bitcoin")
+            return await self.aget_crypto_prices(symbols)
+        except Exception as e:
+            return self._fallback_time(e)
+    
+    def _fallback_time(self, e: Exception) -> List[SearchResult]:
+        """내부 오류 시 기본 시간 정보라도 반환 시도"""
+        tracing.record_error(f"실시간 API 내부 오류: {e}")
+        try:
+            return self.get_current_time()
+        except Exception as e2:
+            tracing.error(f"기본 시간 정보도 실패: {e2}")
+            # 완전 실패 시 예외 발생 (상위에서 처리)
+            raise Exception(f"실시간 API 완전 실패: {e}")
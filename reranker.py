@@ -0,0 +1,137 @@
+"""
+Result Reranker - 증강된 쿼리 / 키워드 기준 BM25 점수로 검색 결과 재정렬
+
+결과별 본문(content + raw_content)을 문자 bigram으로 나누어 쿼리 용어 빈도 행렬을 만들고
+NumPy로 BM25 점수를 한 번에 계산합니다. 점수는 최댓값으로 정규화한 뒤 업스트림 관련도와
+가중 평균해 relevance_score로 사용하므로, 상위 결과만 쓰는 답변 컨텍스트에 실제로 관련 있는 결과가 들어갑니다.
+"""
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import Config
+from models import SearchResult
+from text_utils import tokenize
+
+
+def bigram_counts(text: str) -> Counter:
+    """
+    단어별 문자 bigram 빈도 (한 글자 단어는 그대로)
+    한국어는 조사가 붙어 단어 단위 비교가 어려우므로 문자 bigram을 용어로 사용
+
+    Args:
+        text: 입력 텍스트
+
+    Returns:
+        bigram 빈도
+    """
+    counts = Counter()
+    for token in tokenize(text):
+        if len(token) <= 2:
+            counts[token] += 1
+            continue
+        counts.update(token[i:i + 2] for i in range(len(token) - 1))
+    return counts
+
+
+def bm25_scores(
+    query_weights: Dict[str, float],
+    documents: Sequence[Counter],
+    k1: float = 1.2,
+    b: float = 0.75
+) -> np.ndarray:
+    """
+    문서별 BM25 점수 (문서 집합 자체로 IDF 계산)
+
+    Args:
+        query_weights: 쿼리 용어별 가중치
+        documents: 문서별 용어 빈도
+        k1: 용어 빈도 포화 계수
+        b: 문서 길이 정규화 계수
+
+    Returns:
+        문서별 점수 배열
+    """
+    if not query_weights or not documents:
+        return np.zeros(len(documents))
+
+    terms = list(query_weights)
+    weights = np.array([query_weights[term] for term in terms], dtype=np.float64)
+    # (문서 수, 쿼리 용어 수) 용어 빈도 행렬
+    tf = np.array([[doc.get(term, 0) for term in terms] for doc in documents], dtype=np.float64)
+    lengths = np.array([sum(doc.values()) for doc in documents], dtype=np.float64)
+
+    n = len(documents)
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((n - df + 0.5) / (df + 0.5))
+
+    avg_length = lengths.mean() or 1.0
+    norm = k1 * (1 - b + b * lengths / avg_length)
+    saturated = tf * (k1 + 1) / (tf + norm[:, None])
+    return saturated @ (idf * weights)
+
+
+class ResultReranker:
+    """BM25 + 업스트림 관련도 가중 평균으로 검색 결과 재정렬"""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        weight: Optional[float] = None,
+        keyword_weight: Optional[float] = None,
+        sources: Optional[List[str]] = None
+    ):
+        self.enabled = enabled if enabled is not None else Config.RERANK_ENABLED
+        self.weight = weight if weight is not None else Config.RERANK_WEIGHT
+        self.keyword_weight = keyword_weight if keyword_weight is not None else Config.RERANK_KEYWORD_WEIGHT
+        self.sources = set(sources if sources is not None else Config.RERANK_SOURCES)
+
+    def rerank(self, query: str, keywords: List[str], search_results: List[SearchResult]) -> List[SearchResult]:
+        """
+        검색 결과 재정렬 (대상 소스만 점수를 다시 계산하고, 나머지는 기존 관련도로 함께 정렬)
+
+        Args:
+            query: 증강된 쿼리
+            keywords: 쿼리 키워드
+            search_results: 검색 결과들
+
+        Returns:
+            관련도 순으로 정렬된 검색 결과들 (재계산된 결과는 metadata에 upstream_score / rerank_score 기록)
+        """
+        if not self.enabled or not search_results:
+            return search_results
+
+        targets = [i for i, result in enumerate(search_results) if result.source in self.sources]
+        query_weights = self._query_weights(query, keywords)
+        if not targets or not query_weights:
+            return search_results
+
+        scores = bm25_scores(query_weights, [bigram_counts(self._text(search_results[i])) for i in targets])
+        if scores.max() > 0:
+            scores = scores / scores.max()
+
+        results = list(search_results)
+        for i, score in zip(targets, scores.tolist()):
+            result = results[i]
+            combined = self.weight * score + (1 - self.weight) * result.relevance_score
+            metadata = dict(result.metadata)
+            metadata["upstream_score"] = result.relevance_score
+            metadata["rerank_score"] = round(score, 4)
+            results[i] = result.model_copy(update={"relevance_score": round(combined, 4), "metadata": metadata})
+
+        # 안정 정렬 (점수가 같으면 기존 순서 유지)
+        results.sort(key=lambda r: r.relevance_score, reverse=True)
+        return results
+
+    def _query_weights(self, query: str, keywords: List[str]) -> Dict[str, float]:
+        """쿼리 용어별 가중치 (쿼리 bigram 빈도 + 키워드 bigram 가중치)"""
+        weights: Dict[str, float] = dict(bigram_counts(query))
+        for keyword in keywords:
+            for term in bigram_counts(keyword):
+                weights[term] = weights.get(term, 0.0) + self.keyword_weight
+        return weights
+
+    def _text(self, result: SearchResult) -> str:
+        raw_content = result.metadata.get("raw_content") or ""
+        return f"{result.content}\n{raw_content}" if raw_content else result.content
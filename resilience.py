@@ -0,0 +1,767 @@
+"""
+Upstream Resilience - 업스트림(Gemini, Tavily, CoinGecko)별 적응형 동시 요청 한도, 재시도 / 헤지 요청, 회로 차단기
+
+AIMD 방식으로 업스트림별 동시 요청 수 한도를 조절합니다.
+- 한도까지 사용 중에 요청이 성공하면 한도를 조금씩 올립니다 (요청 한도개 성공당 +1).
+- 429 응답을 받으면 한도를 크게 줄입니다 (UPSTREAM_LIMIT_BACKOFF 배).
+- 최근 지연 시간이 장기 평균보다 크게 늘어나면 한도를 조금 줄입니다 (UPSTREAM_LIMIT_LATENCY_BACKOFF 배).
+한도 감소는 직전 감소 이후에 보낸 요청의 결과에만 반응해, 동시에 실패한 요청들로 한도가 연쇄적으로 줄지 않도록 합니다.
+
+재시도 / 헤지 요청은 업스트림별 재시도 예산(RetryBudget) 안에서만 수행해
+업스트림 장애 시 재시도로 부하가 몇 배로 늘어나지 않도록 합니다.
+
+회로 차단기(CircuitBreaker)는 최근 요청의 오류율 / 느린 요청 비율이 임계값을 넘으면 열려
+타임아웃을 기다리지 않고 즉시 CircuitOpenError를 발생시키고, 일정 시간 후 소수의 시험 요청으로 복구를 확인합니다.
+"""
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+import httpx
+import requests
+
+import metrics
+import tracing
+from config import Config
+
+T = TypeVar("T")
+
+# 재시도 가능한 HTTP 상태 코드 (429는 UpstreamThrottled로 별도 처리)
+RETRYABLE_STATUS = (408, 500, 502, 503, 504)
+
+
+class RetryableError(Exception):
+    """재시도 가능한 업스트림 오류 (타임아웃, 연결 실패, 5xx)"""
+
+
+class UpstreamThrottled(Exception):
+    """업스트림 요청 한도 초과 (429 응답 또는 동시 요청 한도 대기 시간 초과)"""
+
+    def __init__(self, upstream: str, message: str, reason: str, retry_after: Optional[float] = None):
+        super().__init__(f"{upstream} {message}")
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    """업스트림 동시 요청 수 한도 (스레드 / 이벤트 루프 양쪽에서 사용 가능)"""
+
+    # 지연 시간 지수 이동 평균 계수 (최근 / 장기)
+    SHORT_ALPHA = 0.2
+    LONG_ALPHA = 0.01
+    # 지연 시간 기반 감소를 시작하기 전 최소 표본 수
+    MIN_SAMPLES = 20
+
+    def __init__(
+        self,
+        upstream: str,
+        initial_limit: Optional[int] = None,
+        min_limit: Optional[int] = None,
+        max_limit: Optional[int] = None,
+        backoff: Optional[float] = None,
+        latency_backoff: Optional[float] = None,
+        latency_tolerance: Optional[float] = None,
+        wait_timeout: Optional[float] = None
+    ):
+        self.upstream = upstream
+        self.min_limit = min_limit if min_limit is not None else Config.UPSTREAM_LIMIT_MIN
+        self.max_limit = max_limit if max_limit is not None else Config.UPSTREAM_LIMIT_MAX
+        initial_limit = initial_limit if initial_limit is not None else Config.UPSTREAM_LIMIT_INITIAL
+        self.limit = float(max(self.min_limit, min(self.max_limit, initial_limit)))
+        self.backoff = backoff if backoff is not None else Config.UPSTREAM_LIMIT_BACKOFF
+        self.latency_backoff = latency_backoff if latency_backoff is not None else Config.UPSTREAM_LIMIT_LATENCY_BACKOFF
+        self.latency_tolerance = latency_tolerance if latency_tolerance is not None else Config.UPSTREAM_LIMIT_LATENCY_TOLERANCE
+        self.wait_timeout = wait_timeout if wait_timeout is not None else Config.UPSTREAM_LIMIT_WAIT_TIMEOUT
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._in_flight = 0
+        self._short_latency: Optional[float] = None
+        self._long_latency: Optional[float] = None
+        self._samples = 0
+        self._last_decrease = 0.0
+
+        self.dropped = 0
+        self.latency_decreases = 0
+        self.wait_timeouts = 0
+        metrics.set_upstream_limit(upstream, self.limit)
+
+    def acquire(self) -> float:
+        """
+        동시 요청 슬롯 획득 (동기, 필요하면 대기)
+
+        Returns:
+            요청 시작 시각 (release에 전달)
+
+        Raises:
+            UpstreamThrottled: 대기 시간이 UPSTREAM_LIMIT_WAIT_TIMEOUT을 넘은 경우
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        with self._cond:
+            while not self._try_acquire():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise self._wait_timeout_error()
+                self._cond.wait(remaining)
+        return time.monotonic()
+
+    async def aacquire(self) -> float:
+        """
+        동시 요청 슬롯 획득 (비동기, 필요하면 대기)
+
+        Returns:
+            요청 시작 시각 (release에 전달)
+
+        Raises:
+            UpstreamThrottled: 대기 시간이 UPSTREAM_LIMIT_WAIT_TIMEOUT을 넘은 경우
+        """
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            with self._lock:
+                if self._try_acquire():
+                    return time.monotonic()
+                waiter = (loop, loop.create_future())
+                self._async_waiters.append(waiter)
+
+            try:
+                await asyncio.wait_for(waiter[1], max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self._abandon(waiter)
+                    raise self._wait_timeout_error()
+            except asyncio.CancelledError:
+                with self._lock:
+                    self._abandon(waiter)
+                raise
+
+    def release(self, started: float, outcome: str):
+        """
+        슬롯 반환 후 결과에 따라 한도 조절
+
+        Args:
+            started: acquire가 반환한 요청 시작 시각
+            outcome: ok (성공, 지연 시간 반영), dropped (429 / 503 / 타임아웃), ignore (한도와 무관한 실패)
+        """
+        latency = time.monotonic() - started
+        with self._lock:
+            self._in_flight -= 1
+            if outcome == "dropped":
+                self.dropped += 1
+                self._decrease(started, self.backoff)
+            elif outcome == "ok":
+                self._observe_latency(latency)
+                if self._latency_degraded():
+                    if self._decrease(started, self.latency_backoff):
+                        self.latency_decreases += 1
+                elif self._in_flight + 1 >= int(self.limit):
+                    # 한도까지 사용 중일 때만 증가 (요청이 적어 한도를 다 쓰지 않을 때 한도가 부풀지 않도록)
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._wake()
+        metrics.set_upstream_limit(self.upstream, self.limit)
+
+    def _try_acquire(self) -> bool:
+        if self._in_flight < int(self.limit):
+            self._in_flight += 1
+            return True
+        return False
+
+    def _observe_latency(self, latency: float):
+        self._samples += 1
+        if self._short_latency is None:
+            self._short_latency = self._long_latency = latency
+            return
+        self._short_latency += self.SHORT_ALPHA * (latency - self._short_latency)
+        self._long_latency += self.LONG_ALPHA * (latency - self._long_latency)
+
+    def _latency_degraded(self) -> bool:
+        """최근 지연 시간이 장기 평균의 허용 배수를 넘었는지"""
+        return (
+            self._samples >= self.MIN_SAMPLES
+            and self._short_latency > self._long_latency * self.latency_tolerance
+        )
+
+    def _decrease(self, started: float, factor: float) -> bool:
+        """한도 감소 (직전 감소 전에 보낸 요청의 결과는 무시)"""
+        if started < self._last_decrease:
+            return False
+        self.limit = max(self.min_limit, self.limit * factor)
+        self._last_decrease = time.monotonic()
+        return True
+
+    def _wake(self):
+        """빈 슬롯 수만큼 대기 중인 스레드 / 코루틴 깨우기"""
+        free = int(self.limit) - self._in_flight
+        if free <= 0:
+            return
+        self._cond.notify(free)
+        while self._async_waiters and free > 0:
+            loop, future = self._async_waiters.pop(0)
+            loop.call_soon_threadsafe(_resolve, future)
+            free -= 1
+
+    def _abandon(self, waiter: Tuple[asyncio.AbstractEventLoop, asyncio.Future]):
+        """대기 취소 (이미 깨워진 경우 다른 대기자에게 넘김)"""
+        if waiter in self._async_waiters:
+            self._async_waiters.remove(waiter)
+        else:
+            self._wake()
+
+    def _wait_timeout_error(self) -> UpstreamThrottled:
+        self.wait_timeouts += 1
+        metrics.observe_upstream_throttled(self.upstream, "limit_wait")
+        return UpstreamThrottled(
+            self.upstream,
+            f"동시 요청 한도({int(self.limit)}) 대기 시간 초과",
+            reason="limit_wait",
+            retry_after=self.wait_timeout
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """한도 / 사용량 통계"""
+        with self._lock:
+            return {
+                "upstream": self.upstream,
+                "limit": round(self.limit, 2),
+                "in_flight": self._in_flight,
+                "waiting": len(self._async_waiters),
+                "latency_short": round(self._short_latency or 0.0, 4),
+                "latency_long": round(self._long_latency or 0.0, 4),
+                "dropped": self.dropped,
+                "latency_decreases": self.latency_decreases,
+                "wait_timeouts": self.wait_timeouts,
+            }
+
+
+def outcome_for_status(status_code: int) -> str:
+    """HTTP 상태 코드를 한도 조절 결과로 변환 (429 / 503은 과부하 신호)"""
+    if status_code in (429, 503):
+        return "dropped"
+    if status_code >= 500:
+        return "ignore"
+    return "ok"
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(upstream: str) -> Optional[AdaptiveLimiter]:
+    """업스트림별 한도 (UPSTREAM_LIMIT_ENABLED가 false면 None)"""
+    if not Config.UPSTREAM_LIMIT_ENABLED:
+        return None
+    with _limiters_lock:
+        if upstream not in _limiters:
+            _limiters[upstream] = AdaptiveLimiter(upstream)
+        return _limiters[upstream]
+
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """업스트림별 한도 통계"""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.upstream: limiter.stats() for limiter in limiters}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 헤더 (초 또는 HTTP 날짜) 해석"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def check_throttled(upstream: str, response):
+    """
+    429 응답이면 UpstreamThrottled 발생 (requests / httpx 응답 모두 지원)
+
+    Raises:
+        UpstreamThrottled: 업스트림이 요청 한도 초과로 거절한 경우
+    """
+    if response.status_code == 429:
+        metrics.observe_upstream_throttled(upstream, "rate_limited")
+        raise UpstreamThrottled(
+            upstream,
+            "요청 한도 초과 (429)",
+            reason="rate_limited",
+            retry_after=parse_retry_after(response.headers.get("Retry-After"))
+        )
+
+
+def upstream_error(message: str, e: Exception) -> Exception:
+    """
+    requests / httpx 예외를 재시도 가능 여부에 따라 변환
+
+    Args:
+        message: 오류 메시지
+        e: 원본 예외
+
+    Returns:
+        타임아웃, 연결 실패, 재시도 가능한 상태 코드면 RetryableError, 그 외에는 Exception
+    """
+    response = getattr(e, "response", None)
+    if response is not None:
+        retryable = response.status_code in RETRYABLE_STATUS
+    else:
+        retryable = isinstance(e, (requests.RequestException, httpx.TransportError))
+    return RetryableError(message) if retryable else Exception(message)
+
+
+class CircuitOpenError(Exception):
+    """회로 차단기가 열려 업스트림 호출을 즉시 거절"""
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"{upstream} 회로 차단 중 ({retry_after:.1f}초 후 재시도)")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    업스트림 회로 차단기 (closed → open → half_open → closed)
+
+    - closed: 최근 BREAKER_WINDOW초 동안의 요청이 BREAKER_MIN_REQUESTS개 이상이고
+      오류율 또는 느린 요청 비율이 임계값 이상이면 open
+    - open: BREAKER_OPEN_SECONDS 동안 모든 요청을 즉시 거절한 뒤 half_open
+    - half_open: 최대 BREAKER_HALF_OPEN_PROBES개의 시험 요청만 허용, 모두 성공하면 closed, 하나라도 실패하면 다시 open
+    """
+
+    STATES = ("closed", "half_open", "open")
+
+    def __init__(
+        self,
+        upstream: str,
+        window: Optional[float] = None,
+        min_requests: Optional[int] = None,
+        error_rate: Optional[float] = None,
+        slow_call_seconds: Optional[float] = None,
+        slow_rate: Optional[float] = None,
+        open_seconds: Optional[float] = None,
+        half_open_probes: Optional[int] = None
+    ):
+        self.upstream = upstream
+        self.window = window if window is not None else Config.BREAKER_WINDOW
+        self.min_requests = min_requests if min_requests is not None else Config.BREAKER_MIN_REQUESTS
+        self.error_rate = error_rate if error_rate is not None else Config.BREAKER_ERROR_RATE
+        self.slow_call_seconds = (
+            slow_call_seconds if slow_call_seconds is not None
+            else Config.BREAKER_SLOW_CALL_SECONDS.get(upstream, Config.BREAKER_SLOW_CALL_SECONDS["default"])
+        )
+        self.slow_rate = slow_rate if slow_rate is not None else Config.BREAKER_SLOW_RATE
+        self.open_seconds = open_seconds if open_seconds is not None else Config.BREAKER_OPEN_SECONDS
+        self.half_open_probes = half_open_probes if half_open_probes is not None else Config.BREAKER_HALF_OPEN_PROBES
+
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._opened_at = 0.0
+        # (완료 시각, 실패 여부, 느린 요청 여부)
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+        self.opened = 0
+        self.short_circuited = 0
+        metrics.set_circuit_state(upstream, self.STATES.index("closed"))
+
+    @property
+    def state(self) -> str:
+        """현재 상태 (open 시간이 지났으면 half_open)"""
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            return self._state
+
+    def before_call(self) -> bool:
+        """
+        호출 허용 여부 확인
+
+        Returns:
+            half_open 상태의 시험 요청이면 True (after_call에 전달)
+
+        Raises:
+            CircuitOpenError: 회로가 열려 있거나 시험 요청 수가 가득 찬 경우
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_half_open(now)
+            if self._state == "closed":
+                return False
+            if self._state == "half_open" and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+
+            self.short_circuited += 1
+            retry_after = max(0.0, self._opened_at + self.open_seconds - now)
+        metrics.observe_circuit_rejected(self.upstream)
+        raise CircuitOpenError(self.upstream, retry_after)
+
+    def after_call(self, probe: bool, failed: bool, latency: float):
+        """
+        호출 결과 기록
+
+        Args:
+            probe: before_call의 반환값
+            failed: 실패 여부 (타임아웃, 연결 실패, 5xx), 결과 없이 취소되었으면 None
+            latency: 소요 시간 (초)
+        """
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            now = time.monotonic()
+            if probe:
+                self._probes_in_flight -= 1
+                if self._state != "half_open" or failed is None:
+                    return
+                if failed or slow:
+                    self._open(now, "시험 요청 실패")
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    self._close()
+                return
+
+            if self._state != "closed" or failed is None:
+                return
+            self._calls.append((now, failed, slow))
+            self._evict(now)
+            total = len(self._calls)
+            if total < self.min_requests:
+                return
+            failures = sum(1 for _, f, _ in self._calls if f)
+            slows = sum(1 for _, _, s in self._calls if s)
+            if failures / total >= self.error_rate:
+                self._open(now, f"오류율 {failures}/{total}")
+            elif slows / total >= self.slow_rate:
+                self._open(now, f"느린 요청 {slows}/{total}")
+
+    def _evict(self, now: float):
+        while self._calls and now - self._calls[0][0] > self.window:
+            self._calls.popleft()
+
+    def _maybe_half_open(self, now: float):
+        if self._state == "open" and now - self._opened_at >= self.open_seconds:
+            self._state = "half_open"
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+            metrics.set_circuit_state(self.upstream, self.STATES.index("half_open"))
+
+    def _open(self, now: float, reason: str):
+        self._state = "open"
+        self._opened_at = now
+        self._calls.clear()
+        self.opened += 1
+        metrics.set_circuit_state(self.upstream, self.STATES.index("open"))
+        tracing.warning(f"{self.upstream} 회로 차단 ({reason})")
+
+    def _close(self):
+        self._state = "closed"
+        self._calls.clear()
+        metrics.set_circuit_state(self.upstream, self.STATES.index("closed"))
+        tracing.info(f"{self.upstream} 회로 복구")
+
+    def stats(self) -> Dict[str, Any]:
+        """상태 / 통계"""
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_half_open(now)
+            self._evict(now)
+            return {
+                "upstream": self.upstream,
+                "state": self._state,
+                "window_requests": len(self._calls),
+                "window_failures": sum(1 for _, f, _ in self._calls if f),
+                "window_slow": sum(1 for _, _, s in self._calls if s),
+                "opened": self.opened,
+                "short_circuited": self.short_circuited,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(upstream: str) -> Optional[CircuitBreaker]:
+    """업스트림별 회로 차단기 (BREAKER_ENABLED가 false면 None)"""
+    if not Config.BREAKER_ENABLED:
+        return None
+    with _limiters_lock:
+        if upstream not in _breakers:
+            _breakers[upstream] = CircuitBreaker(upstream)
+        return _breakers[upstream]
+
+
+def is_available(upstream: str) -> bool:
+    """업스트림 호출 가능 여부 (회로가 열려 있으면 False, 시험 요청 슬롯은 사용하지 않음)"""
+    breaker = get_breaker(upstream)
+    return breaker is None or breaker.state != "open"
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """업스트림별 회로 차단기 상태"""
+    with _limiters_lock:
+        breakers = list(_breakers.values())
+    return {breaker.upstream: breaker.stats() for breaker in breakers}
+
+
+def is_retryable(e: BaseException) -> bool:
+    """재시도할 오류인지 (동시 요청 한도 대기 시간 초과는 재시도하지 않음)"""
+    if isinstance(e, UpstreamThrottled):
+        return e.reason == "rate_limited"
+    return isinstance(e, RetryableError)
+
+
+class LatencyTracker:
+    """키(단계)별 최근 지연 시간 분포 (헤지 요청 시점 계산용)"""
+
+    def __init__(self, window: Optional[int] = None):
+        self.window = window or Config.GEMINI_LATENCY_WINDOW
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key: str, latency: float):
+        """지연 시간 기록"""
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(latency)
+
+    def percentile(self, key: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """
+        최근 지연 시간 분위수
+
+        Args:
+            key: 단계 이름
+            q: 분위 (0~1)
+            min_samples: 최소 표본 수 (부족하면 None)
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """키별 p50 / p95 / p99 (초)"""
+        with self._lock:
+            keys = list(self._samples)
+        return {
+            key: {
+                "samples": len(self._samples[key]),
+                "p50": round(self.percentile(key, 0.5) or 0.0, 4),
+                "p95": round(self.percentile(key, 0.95) or 0.0, 4),
+                "p99": round(self.percentile(key, 0.99) or 0.0, 4),
+            }
+            for key in keys
+        }
+
+
+class RetryBudget:
+    """
+    재시도 / 헤지 요청 예산 (토큰 버킷)
+
+    원래 요청마다 ratio개의 토큰이 쌓이고, 재시도 / 헤지 요청은 토큰 1개를 사용합니다.
+    장기적으로 추가 요청 수가 원래 요청 수의 ratio 배를 넘지 않습니다.
+    """
+
+    def __init__(self, ratio: Optional[float] = None, max_tokens: Optional[float] = None):
+        self.ratio = ratio if ratio is not None else Config.RETRY_BUDGET_RATIO
+        self.max_tokens = max_tokens if max_tokens is not None else Config.RETRY_BUDGET_MAX_TOKENS
+        self.tokens = self.max_tokens
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """원래 요청 1건 기록"""
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """추가 요청 1건에 사용할 토큰이 있으면 차감"""
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            self.exhausted += 1
+            return False
+
+
+_retry_budgets: Dict[str, RetryBudget] = {}
+
+
+def get_retry_budget(upstream: str) -> RetryBudget:
+    """업스트림별 재시도 예산"""
+    with _limiters_lock:
+        if upstream not in _retry_budgets:
+            _retry_budgets[upstream] = RetryBudget()
+        return _retry_budgets[upstream]
+
+
+def retry_delay(retry: int, e: BaseException) -> Optional[float]:
+    """
+    재시도 전 대기 시간 (지수 백오프 + full jitter, Retry-After가 있으면 우선)
+
+    Args:
+        retry: 재시도 순번 (1부터)
+        e: 직전 오류
+
+    Returns:
+        대기 시간 (초), Retry-After가 최대 대기 시간을 넘으면 None (재시도하지 않음)
+    """
+    retry_after = getattr(e, "retry_after", None)
+    if retry_after is not None:
+        if retry_after > Config.RETRY_MAX_DELAY:
+            return None
+        return retry_after + random.uniform(0, Config.RETRY_BASE_DELAY)
+    return random.uniform(0, min(Config.RETRY_MAX_DELAY, Config.RETRY_BASE_DELAY * 2 ** (retry - 1)))
+
+
+def _next_retry(upstream: str, attempts: int, max_attempts: int, e: BaseException) -> Optional[float]:
+    """재시도 여부 판단 후 대기 시간 반환 (재시도하지 않으면 None)"""
+    if attempts >= max_attempts or not is_retryable(e):
+        return None
+    delay = retry_delay(attempts, e)
+    if delay is None or not get_retry_budget(upstream).try_spend():
+        return None
+    metrics.observe_upstream_retry(upstream, "retry")
+    tracing.info(f"{upstream} 재시도 {attempts + 1}/{max_attempts} ({delay:.2f}초 후): {e}")
+    return delay
+
+
+def call_with_retries(
+    upstream: str,
+    fn: Callable[[], T],
+    max_attempts: int,
+    tracker: Optional[LatencyTracker] = None,
+    key: str = "default"
+) -> T:
+    """
+    재시도 가능한 오류 시 지터 백오프 후 재시도 (동기)
+
+    Args:
+        upstream: 업스트림 이름 (재시도 예산 / 지표)
+        fn: 1회 요청 함수
+        max_attempts: 최대 시도 횟수
+        tracker: 성공한 요청의 지연 시간을 기록할 LatencyTracker
+        key: LatencyTracker 키
+
+    Returns:
+        fn 결과
+    """
+    get_retry_budget(upstream).deposit()
+    attempts = 0
+    while True:
+        attempts += 1
+        started = time.monotonic()
+        try:
+            result = fn()
+        except Exception as e:
+            delay = _next_retry(upstream, attempts, max_attempts, e)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            continue
+
+        if tracker is not None:
+            tracker.observe(key, time.monotonic() - started)
+        tracing.set_attribute("attempts", attempts)
+        return result
+
+
+async def acall_hedged(
+    upstream: str,
+    fn: Callable[[], Awaitable[T]],
+    max_attempts: int,
+    hedge_delay: Optional[float] = None,
+    tracker: Optional[LatencyTracker] = None,
+    key: str = "default"
+) -> T:
+    """
+    헤지 요청 + 재시도 (비동기)
+
+    첫 요청이 hedge_delay 안에 끝나지 않으면 두 번째 요청을 보내고 먼저 성공한 결과를 사용합니다.
+    진행 중인 요청이 모두 실패하면 재시도 가능한 오류인 경우 지터 백오프 후 다시 요청합니다.
+    헤지 요청과 재시도는 모두 max_attempts와 재시도 예산 안에서만 수행합니다.
+
+    Args:
+        upstream: 업스트림 이름 (재시도 예산 / 지표)
+        fn: 1회 요청 코루틴 함수
+        max_attempts: 최대 시도 횟수 (헤지 요청 포함)
+        hedge_delay: 헤지 요청 시점 (초, None이면 헤지하지 않음)
+        tracker: 성공한 요청의 지연 시간을 기록할 LatencyTracker
+        key: LatencyTracker 키
+
+    Returns:
+        먼저 성공한 요청의 결과
+    """
+    budget = get_retry_budget(upstream)
+    budget.deposit()
+    attempts = 0
+    hedged = False
+    started: Dict[asyncio.Task, float] = {}
+    pending = set()
+
+    def launch():
+        nonlocal attempts
+        attempts += 1
+        task = asyncio.ensure_future(fn())
+        started[task] = time.monotonic()
+        pending.add(task)
+
+    try:
+        launch()
+        while True:
+            wait_for_hedge = hedge_delay is not None and not hedged and attempts < max_attempts
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=hedge_delay if wait_for_hedge else None,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+
+            if not done:
+                # 헤지 시점까지 응답이 없으면 (예산이 있을 때) 두 번째 요청
+                hedged = True
+                if budget.try_spend():
+                    metrics.observe_upstream_retry(upstream, "hedge")
+                    tracing.info(f"{upstream} 헤지 요청 ({hedge_delay:.2f}초 경과)")
+                    launch()
+                continue
+
+            error: Optional[BaseException] = None
+            for task in done:
+                pending.discard(task)
+                if task.exception() is None:
+                    if tracker is not None:
+                        tracker.observe(key, time.monotonic() - started[task])
+                    tracing.set_attribute("attempts", attempts)
+                    tracing.set_attribute("hedged", hedged)
+                    return task.result()
+                error = task.exception()
+
+            if pending:
+                # 다른 요청이 아직 진행 중이면 그 결과를 기다림
+                continue
+
+            delay = _next_retry(upstream, attempts, max_attempts, error)
+            if delay is None:
+                raise error
+            await asyncio.sleep(delay)
+            launch()
+    finally:
+        for task in pending:
+            task.cancel()
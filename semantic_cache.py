@@ -0,0 +1,271 @@
+"""
+Semantic Cache - 표현만 다른 같은 질문에 이전 응답(AgentResponse)을 재사용하는 의미 기반 응답 캐시
+
+쿼리를 정규화(별칭 → 정규 이름, 동의어 통일, 요청 어미 / 시간 부사 / 조사 제거)한 뒤 해시 n-gram 벡터로 임베딩하고,
+저장된 응답 벡터 행렬과 한 번의 행렬 곱으로 가장 유사한 항목을 찾습니다.
+유사도가 임계값 이상이면서 정규화된 내용어 집합과 요청 컨텍스트가 같고, 액션 타입별 신선도 안에 있는
+응답만 재사용하므로 "비트코인 가격"과 "BTC 지금 얼마?"는 같은 응답을 받지만
+"이더리움 가격", "비트코인 가격 전망", "how to uninstall docker"처럼 내용어가 하나라도 다른 질문은 다른 응답을 받습니다.
+"""
+import hashlib
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import metrics
+from cache import make_key
+from config import Config
+from models import AgentResponse
+from realtime_api_handler import RealtimeAPIHandler
+from text_utils import tokenize
+from vector_db_handler import embed_text
+
+# 주제어 정규 이름 -> 동의어 (엔티티 별칭과 같은 방식으로 비교)
+TERM_SYNONYMS = {
+    "price": ["price", "가격", "시세", "얼마", "주가"],
+    "weather": ["weather", "날씨", "기온"],
+    "time": ["time", "시간", "몇시"],
+    "news": ["news", "뉴스", "소식", "기사"],
+}
+
+# 의미에 영향이 없는 요청 표현 / 시간 부사 (한글은 접두어로 비교)
+FILLER_PREFIXES = ("알려", "궁금", "말해", "보여", "가르쳐", "찾아")
+FILLER_WORDS = {
+    "지금", "현재", "요즘", "오늘", "좀", "혹시", "어때", "뭐야", "주세요", "해줘", "줘",
+    "now", "current", "currently", "please", "tell", "me", "what", "is", "it", "the",
+}
+
+# 내용어 끝에 붙는 조사 / 요청 어미 (긴 것부터 제거, 같은 규칙을 양쪽 쿼리에 적용하므로 비교용 어간)
+KOREAN_SUFFIXES = tuple(sorted(
+    ["해주세요", "해줘요", "해줘", "해요", "하는", "하기", "에서", "으로", "에게", "이란", "란",
+     "의", "를", "을", "은", "는", "이", "가", "에", "로", "와", "과", "도", "만", "요"],
+    key=len,
+    reverse=True
+))
+
+SIMILARITY_BINS = np.linspace(0.0, 1.0, 11)
+
+
+def _build_aliases() -> List[Tuple[str, str]]:
+    """(별칭, 정규 이름) 목록 - 긴 별칭부터 비교"""
+    groups: Dict[str, List[str]] = {}
+    for aliases in (
+        RealtimeAPIHandler.CRYPTO_ALIASES,
+        RealtimeAPIHandler.STOCK_ALIASES,
+        RealtimeAPIHandler.LOCATION_ALIASES,
+        TERM_SYNONYMS,
+    ):
+        for canonical, names in aliases.items():
+            groups.setdefault(canonical.lower(), []).extend(names)
+    pairs = [(name.lower(), canonical) for canonical, names in groups.items() for name in names]
+    return sorted(pairs, key=lambda pair: len(pair[0]), reverse=True)
+
+
+ALIASES = _build_aliases()
+
+
+def _canonical(token: str) -> Optional[str]:
+    """토큰의 정규 이름 (영문 별칭은 단어 일치, 한글 별칭은 조사가 붙을 수 있어 접두어 일치)"""
+    for alias, canonical in ALIASES:
+        if token == alias or (not alias.isascii() and token.startswith(alias)):
+            return canonical
+    return None
+
+
+def _stem(token: str) -> str:
+    """한글 토큰 끝의 조사 / 요청 어미 제거 (한 글자는 남김)"""
+    if token.isascii():
+        return token
+    for suffix in KOREAN_SUFFIXES:
+        if token.endswith(suffix) and len(token) > len(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def normalize_query(query: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    쿼리 정규화
+
+    Args:
+        query: 사용자 쿼리
+
+    Returns:
+        (정규화된 쿼리, 내용어 - 요청 표현을 제외한 정규 이름 / 어간, 중복 제거 후 정렬)
+    """
+    words = []
+    for token in tokenize(query):
+        canonical = _canonical(token)
+        if canonical is not None:
+            words.append(canonical)
+            continue
+        if token in FILLER_WORDS or token.startswith(FILLER_PREFIXES):
+            continue
+        stem = _stem(token)
+        if stem in FILLER_WORDS or stem.startswith(FILLER_PREFIXES):
+            continue
+        words.append(stem)
+    return " ".join(words), tuple(sorted(set(words)))
+
+
+def _signature(content_words: Tuple[str, ...], context: Optional[Dict[str, Any]]) -> int:
+    """내용어 집합 + 컨텍스트 지문 (같은 지문끼리만 비교)"""
+    digest = hashlib.blake2b(make_key(content_words, context).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class SemanticCache:
+    """정규화된 쿼리 임베딩의 최근접 이웃으로 이전 응답을 찾는 응답 캐시"""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        threshold: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        dim: Optional[int] = None,
+        ttls: Optional[Dict[str, float]] = None
+    ):
+        self.enabled = enabled if enabled is not None else Config.SEMANTIC_CACHE_ENABLED
+        self.threshold = threshold if threshold is not None else Config.SEMANTIC_CACHE_THRESHOLD
+        self.max_entries = max_entries if max_entries is not None else Config.SEMANTIC_CACHE_MAX_ENTRIES
+        self.dim = dim if dim is not None else Config.SEMANTIC_CACHE_DIM
+        self.ttls = ttls if ttls is not None else Config.SEMANTIC_CACHE_TTL
+
+        # 슬롯별 벡터 / 지문 / 만료 시각 (비어 있으면 0) / 응답
+        capacity = max(self.max_entries, 0)
+        self._vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        self._signatures = np.zeros(capacity, dtype=np.int64)
+        self._expire_at = np.zeros(capacity, dtype=np.float64)
+        self._responses: List[Optional[AgentResponse]] = [None] * capacity
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stores = 0
+        # 후보가 있었던 조회의 최고 유사도 분포 (임계값 조정용)
+        self._similarity_counts = np.zeros(len(SIMILARITY_BINS) - 1, dtype=np.int64)
+        self._hit_similarity_sum = 0.0
+
+    def lookup(self, query: str, context: Optional[Dict[str, Any]] = None) -> Optional[Tuple[AgentResponse, float]]:
+        """
+        가장 유사한 이전 응답 조회
+
+        Args:
+            query: 사용자 쿼리
+            context: 요청 컨텍스트 (같은 컨텍스트의 응답만 사용)
+
+        Returns:
+            (저장된 응답 복사본, 유사도) 또는 None
+        """
+        if not self.enabled or not self.max_entries:
+            return None
+
+        normalized, content_words = normalize_query(query)
+        vector = embed_text(normalized, self.dim)
+        signature = _signature(content_words, context)
+        now = time.monotonic()
+
+        with self._lock:
+            candidates = np.flatnonzero((self._expire_at > 0) & (self._signatures == signature))
+            best = None
+            similarity = 0.0
+            result = "miss"
+            if len(candidates):
+                scores = self._vectors[candidates] @ vector
+                fresh = self._expire_at[candidates] > now
+                if fresh.any():
+                    index = int(np.argmax(np.where(fresh, scores, -np.inf)))
+                    similarity = float(scores[index])
+                    if similarity >= self.threshold:
+                        best = self._responses[candidates[index]]
+                        result = "hit"
+                if best is None and (scores[~fresh] >= self.threshold).any():
+                    # 같은 질문의 응답이 있었지만 신선도 초과
+                    result = "expired"
+                    similarity = max(similarity, float(scores[~fresh].max()))
+                self._similarity_counts[min(int(similarity * 10), 9) if similarity > 0 else 0] += 1
+
+            if result == "hit":
+                self.hits += 1
+                self._hit_similarity_sum += similarity
+            else:
+                self.misses += 1
+                if result == "expired":
+                    self.expired += 1
+
+        metrics.observe_semantic_cache(result, similarity if len(candidates) else None)
+        if best is None:
+            return None
+        return best.model_copy(deep=True), similarity
+
+    def store(self, query: str, context: Optional[Dict[str, Any]], response: AgentResponse):
+        """
+        응답 저장 (액션 타입별 신선도가 0이면 저장하지 않음, 만료가 가장 빠른 슬롯부터 교체)
+
+        Args:
+            query: 사용자 쿼리
+            context: 요청 컨텍스트
+            response: 저장할 응답
+        """
+        if not self.enabled or not self.max_entries:
+            return
+
+        action_type = getattr(response.action_taken, "value", response.action_taken)
+        ttl = self.ttls.get(action_type, 0)
+        if ttl <= 0:
+            return
+
+        normalized, content_words = normalize_query(query)
+        vector = embed_text(normalized, self.dim)
+        signature = _signature(content_words, context)
+        now = time.monotonic()
+
+        with self._lock:
+            # 같은 질문이 이미 있으면 그 슬롯을 갱신
+            same = np.flatnonzero((self._expire_at > 0) & (self._signatures == signature))
+            slot = None
+            if len(same):
+                scores = self._vectors[same] @ vector
+                if scores.max() >= 0.99:
+                    slot = int(same[int(np.argmax(scores))])
+            if slot is None:
+                slot = int(np.argmin(self._expire_at))
+
+            self._vectors[slot] = vector
+            self._signatures[slot] = signature
+            self._expire_at[slot] = now + ttl
+            self._responses[slot] = response.model_copy(deep=True)
+            self.stores += 1
+
+    def clear(self):
+        """모든 항목 제거"""
+        with self._lock:
+            self._expire_at[:] = 0
+            self._responses = [None] * len(self._responses)
+
+    def stats(self) -> Dict[str, Any]:
+        """적중률 및 유사도 분포 통계"""
+        now = time.monotonic()
+        with self._lock:
+            entries = int((self._expire_at > now).sum())
+            histogram = {
+                f"{low:.1f}-{high:.1f}": int(count)
+                for low, high, count in zip(SIMILARITY_BINS[:-1], SIMILARITY_BINS[1:], self._similarity_counts)
+            }
+            total = self.hits + self.misses
+            return {
+                "name": "semantic",
+                "enabled": self.enabled,
+                "entries": entries,
+                "bytes": int(self._vectors.nbytes),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "stores": self.stores,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "threshold": self.threshold,
+                "mean_hit_similarity": round(self._hit_similarity_sum / self.hits, 4) if self.hits else 0.0,
+                "similarity_histogram": histogram,
+            }
@@ -0,0 +1,93 @@
+"""
+답변 컨텍스트 구성 테스트 - 결과 크기와 관계없이 토큰 예산 이내로 유지
+"""
+import pytest
+
+from context_builder import ContextBuilder
+from models import SearchResult
+from text_utils import estimate_tokens
+
+
+def result(content: str, relevance_score: float, source: str = "web_search", raw_content: str = "") -> SearchResult:
+    metadata = {"url": f"https://example.com/{relevance_score}"}
+    if raw_content:
+        metadata["raw_content"] = raw_content
+    return SearchResult(source=source, content=content, relevance_score=relevance_score, metadata=metadata)
+
+
+def long_results():
+    """한글 / 영문이 섞인 긴 결과들 (원문 포함 수천 토큰)"""
+    return [
+        result(
+            f"결과 {i} 요약: 파이썬 비동기 프로그래밍 설명 " * 20,
+            score,
+            raw_content=f"Full article {i} about asyncio event loops and 코루틴 스케줄링. " * 80
+        )
+        for i, score in enumerate([0.95, 0.9, 0.7, 0.4, 0.2, 0.1, 0.05])
+    ]
+
+
+@pytest.mark.parametrize("max_tokens", [150, 400, 1000, 2000])
+def test_context_stays_within_token_budget(max_tokens):
+    """긴 결과가 많아도 컨텍스트 토큰 수는 예산 이하"""
+    builder = ContextBuilder(max_tokens=max_tokens, max_results=5, min_result_tokens=60, use_raw_content=True)
+    context = builder.build(long_results())
+
+    assert context.tokens == estimate_tokens(context.text)
+    assert 0 < context.tokens <= max_tokens
+    assert context.truncated > 0
+
+
+def test_most_relevant_results_are_kept():
+    """예산이 부족하면 관련도 낮은 결과부터 제외"""
+    builder = ContextBuilder(max_tokens=300, max_results=5, min_result_tokens=60, use_raw_content=True)
+    context = builder.build(long_results())
+
+    scores = [source.relevance_score for source in context.sources]
+    assert scores == sorted(scores, reverse=True)
+    assert scores[0] == 0.95
+    assert context.dropped == 7 - len(context.sources)
+    assert context.text.startswith("출처 1 (web_search): 결과 0 요약")
+
+
+def test_short_results_fit_without_truncation():
+    """예산 안에 들어가는 결과는 자르지 않고 원문까지 포함"""
+    builder = ContextBuilder(max_tokens=2000, max_results=5, min_result_tokens=60, use_raw_content=True)
+    results = [
+        result("비트코인 가격은 1억 원입니다.", 0.9, raw_content="원문: 비트코인 거래소 시세"),
+        result("이더리움 가격은 500만 원입니다.", 0.8),
+    ]
+
+    context = builder.build(results)
+
+    assert context.truncated == 0
+    assert context.dropped == 0
+    assert "원문: 비트코인 거래소 시세" in context.text
+    assert "이더리움 가격은 500만 원입니다." in context.text
+
+
+def test_error_results_are_dropped_when_valid_results_exist():
+    """유효한 결과가 있으면 오류 결과는 컨텍스트에서 제외"""
+    builder = ContextBuilder(max_tokens=2000, max_results=5, min_result_tokens=60, use_raw_content=False)
+    results = [result("Tavily 요청 실패", 0.0, source="web_search_error"), result("정상 결과", 0.8)]
+
+    context = builder.build(results)
+
+    assert context.has_valid_results and context.has_errors
+    assert [source.content for source in context.sources] == ["정상 결과"]
+
+
+def test_only_error_results_are_kept_as_context():
+    """오류 결과만 있으면 오류 내용을 컨텍스트로 사용"""
+    builder = ContextBuilder(max_tokens=2000, max_results=5, min_result_tokens=60, use_raw_content=False)
+    context = builder.build([result("Tavily 요청 실패", 0.0, source="web_search_error")])
+
+    assert not context.has_valid_results
+    assert context.text == "⚠️ web_search_error: Tavily 요청 실패"
+
+
+def test_empty_results_build_empty_context():
+    """검색 결과가 없으면 빈 컨텍스트"""
+    context = ContextBuilder(max_tokens=2000, max_results=5, min_result_tokens=60, use_raw_content=True).build([])
+    assert context.empty
+    assert context.tokens == 0
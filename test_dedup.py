@@ -0,0 +1,86 @@
+"""
+유사 중복 결과 병합 테스트 - 전재 기사는 하나로 합치고 다른 페이지는 그대로 유지
+"""
+from dedup import ResultDeduplicator, hamming_distance, simhash
+from models import SearchResult
+
+ARTICLE = (
+    "한국은행 금융통화위원회는 17일 기준금리를 연 3.50%로 동결했다. "
+    "물가 상승률이 둔화되고 있지만 가계부채 증가세와 환율 변동성을 고려해 "
+    "당분간 긴축 기조를 유지하기로 했다고 밝혔다. 시장에서는 연내 인하 가능성을 주목하고 있다."
+)
+# 같은 기사를 다른 매체가 전재 (끝부분 문구만 다름)
+SYNDICATED = ARTICLE.replace("주목하고 있다.", "주목하는 분위기다.")
+OTHER_PAGE = (
+    "파이썬 3.13 버전에서는 실험적인 JIT 컴파일러와 GIL 없는 빌드가 추가되었다. "
+    "새 대화형 인터프리터는 여러 줄 편집과 색상 출력을 지원하며, "
+    "오류 메시지도 더 자세해졌다. 설치는 공식 홈페이지에서 내려받으면 된다."
+)
+
+
+def result(content: str, relevance_score: float, url: str, source: str = "web_search") -> SearchResult:
+    return SearchResult(
+        source=source,
+        content=content,
+        relevance_score=relevance_score,
+        metadata={"url": url, "title": url.rsplit("/", 1)[-1]}
+    )
+
+
+def make_deduplicator(**kwargs) -> ResultDeduplicator:
+    options = {"enabled": True, "max_distance": 8, "shingle_size": 3, "min_chars": 80}
+    options.update(kwargs)
+    return ResultDeduplicator(**options)
+
+
+def test_simhash_distance_separates_near_duplicates_from_different_pages():
+    """전재 기사는 해밍 거리가 작고, 다른 페이지는 큼"""
+    article = simhash(ARTICLE)
+    assert hamming_distance(article, simhash(ARTICLE)) == 0
+    assert hamming_distance(article, simhash(SYNDICATED)) <= 8
+    assert hamming_distance(article, simhash(OTHER_PAGE)) > 8
+
+
+def test_near_duplicates_merge_into_most_relevant_result():
+    """유사 중복 결과는 관련도가 가장 높은 결과 하나로 병합하고 출처는 alternate_sources에 기록"""
+    results = [
+        result(SYNDICATED, 0.7, "https://news.example.com/b"),
+        result(OTHER_PAGE, 0.8, "https://docs.example.com/python"),
+        result(ARTICLE, 0.9, "https://news.example.com/a"),
+    ]
+
+    collapsed = make_deduplicator().collapse(results)
+
+    assert [r.metadata["url"] for r in collapsed] == ["https://docs.example.com/python", "https://news.example.com/a"]
+    assert collapsed[1].metadata["alternate_sources"] == [
+        {"source": "web_search", "url": "https://news.example.com/b", "title": "b"}
+    ]
+    assert "alternate_sources" not in results[2].metadata
+
+
+def test_different_pages_stay_separate():
+    """내용이 다른 페이지는 병합하지 않음"""
+    results = [
+        result(ARTICLE, 0.9, "https://news.example.com/a"),
+        result(OTHER_PAGE, 0.8, "https://docs.example.com/python"),
+    ]
+
+    assert make_deduplicator().collapse(results) == results
+
+
+def test_short_and_error_results_are_kept():
+    """너무 짧은 결과와 오류 결과는 내용이 같아도 그대로 유지"""
+    results = [
+        result("검색 결과 없음", 0.5, "https://example.com/1"),
+        result("검색 결과 없음", 0.4, "https://example.com/2"),
+        result(ARTICLE, 0.3, "https://example.com/3", source="web_search_error"),
+        result(ARTICLE, 0.2, "https://example.com/4", source="web_search_error"),
+    ]
+
+    assert make_deduplicator().collapse(results) == results
+
+
+def test_disabled_deduplicator_returns_input():
+    """비활성화 시 입력 그대로"""
+    results = [result(ARTICLE, 0.9, "https://a.example.com"), result(ARTICLE, 0.8, "https://b.example.com")]
+    assert make_deduplicator(enabled=False).collapse(results) is results
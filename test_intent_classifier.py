@@ -0,0 +1,93 @@
+"""
+로컬 액션 분류기 테스트 - 기본 예시로 학습한 모델의 신뢰도 보정 확인
+"""
+import pytest
+
+from config import Config
+from intent_classifier import SEED_EXAMPLES, IntentClassifier
+from models import ActionType
+
+# 기본 예시에 없는 라벨된 쿼리 (신뢰도 보정 검증용)
+LABELED_SAMPLE = [
+    ("지금 서울 몇 시야", ActionType.REALTIME_API),
+    ("이더리움 가격 알려줘", ActionType.REALTIME_API),
+    ("도지코인 시세", ActionType.REALTIME_API),
+    ("부산 날씨 알려줘", ActionType.REALTIME_API),
+    ("테슬라 주가 얼마야", ActionType.REALTIME_API),
+    ("ethereum price", ActionType.REALTIME_API),
+    ("weather in busan", ActionType.REALTIME_API),
+    ("삼성전자 주가", ActionType.REALTIME_API),
+    ("BTC 시세 알려줘", ActionType.REALTIME_API),
+    ("현재 시각", ActionType.REALTIME_API),
+    ("도커 설치 방법", ActionType.WEB_SEARCH),
+    ("파이썬 리스트 정렬 방법", ActionType.WEB_SEARCH),
+    ("세종대왕 업적", ActionType.WEB_SEARCH),
+    ("된장찌개 레시피", ActionType.WEB_SEARCH),
+    ("쿠버네티스란 무엇인가", ActionType.WEB_SEARCH),
+    ("how to learn rust", ActionType.WEB_SEARCH),
+    ("what is a transformer model", ActionType.WEB_SEARCH),
+    ("자바와 코틀린 차이", ActionType.WEB_SEARCH),
+    ("제주도 여행 코스 추천", ActionType.WEB_SEARCH),
+    ("딥러닝 논문 추천", ActionType.WEB_SEARCH),
+    ("오늘 뉴스", ActionType.WEB_SEARCH),
+    ("history of korea", ActionType.WEB_SEARCH),
+    ("비트코인 가격과 최근 뉴스", ActionType.HYBRID),
+    ("애플 주가와 실적 전망", ActionType.HYBRID),
+    ("서울 날씨와 주말 행사 추천", ActionType.HYBRID),
+    ("이더리움 시세와 상승 이유", ActionType.HYBRID),
+    ("tesla stock price and recent news", ActionType.HYBRID),
+    ("현재 환율과 관련 기사", ActionType.HYBRID),
+    ("오늘 삼성전자 주가와 관련 뉴스", ActionType.HYBRID),
+    ("bitcoin price and market analysis", ActionType.HYBRID),
+]
+
+
+@pytest.fixture(scope="module")
+def seed_model():
+    """저장된 모델 / 분류 로그 없이 기본 예시로만 학습한 모델 (배포 기본값)"""
+    return IntentClassifier.load_or_train(None, None)
+
+
+def test_seed_model_is_calibrated(seed_model):
+    """교차 검증으로 온도를 보정해 학습 예시에 대한 과신을 줄임"""
+    assert seed_model.temperature > 1.0
+
+
+def test_confident_predictions_meet_threshold(seed_model):
+    """임계값 이상 신뢰도로 예측한 쿼리의 정확도가 임계값 이상"""
+    threshold = Config.INTENT_CLASSIFIER_THRESHOLD
+    confident = []
+    for text, label in LABELED_SAMPLE:
+        action_type, confidence = seed_model.predict(text)
+        if confidence >= threshold:
+            confident.append(action_type == label)
+
+    if confident:
+        assert sum(confident) / len(confident) >= threshold
+
+
+def test_ambiguous_queries_fall_back_to_gemini(seed_model):
+    """기본 예시로 판단하기 어려운 쿼리는 임계값 미만 (Gemini 분류 사용)"""
+    for text in ["오늘 뉴스", "오늘 삼성전자 주가와 관련 뉴스"]:
+        _, confidence = seed_model.predict(text)
+        assert confidence < Config.INTENT_CLASSIFIER_THRESHOLD
+
+
+def test_calibration_keeps_predictions(seed_model):
+    """온도 보정은 신뢰도만 바꾸고 예측 액션은 그대로"""
+    uncalibrated = IntentClassifier(
+        dim=seed_model.dim,
+        weights=seed_model.weights,
+        bias=seed_model.bias
+    )
+    for text, _ in SEED_EXAMPLES + LABELED_SAMPLE:
+        assert seed_model.predict(text)[0] == uncalibrated.predict(text)[0]
+
+
+def test_save_and_load_keeps_temperature(seed_model, tmp_path):
+    """저장한 모델을 다시 로드해도 보정 온도 유지"""
+    path = str(tmp_path / "intent_model.npz")
+    seed_model.save(path)
+    loaded = IntentClassifier.load(path)
+    assert loaded.temperature == pytest.approx(seed_model.temperature)
+    assert loaded.predict("비트코인 가격 알려줘") == seed_model.predict("비트코인 가격 알려줘")
@@ -0,0 +1,159 @@
+"""
+로컬 지식 베이스 라우팅 테스트 - 같은 질문만 로컬 문서로 답하고, 답할 수 없으면 웹 검색으로 다시 답변
+"""
+import asyncio
+
+import pytest
+
+from ai_agent import AIAgent
+from config import Config
+from models import ActionDecision, ActionType, EnhancedQuery, QueryRequest, SearchResult
+
+INSTALL_QUERY = "파이썬 설치 방법 파이썬 설치 다운로드"
+INSTALL_DOCS = [
+    ("파이썬 설치 가이드", "파이썬 공식 홈페이지에서 설치 파일을 다운로드하여 실행합니다. 설치 시 PATH 추가 옵션을 선택하세요."),
+    ("윈도우에 파이썬 설치하기", "Windows에서 Python 3.12를 설치하는 방법을 단계별로 설명합니다."),
+    ("맥에서 파이썬 설치", "Homebrew로 brew install python 명령을 실행해 파이썬을 설치할 수 있습니다."),
+    ("리눅스 파이썬 설치", "Ubuntu에서는 apt install python3 명령으로 파이썬을 설치합니다."),
+]
+
+
+def enhanced(query: str) -> EnhancedQuery:
+    return EnhancedQuery(original_query=query, enhanced_query=query, keywords=[], intent="정보 검색", complexity_score=0.5)
+
+
+def web_decision() -> ActionDecision:
+    return ActionDecision(action_type=ActionType.WEB_SEARCH, confidence=0.9, reasoning="웹 검색", parameters={})
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    """API 키 / 디스크 저장 없이 로컬 지식 베이스를 사용하는 에이전트 (설치 문서 4건 저장)"""
+    for name, value in {
+        "GEMINI_API_KEY": "test",
+        "TAVILY_API_KEY": "test",
+        "VECTOR_DB_ENABLED": True,
+        "VECTOR_DB_PATH": "",
+        "LOCAL_KB_ENABLED": True,
+        "SEMANTIC_CACHE_ENABLED": False,
+        "INTENT_LOG_PATH": "",
+        "TRACE_EXPORT_PATH": "",
+    }.items():
+        monkeypatch.setattr(Config, name, value)
+
+    agent = AIAgent()
+    agent.vector_db_handler.add(INSTALL_QUERY, [
+        SearchResult(
+            source="web_search",
+            content=content,
+            relevance_score=0.9,
+            metadata={"url": f"https://example.com/python/{i}", "title": title}
+        )
+        for i, (title, content) in enumerate(INSTALL_DOCS)
+    ])
+    agent.vector_db_handler.wait()
+    yield agent
+    agent.close()
+
+
+@pytest.mark.parametrize("query", ["파이썬 설치 방법", "파이썬 설치하는 방법 알려줘 파이썬 설치"])
+def test_same_question_routes_to_local_kb(agent, query):
+    """같은 질문의 다른 표현은 로컬 지식 베이스로 답변"""
+    decision = agent._route_local_kb(enhanced(query), web_decision())
+    assert ActionType(decision.action_type) == ActionType.LOCAL_KB
+    assert decision.parameters["local_query_score"] >= Config.LOCAL_KB_MIN_QUERY_SCORE
+
+
+@pytest.mark.parametrize("query", [
+    "파이썬 삭제 방법 파이썬 삭제 제거",
+    "자바 설치 방법 자바 설치",
+    "파이썬 설치 오류 해결 파이썬 오류",
+])
+def test_same_topic_question_stays_on_web_search(agent, query):
+    """주제만 같은 다른 질문은 유사 문서가 있어도 웹 검색 유지"""
+    decision = agent._route_local_kb(enhanced(query), web_decision())
+    assert ActionType(decision.action_type) == ActionType.WEB_SEARCH
+
+
+def test_local_kb_answer_skips_web_search(agent, monkeypatch):
+    """로컬 문서로 답할 수 있으면 Tavily를 호출하지 않음"""
+    web_calls = []
+    monkeypatch.setattr(agent, "_plan", lambda request: (enhanced(request.query), web_decision()))
+    monkeypatch.setattr(agent.web_search_handler, "search", lambda *args, **kwargs: web_calls.append(args) or [])
+    monkeypatch.setattr(agent.gemini_client, "generate_answer", lambda prompt, stage="answer": "공식 홈페이지에서 설치합니다.")
+
+    response = agent.process_query(QueryRequest(query="파이썬 설치 방법"))
+
+    assert response.action_taken == ActionType.LOCAL_KB
+    assert response.final_answer == "공식 홈페이지에서 설치합니다."
+    assert not web_calls
+
+
+def test_insufficient_local_kb_answer_falls_back_to_web(agent, monkeypatch):
+    """답변 단계에서 로컬 문서가 부족하다고 판단하면 웹 검색 결과로 다시 답변"""
+    web_result = SearchResult(
+        source="web_search",
+        content="Python 3.13 설치 시 새 인터프리터 옵션을 선택할 수 있습니다.",
+        relevance_score=0.9,
+        metadata={"url": "https://example.com/python-313", "title": "Python 3.13 설치"}
+    )
+    prompts = []
+
+    def generate_answer(prompt, stage="answer"):
+        prompts.append(prompt)
+        return AIAgent.LOCAL_KB_INSUFFICIENT if AIAgent.LOCAL_KB_INSUFFICIENT in prompt else "웹 검색 결과로 답변합니다."
+
+    monkeypatch.setattr(agent, "_plan", lambda request: (enhanced(request.query), web_decision()))
+    monkeypatch.setattr(agent.web_search_handler, "search", lambda *args, **kwargs: [web_result])
+    monkeypatch.setattr(agent.gemini_client, "generate_answer", generate_answer)
+
+    response = agent.process_query(QueryRequest(query="파이썬 설치 방법"))
+
+    assert len(prompts) == 2
+    assert response.action_taken == ActionType.WEB_SEARCH
+    assert response.final_answer == "웹 검색 결과로 답변합니다."
+    assert [result.source for result in response.results] == ["web_search"]
+    assert "local_kb_fallback" in response.stage_timings
+
+
+def test_insufficient_local_kb_stream_falls_back_to_web(agent, monkeypatch):
+    """스트리밍에서도 부족 표시는 전달하지 않고 웹 검색 결과로 다시 답변"""
+    web_result = SearchResult(
+        source="web_search",
+        content="Python 3.13 설치 시 새 인터프리터 옵션을 선택할 수 있습니다.",
+        relevance_score=0.9,
+        metadata={"url": "https://example.com/python-313", "title": "Python 3.13 설치"}
+    )
+
+    async def aplan(request):
+        return enhanced(request.query), web_decision()
+
+    async def asearch(*args, **kwargs):
+        return [web_result]
+
+    async def astream_answer(prompt, stage="answer"):
+        if AIAgent.LOCAL_KB_INSUFFICIENT in prompt:
+            # 표시가 여러 조각으로 나뉘어 도착하는 경우
+            for chunk in ["NEED_", "WEB_", "SEARCH"]:
+                yield chunk
+            return
+        for chunk in ["웹 검색 ", "결과로 답변합니다."]:
+            yield chunk
+
+    monkeypatch.setattr(agent, "_aplan", aplan)
+    monkeypatch.setattr(Config, "SPECULATIVE_WEB_SEARCH", False)
+    monkeypatch.setattr(agent.web_search_handler, "asearch", asearch)
+    monkeypatch.setattr(agent.gemini_client, "astream_answer", astream_answer)
+
+    async def collect():
+        return [event async for event in agent.astream_query(QueryRequest(query="파이썬 설치 방법"))]
+
+    events = asyncio.run(collect())
+    actions = [event["data"]["action_type"] for event in events if event["event"] == "action"]
+    deltas = "".join(event["data"]["text"] for event in events if event["event"] == "answer_delta")
+    done = events[-1]["data"]
+
+    assert actions == ["local_kb", "web_search"]
+    assert deltas == "웹 검색 결과로 답변합니다."
+    assert done["action_taken"] == "web_search"
+    assert done["final_answer"] == "웹 검색 결과로 답변합니다."
@@ -0,0 +1,89 @@
+"""
+검색 결과 재정렬 테스트 - BM25 점수로 실제 관련 있는 결과를 상위로
+"""
+from collections import Counter
+
+import pytest
+
+from models import SearchResult
+from reranker import ResultReranker, bigram_counts, bm25_scores
+
+
+def result(content: str, relevance_score: float, source: str = "web_search") -> SearchResult:
+    return SearchResult(source=source, content=content, relevance_score=relevance_score, metadata={})
+
+
+def test_bigram_counts_splits_words_into_character_bigrams():
+    """조사가 붙어도 같은 bigram을 공유하도록 단어를 문자 bigram으로 분해"""
+    assert bigram_counts("파이썬을") == Counter({"파이": 1, "이썬": 1, "썬을": 1})
+    assert set(bigram_counts("파이썬")) <= set(bigram_counts("파이썬을"))
+
+
+def test_bm25_prefers_documents_with_more_query_terms():
+    """쿼리 용어가 많이 나오는 문서일수록 높은 점수, 관련 없는 문서는 0점"""
+    documents = [Counter({"a": 1, "x": 3}), Counter({"a": 2, "b": 1, "x": 1}), Counter({"y": 4})]
+    scores = bm25_scores({"a": 1.0, "b": 1.0}, documents)
+
+    assert scores[1] > scores[0] > scores[2]
+    assert scores[2] == 0
+
+
+def test_bm25_rare_terms_weigh_more():
+    """여러 문서에 흔한 용어보다 드문 용어가 더 높은 점수 (IDF)"""
+    documents = [Counter({"common": 1, "z": 1}), Counter({"common": 1, "z": 1}), Counter({"rare": 1, "z": 1})]
+    scores = bm25_scores({"common": 1.0, "rare": 1.0}, documents)
+
+    assert scores[2] > scores[0] == pytest.approx(scores[1])
+
+
+def test_bm25_empty_query_scores_zero():
+    """쿼리 용어가 없으면 모든 문서 0점"""
+    assert bm25_scores({}, [Counter({"a": 1})]).tolist() == [0.0]
+
+
+def test_rerank_moves_relevant_result_to_top():
+    """업스트림 관련도가 낮아도 쿼리와 맞는 결과를 상위로 올림"""
+    reranker = ResultReranker(enabled=True, weight=0.7, keyword_weight=1.0, sources=["web_search"])
+    results = [
+        result("자바스크립트 프레임워크 비교와 React 상태 관리 방법", 0.9),
+        result("오늘의 주요 뉴스와 날씨 정보", 0.8),
+        result("파이썬 설치 방법: 공식 홈페이지에서 파이썬 설치 파일을 다운로드합니다", 0.5),
+    ]
+
+    reranked = reranker.rerank("파이썬 설치 방법", ["파이썬", "설치"], results)
+
+    assert reranked[0].content.startswith("파이썬 설치 방법")
+    assert reranked[0].metadata["upstream_score"] == 0.5
+    assert reranked[0].metadata["rerank_score"] == 1.0
+    assert [r.relevance_score for r in reranked] == sorted((r.relevance_score for r in reranked), reverse=True)
+
+
+def test_rerank_uses_raw_content():
+    """본문 요약에 없고 원문(raw_content)에만 있는 용어도 점수에 반영"""
+    reranker = ResultReranker(enabled=True, weight=1.0, keyword_weight=1.0, sources=["web_search"])
+    with_raw = result("설치 안내", 0.5)
+    with_raw.metadata["raw_content"] = "도커 설치 명령어와 도커 컴포즈 사용법"
+    results = [result("설치 안내", 0.5), with_raw]
+
+    reranked = reranker.rerank("도커 설치", [], results)
+
+    assert reranked[0].metadata.get("raw_content")
+
+
+def test_rerank_keeps_other_sources_scores():
+    """대상이 아닌 소스는 점수를 바꾸지 않고 함께 정렬"""
+    reranker = ResultReranker(enabled=True, weight=0.7, keyword_weight=1.0, sources=["web_search"])
+    realtime = result("비트코인 가격: 1억 원", 0.95, source="realtime_api")
+    results = [result("관련 없는 내용", 0.9), realtime]
+
+    reranked = reranker.rerank("비트코인 가격", [], results)
+
+    assert reranked[0] is realtime
+    assert "rerank_score" not in reranked[0].metadata
+
+
+def test_disabled_reranker_returns_input():
+    """비활성화 시 입력 순서 그대로"""
+    reranker = ResultReranker(enabled=False, weight=0.7, keyword_weight=1.0, sources=["web_search"])
+    results = [result("b", 0.1), result("a", 0.9)]
+    assert reranker.rerank("a", [], results) is results
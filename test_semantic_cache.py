@@ -0,0 +1,213 @@
+"""
+의미 기반 응답 캐시 테스트 - 같은 질문의 다른 표현만 적중하고 의미가 다른 질문은 미스
+"""
+import asyncio
+import time
+
+import pytest
+
+from ai_agent import AIAgent
+from config import Config
+from models import ActionDecision, ActionType, AgentResponse, EnhancedQuery, QueryRequest, SearchResult
+from semantic_cache import SemanticCache, normalize_query
+
+PARAPHRASE_PAIRS = [
+    ("비트코인 가격", "BTC 지금 얼마?"),
+    ("비트코인 가격이 궁금해요", "비트코인 현재 시세 알려줘"),
+    ("ETH 가격", "이더리움 시세 알려주세요"),
+    ("서울 날씨 어때", "오늘 서울 날씨 알려줘"),
+    ("양자 컴퓨터의 원리를 설명해줘", "양자 컴퓨터 원리 설명해줘"),
+    ("Python FastAPI 튜토리얼을 찾아주세요", "Python FastAPI 튜토리얼 찾아줘"),
+]
+
+DIFFERENT_PAIRS = [
+    ("How to install docker", "How to uninstall docker"),
+    ("비트코인 가격", "비트코인 가격 전망"),
+    ("비트코인 가격", "이더리움 가격"),
+    ("파이썬 장점", "파이썬 단점"),
+    ("pros of rust", "cons of rust"),
+    ("양자 컴퓨터의 원리를 설명해줘", "양자 컴퓨터의 역사를 설명해줘"),
+]
+
+
+def response_for(query: str, action_type: ActionType = ActionType.WEB_SEARCH) -> AgentResponse:
+    return AgentResponse(
+        query=query,
+        enhanced_query=query,
+        action_taken=action_type,
+        results=[],
+        final_answer=f"{query}에 대한 답변",
+        confidence=0.9,
+        processing_time=1.0
+    )
+
+
+def make_cache(**kwargs) -> SemanticCache:
+    options = {
+        "enabled": True,
+        "threshold": 0.85,
+        "max_entries": 16,
+        "dim": 512,
+        "ttls": {"realtime_api": 60, "web_search": 600, "hybrid": 60, "local_kb": 600},
+    }
+    options.update(kwargs)
+    return SemanticCache(**options)
+
+
+@pytest.mark.parametrize("stored, asked", PARAPHRASE_PAIRS)
+def test_paraphrase_hits(stored, asked):
+    """표현만 다른 같은 질문은 저장된 응답을 재사용"""
+    cache = make_cache()
+    cache.store(stored, None, response_for(stored))
+
+    cached = cache.lookup(asked, None)
+
+    assert cached is not None
+    response, similarity = cached
+    assert response.final_answer == f"{stored}에 대한 답변"
+    assert similarity >= cache.threshold
+
+
+@pytest.mark.parametrize("stored, asked", DIFFERENT_PAIRS)
+def test_different_question_misses(stored, asked):
+    """내용어가 하나라도 다른 질문은 유사도가 높아도 미스"""
+    cache = make_cache()
+    cache.store(stored, None, response_for(stored))
+
+    assert cache.lookup(asked, None) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_content_words_ignore_fillers_and_particles():
+    """요청 표현 / 시간 부사 / 조사는 내용어에서 제외, 별칭은 정규 이름으로 통일"""
+    assert normalize_query("BTC 지금 얼마?")[1] == ("bitcoin", "price")
+    assert normalize_query("양자 컴퓨터의 원리를 설명해줘")[1] == normalize_query("양자 컴퓨터 원리 설명")[1]
+    assert normalize_query("how to install docker")[1] != normalize_query("how to uninstall docker")[1]
+
+
+def test_context_must_match():
+    """같은 질문이라도 요청 컨텍스트가 다르면 미스"""
+    cache = make_cache()
+    cache.store("비트코인 가격", {"currency": "usd"}, response_for("비트코인 가격"))
+
+    assert cache.lookup("BTC 지금 얼마?", {"currency": "krw"}) is None
+    assert cache.lookup("BTC 지금 얼마?", {"currency": "usd"}) is not None
+
+
+def test_threshold_applies_within_same_content_words():
+    """내용어가 같아도 유사도가 임계값 미만이면 미스"""
+    cache = make_cache(threshold=1.01)
+    cache.store("비트코인 가격", None, response_for("비트코인 가격"))
+
+    assert cache.lookup("BTC 지금 얼마?", None) is None
+
+
+def test_action_ttl_expires_realtime_answers():
+    """실시간 데이터 응답은 액션 타입별 신선도가 지나면 만료"""
+    cache = make_cache(ttls={"realtime_api": 0.05, "web_search": 600})
+    cache.store("비트코인 가격", None, response_for("비트코인 가격", ActionType.REALTIME_API))
+    assert cache.lookup("BTC 지금 얼마?", None) is not None
+
+    time.sleep(0.1)
+
+    assert cache.lookup("BTC 지금 얼마?", None) is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_zero_ttl_action_is_not_stored():
+    """신선도가 0인 액션 타입은 저장하지 않음"""
+    cache = make_cache(ttls={"web_search": 0})
+    cache.store("파이썬 설치 방법", None, response_for("파이썬 설치 방법"))
+
+    assert cache.stats()["stores"] == 0
+    assert cache.lookup("파이썬 설치 방법", None) is None
+
+
+def test_full_cache_replaces_earliest_expiring_entry():
+    """가득 차면 만료가 가장 빠른 항목부터 교체"""
+    cache = make_cache(max_entries=2, ttls={"realtime_api": 10, "web_search": 600})
+    cache.store("비트코인 가격", None, response_for("비트코인 가격", ActionType.REALTIME_API))
+    cache.store("파이썬 설치 방법", None, response_for("파이썬 설치 방법"))
+    cache.store("도커 설치 방법", None, response_for("도커 설치 방법"))
+
+    assert cache.lookup("비트코인 가격", None) is None
+    assert cache.lookup("파이썬 설치 방법", None) is not None
+    assert cache.lookup("도커 설치 방법", None) is not None
+
+
+def test_lookup_returns_copy():
+    """재사용한 응답을 수정해도 저장된 응답은 그대로"""
+    cache = make_cache()
+    cache.store("비트코인 가격", None, response_for("비트코인 가격"))
+
+    first, _ = cache.lookup("비트코인 가격", None)
+    first.final_answer = "수정됨"
+    second, _ = cache.lookup("비트코인 가격", None)
+
+    assert second.final_answer == "비트코인 가격에 대한 답변"
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    """API 키 / 디스크 저장 없이 의미 캐시만 사용하는 에이전트"""
+    for name, value in {
+        "GEMINI_API_KEY": "test",
+        "TAVILY_API_KEY": "test",
+        "VECTOR_DB_ENABLED": False,
+        "VECTOR_DB_PATH": "",
+        "SEMANTIC_CACHE_ENABLED": True,
+        "SPECULATIVE_WEB_SEARCH": False,
+        "INTENT_LOG_PATH": "",
+        "TRACE_EXPORT_PATH": "",
+    }.items():
+        monkeypatch.setattr(Config, name, value)
+
+    agent = AIAgent()
+    yield agent
+    agent.close()
+
+
+def test_stream_reuses_cached_answer(agent, monkeypatch):
+    """스트리밍도 저장 전에 캐시를 조회해 다른 표현의 같은 질문은 계획 / 검색 / 답변 호출 없이 전달"""
+    web_result = SearchResult(
+        source="web_search",
+        content="비트코인은 현재 1억 원 부근에서 거래되고 있습니다.",
+        relevance_score=0.9,
+        metadata={"url": "https://example.com/btc", "title": "비트코인 시세"}
+    )
+    plans = []
+
+    async def aplan(request):
+        plans.append(request.query)
+        enhanced_query = EnhancedQuery(
+            original_query=request.query, enhanced_query="비트코인 현재 가격",
+            keywords=["비트코인", "가격"], intent="정보 검색", complexity_score=0.3
+        )
+        return enhanced_query, ActionDecision(action_type=ActionType.WEB_SEARCH, confidence=0.9, reasoning="웹 검색", parameters={})
+
+    async def asearch(*args, **kwargs):
+        return [web_result]
+
+    async def astream_answer(prompt, stage="answer"):
+        for chunk in ["약 1억 원", "입니다."]:
+            yield chunk
+
+    monkeypatch.setattr(agent, "_aplan", aplan)
+    monkeypatch.setattr(agent.web_search_handler, "asearch", asearch)
+    monkeypatch.setattr(agent.gemini_client, "astream_answer", astream_answer)
+
+    async def collect(query):
+        return [event async for event in agent.astream_query(QueryRequest(query=query))]
+
+    asyncio.run(collect("비트코인 가격"))
+    second = asyncio.run(collect("BTC 지금 얼마?"))
+
+    assert plans == ["비트코인 가격"]
+    assert [event["event"] for event in second] == ["enhanced_query", "action", "search_result", "answer_delta", "done"]
+    assert second[1]["data"]["action_type"] == "web_search"
+    assert second[2]["data"]["content"] == web_result.content
+    assert second[3]["data"]["text"] == "약 1억 원입니다."
+    done = second[-1]["data"]
+    assert done["query"] == "BTC 지금 얼마?"
+    assert done["final_answer"] == "약 1억 원입니다."
+    assert done["cache_similarity"] is not None
@@ -0,0 +1,157 @@
+"""
+로컬 벡터 DB 테스트 - 역색인(IVF) 검색 재현율과 저장 / 재로드
+"""
+import numpy as np
+import pytest
+
+from models import SearchResult
+from vector_db_handler import IVFIndex, VectorDBHandler, embed_text
+
+DIM = 64
+
+
+def clustered_vectors(count: int, clusters: int = 40, noise: float = 1.0, seed: int = 0) -> np.ndarray:
+    """주제별로 모인 정규화 벡터 (같은 주제의 반복 문서 분포)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DIM))
+    vectors = centers[rng.integers(0, clusters, count)] + noise * rng.normal(size=(count, DIM))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def perturbed_queries(vectors: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.choice(len(vectors), size=count, replace=False)] + 0.1 * rng.normal(size=(count, DIM))
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+
+def web_result(title: str, content: str, url: str) -> SearchResult:
+    return SearchResult(
+        source="web_search",
+        content=content,
+        relevance_score=0.9,
+        metadata={"url": url, "title": title}
+    )
+
+
+def test_ivf_recall_matches_brute_force():
+    """역색인 검색 상위 10개가 전체 비교 결과와 거의 같음 (재현율 0.9 이상)"""
+    vectors = clustered_vectors(3000)
+    index = IVFIndex(None, DIM, nprobe=8, train_min=256)
+    for start in range(0, len(vectors), 500):
+        index.add(vectors[start:start + 500], created_at=1.0)
+    assert index.stats()["lists"] > index.nprobe
+
+    # 저장된 float16 벡터 기준 전체 비교
+    stored = vectors.astype(np.float16).astype(np.float32)
+    recalls = []
+    for query in perturbed_queries(vectors, 100):
+        rows, scores = index.search(query, 10)
+        truth = np.argsort(-(stored @ query))[:10]
+        recalls.append(len(set(rows.tolist()) & set(truth.tolist())) / 10)
+        assert list(scores) == sorted(scores, reverse=True)
+
+    assert np.mean(recalls) >= 0.9
+
+
+def test_search_before_training_is_exact():
+    """학습 전(문서 수 train_min 미만)에는 전체 비교와 같은 결과"""
+    vectors = clustered_vectors(200)
+    index = IVFIndex(None, DIM, train_min=256)
+    index.add(vectors, created_at=1.0)
+    assert index.centroids is None
+
+    stored = vectors.astype(np.float16).astype(np.float32)
+    for query in perturbed_queries(vectors, 20):
+        rows, _ = index.search(query, 5)
+        assert rows.tolist() == np.argsort(-(stored @ query), kind="stable")[:5].tolist()
+
+
+def test_search_skips_inactive_and_old_rows():
+    """사용하지 않는 행과 기준 시각 이전 행은 검색에서 제외"""
+    vectors = clustered_vectors(10)
+    index = IVFIndex(None, DIM)
+    index.add(vectors[:5], created_at=1.0)
+    index.add(vectors[5:], created_at=2.0)
+    index.deactivate([6])
+
+    rows, _ = index.search(vectors[6], 10, min_created_at=2.0)
+
+    assert sorted(rows.tolist()) == [5, 7, 8, 9]
+
+
+def test_ivf_index_reloads_from_disk(tmp_path):
+    """저장한 벡터 / 중심점을 다시 열면 같은 검색 결과"""
+    vectors = clustered_vectors(600)
+    index = IVFIndex(str(tmp_path), DIM, train_min=256)
+    index.add(vectors, created_at=1.0)
+    index.flush()
+    queries = perturbed_queries(vectors, 20)
+    expected = [index.search(query, 10)[0].tolist() for query in queries]
+
+    reloaded = IVFIndex(str(tmp_path), DIM, created_at=np.ones(600), train_min=256)
+
+    assert reloaded.count == 600
+    assert reloaded.trained_count == index.trained_count
+    np.testing.assert_array_equal(reloaded.centroids, index.centroids)
+    assert [reloaded.search(query, 10)[0].tolist() for query in queries] == expected
+
+
+def test_ivf_index_rejects_mismatched_dimension(tmp_path):
+    """설정한 차원과 저장된 벡터 파일 차원이 다르면 오류"""
+    index = IVFIndex(str(tmp_path), DIM)
+    index.add(clustered_vectors(10), created_at=1.0)
+    index.flush()
+
+    with pytest.raises(ValueError):
+        IVFIndex(str(tmp_path), DIM * 2, created_at=np.ones(10))
+
+
+def test_handler_persists_documents_across_restart(tmp_path):
+    """저장한 문서는 재시작 후에도 검색되고, 같은 URL의 새 문서가 이전 문서를 대체"""
+    options = {"path": str(tmp_path), "enabled": True, "dim": 512, "min_score": 0.1, "max_age": 3600}
+    handler = VectorDBHandler(**options)
+    handler.add("파이썬 설치 방법", [
+        web_result("파이썬 설치 가이드", "공식 홈페이지에서 설치 파일을 다운로드합니다.", "https://example.com/install"),
+        web_result("도커 입문", "도커 컨테이너를 실행하는 방법을 설명합니다.", "https://example.com/docker"),
+    ])
+    handler.close()
+
+    reloaded = VectorDBHandler(**options)
+    results = reloaded.search("파이썬 설치 방법", max_results=5)
+    assert results[0].metadata["url"] == "https://example.com/install"
+    assert results[0].metadata["original_query"] == "파이썬 설치 방법"
+    assert results[0].metadata["query_score"] == pytest.approx(1.0, abs=1e-3)
+    assert reloaded.stats()["documents"] == 2
+
+    # 보관 기간이 지난 문서는 같은 URL로 다시 저장하면 새 문서로 교체
+    reloaded.max_age = 0
+    reloaded.add("파이썬 설치 방법", [
+        web_result("파이썬 설치 가이드", "Python 3.13 설치 파일을 내려받습니다.", "https://example.com/install"),
+    ])
+    reloaded.close()
+
+    restarted = VectorDBHandler(**options)
+    contents = [result.content for result in restarted.search("파이썬 설치 방법", max_results=5)]
+    assert "Python 3.13 설치 파일을 내려받습니다." in contents
+    assert "공식 홈페이지에서 설치 파일을 다운로드합니다." not in contents
+    stats = restarted.stats()
+    assert (stats["documents"], stats["active"]) == (3, 2)
+    restarted.close()
+
+
+def test_disabled_handler_stores_nothing(tmp_path):
+    """비활성화 시 저장 / 검색하지 않음"""
+    handler = VectorDBHandler(path=str(tmp_path), enabled=False)
+    handler.add("파이썬 설치 방법", [web_result("가이드", "설치 방법", "https://example.com/install")])
+    handler.close()
+
+    assert handler.search("파이썬 설치 방법") == []
+    assert not list(tmp_path.iterdir())
+
+
+def test_embedding_is_normalized_and_deterministic():
+    """같은 텍스트는 같은 단위 벡터, 특징이 없으면 0 벡터"""
+    vector = embed_text("비트코인 가격", 512)
+    assert np.linalg.norm(vector) == pytest.approx(1.0)
+    np.testing.assert_array_equal(vector, embed_text("비트코인 가격", 512))
+    assert not embed_text("", 512).any()
@@ -0,0 +1,109 @@
+"""
+Text Utilities - 쿼리 정규화, 유사도 계산, 토큰 수 추정
+"""
+import math
+import re
+from typing import List, Set
+
+_TOKEN_PATTERN = re.compile(r"[\w]+", re.UNICODE)
+# 한글 / 한자 / 가나 (글자당 약 1토큰)
+_WIDE_CHAR_PATTERN = re.compile(r"[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u9fff\uac00-\ud7af]")
+
+
+def normalize_text(text: str) -> str:
+    """소문자화 및 공백 정리"""
+    return " ".join(text.lower().split())
+
+
+def tokenize(text: str) -> List[str]:
+    """단어 단위 토큰화 (문장 부호 제거, 소문자화)"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def char_ngrams(text: str, n: int = 2) -> Set[str]:
+    """
+    단어별 문자 n-gram 집합
+    한국어는 조사가 붙어 단어 단위 비교가 어려우므로 문자 n-gram을 사용
+    
+    Args:
+        text: 입력 텍스트
+        n: n-gram 길이
+        
+    Returns:
+        n-gram 집합
+    """
+    grams = set()
+    for token in tokenize(text):
+        if len(token) <= n:
+            grams.add(token)
+            continue
+        for i in range(len(token) - n + 1):
+            grams.add(token[i:i + n])
+    return grams
+
+
+def jaccard_similarity(a: str, b: str, n: int = 2) -> float:
+    """
+    두 텍스트의 문자 n-gram 자카드 유사도 (0~1)
+    
+    Args:
+        a: 첫 번째 텍스트
+        b: 두 번째 텍스트
+        n: n-gram 길이
+        
+    Returns:
+        유사도
+    """
+    grams_a = char_ngrams(a, n)
+    grams_b = char_ngrams(b, n)
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    LLM 토큰 수 추정 (한글 / 한자 / 가나는 글자당 1토큰, 그 외 문자는 4글자당 1토큰)
+    
+    Args:
+        text: 입력 텍스트
+        
+    Returns:
+        추정 토큰 수
+    """
+    if not text:
+        return 0
+    wide = len(_WIDE_CHAR_PATTERN.findall(text))
+    return wide + math.ceil((len(text) - wide) / 4)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    추정 토큰 수가 max_tokens 이하가 되도록 앞부분만 남김 (가능하면 문장 / 단어 경계에서 자르고 … 추가)
+    
+    Args:
+        text: 입력 텍스트
+        max_tokens: 최대 토큰 수
+        
+    Returns:
+        잘린 텍스트 (이미 예산 이내면 원본)
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+    
+    # 예산 이내인 가장 긴 접두사 (말줄임표 1토큰 제외)
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens - 1:
+            low = mid
+        else:
+            high = mid - 1
+    
+    cut = text[:low]
+    boundary = max(cut.rfind(". "), cut.rfind("\n"), cut.rfind(" "))
+    if boundary >= len(cut) * 0.8:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + "…"
@@ -0,0 +1,414 @@
+"""
+Request Tracing - 요청별 단계 / 업스트림 호출 스팬 기록 및 비동기 JSONL 내보내기
+
+요청마다 루트 스팬을 만들고(start_trace), 하위 단계는 span()으로 감쌉니다.
+샘플링은 루트 스팬 생성 시 결정(head-based)되며, 샘플링되지 않은 요청도
+오류가 발생하면 내보냅니다. 원본 페이로드(프롬프트, 업스트림 응답)는 샘플링된 요청에서만
+capture()로 기록되고, 실패 시에는 record_error()로 항상 기록됩니다.
+
+내보내기는 백그라운드 스레드가 큐에서 꺼내 일정 개수 / 시간 단위로 모아 파일에 씁니다.
+요청 경로에서는 큐에 넣기만 하며, 큐가 가득 차면 해당 트레이스는 버립니다.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import queue
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config import Config
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+logger = logging.getLogger("ai_agent")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _level_value(level: str) -> int:
+    return LEVELS.get(level.lower(), LEVELS["info"])
+
+
+def _truncate(value: Any) -> Any:
+    """페이로드를 최대 길이로 자름 (문자열이 아니면 JSON 문자열로 변환)"""
+    if not isinstance(value, str):
+        try:
+            value = json.dumps(value, ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            value = str(value)
+    limit = Config.TRACE_PAYLOAD_MAX_CHARS
+    if len(value) > limit:
+        return value[:limit] + f"...(+{len(value) - limit} chars)"
+    return value
+
+
+class Trace:
+    """요청 하나의 스팬 모음"""
+
+    def __init__(self, name: str, sampled: bool):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.sampled = sampled
+        self.has_error = False
+        self.spans: List["Span"] = []
+
+    @property
+    def exported(self) -> bool:
+        """내보내기 대상 여부 (샘플링되었거나 오류 발생)"""
+        return self.sampled or self.has_error
+
+
+class Span:
+    """단계 / 업스트림 호출 하나의 실행 구간"""
+
+    def __init__(self, trace: Trace, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.name = name
+        self.attributes = attributes
+        self.events: List[Dict[str, Any]] = []
+        self.payloads: Dict[str, Any] = {}
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        trace.spans.append(self)
+
+    def end(self):
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+
+    def set_error(self, error: Any, payload: Any = None):
+        self.status = "error"
+        self.error = str(error)
+        self.trace.has_error = True
+        if payload is not None:
+            self.payloads["error_payload"] = _truncate(payload)
+
+    def to_dict(self, trace_start: float) -> Dict[str, Any]:
+        data = {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "offset_ms": round((self.start_time - trace_start) * 1000, 3),
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+        }
+        if self.error is not None:
+            data["error"] = self.error
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.events:
+            data["events"] = self.events
+        if self.payloads:
+            data["payloads"] = self.payloads
+        return data
+
+
+class JsonlExporter:
+    """트레이스를 백그라운드 스레드에서 모아 JSONL 파일에 기록"""
+
+    def __init__(self, path: str, batch_size: int, interval: float, queue_size: int):
+        self.path = path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self.exported = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Dict[str, Any]):
+        """트레이스를 큐에 추가 (가득 차면 버림, 대기하지 않음)"""
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                if item is None:
+                    self._write(batch)
+                    return
+                batch.append(item)
+            except queue.Empty:
+                pass
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.interval
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+        lines = "".join(json.dumps(trace, ensure_ascii=False, default=str) + "\n" for trace in batch)
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            self.exported += len(batch)
+        except OSError as e:
+            self.dropped += len(batch)
+            logger.warning(f"트레이스 기록 실패: {e}")
+
+    def shutdown(self, timeout: float = 5.0):
+        """남은 트레이스를 기록하고 스레드 종료"""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+_exporter: Optional[JsonlExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter() -> Optional[JsonlExporter]:
+    """JSONL 내보내기 (첫 사용 시 생성, 경로가 비어 있으면 None)"""
+    global _exporter
+    if not Config.TRACE_EXPORT_PATH:
+        return None
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = JsonlExporter(
+                    Config.TRACE_EXPORT_PATH,
+                    batch_size=Config.TRACE_EXPORT_BATCH_SIZE,
+                    interval=Config.TRACE_EXPORT_INTERVAL,
+                    queue_size=Config.TRACE_QUEUE_SIZE
+                )
+    return _exporter
+
+
+def shutdown():
+    """내보내기 종료 (남은 트레이스 기록)"""
+    global _exporter
+    with _exporter_lock:
+        exporter, _exporter = _exporter, None
+    if exporter is not None:
+        exporter.shutdown()
+
+
+def stats() -> Dict[str, Any]:
+    """트레이스 내보내기 통계"""
+    exporter = _exporter
+    return {
+        "enabled": Config.TRACE_ENABLED,
+        "sample_rate": Config.TRACE_SAMPLE_RATE,
+        "exported": exporter.exported if exporter else 0,
+        "dropped": exporter.dropped if exporter else 0,
+    }
+
+
+def _finish_trace(trace: Trace, root: Span):
+    """루트 스팬 종료 시 내보내기 대상이면 큐에 추가"""
+    if not trace.exported:
+        return
+    exporter = get_exporter()
+    if exporter is None:
+        return
+    exporter.export({
+        "trace_id": trace.trace_id,
+        "name": trace.name,
+        "sampled": trace.sampled,
+        "status": "error" if trace.has_error else "ok",
+        "start": root.start_time,
+        "duration_ms": root.duration_ms,
+        "spans": [span.to_dict(root.start_time) for span in trace.spans],
+    })
+
+
+@contextmanager
+def start_trace(name: str, sampled: Optional[bool] = None, **attributes) -> Iterator[Optional[Span]]:
+    """
+    요청 트레이스 시작 (루트 스팬)
+
+    Args:
+        name: 루트 스팬 이름
+        sampled: 샘플링 강제 여부 (기본값: TRACE_SAMPLE_RATE 확률)
+        attributes: 루트 스팬 속성
+
+    Yields:
+        루트 스팬 (트레이싱 비활성화 시 None)
+    """
+    if not Config.TRACE_ENABLED:
+        yield None
+        return
+
+    if sampled is None:
+        sampled = random.random() < Config.TRACE_SAMPLE_RATE
+
+    trace = Trace(name, sampled)
+    root = Span(trace, name, None, attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        if not isinstance(e, (GeneratorExit, asyncio.CancelledError)):
+            root.set_error(e)
+        raise
+    finally:
+        root.end()
+        _reset(token)
+        _finish_trace(trace, root)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """
+    현재 스팬의 하위 스팬 (진행 중인 트레이스가 없으면 아무것도 기록하지 않음)
+
+    Args:
+        name: 스팬 이름
+        attributes: 스팬 속성
+
+    Yields:
+        스팬 또는 None
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(parent.trace, name, parent, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        if not isinstance(e, (GeneratorExit, asyncio.CancelledError)):
+            child.set_error(e)
+        raise
+    finally:
+        child.end()
+        _reset(token)
+
+
+def _reset(token: contextvars.Token):
+    """스팬 복원 (스트리밍 등으로 다른 컨텍스트에서 종료되는 경우 무시)"""
+    try:
+        _current_span.reset(token)
+    except ValueError:
+        pass
+
+
+def traced(name: str) -> Callable:
+    """
+    함수(동기 / 비동기) 실행을 하위 스팬으로 기록하는 데코레이터
+
+    Args:
+        name: 스팬 이름
+    """
+    def decorator(fn: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def event(message: str, level: str = "info", **attributes):
+    """
+    현재 스팬에 이벤트 기록 (TRACE_LEVEL 미만이면 무시)
+    TRACE_CONSOLE_LEVEL 이상이면 로그로도 출력
+
+    Args:
+        message: 이벤트 메시지
+        level: debug / info / warning / error
+        attributes: 이벤트 속성
+    """
+    value = _level_value(level)
+    if value >= _level_value(Config.TRACE_CONSOLE_LEVEL):
+        logger.log(value, message)
+
+    current = _current_span.get()
+    if current is None or value < _level_value(Config.TRACE_LEVEL):
+        return
+
+    record = {"level": level, "message": message, "offset_ms": round((time.time() - current.start_time) * 1000, 3)}
+    if attributes:
+        record["attributes"] = attributes
+    current.events.append(record)
+
+
+def debug(message: str, **attributes):
+    event(message, "debug", **attributes)
+
+
+def info(message: str, **attributes):
+    event(message, "info", **attributes)
+
+
+def warning(message: str, **attributes):
+    event(message, "warning", **attributes)
+
+
+def error(message: str, **attributes):
+    event(message, "error", **attributes)
+
+
+def is_sampled() -> bool:
+    """현재 요청이 샘플링 대상인지 여부"""
+    current = _current_span.get()
+    return current is not None and current.trace.sampled
+
+
+def capture(key: str, payload: Any):
+    """
+    원본 페이로드 기록 (샘플링된 요청에서만)
+
+    Args:
+        key: 페이로드 이름 (예: prompt, response)
+        payload: 기록할 값 (TRACE_PAYLOAD_MAX_CHARS로 잘림)
+    """
+    current = _current_span.get()
+    if current is None or not current.trace.sampled:
+        return
+    current.payloads[key] = _truncate(payload)
+
+
+def record_error(err: Any, payload: Any = None):
+    """
+    현재 스팬을 오류로 표시 (샘플링 여부와 관계없이 트레이스를 내보내고 페이로드 기록)
+
+    Args:
+        err: 예외 또는 오류 메시지
+        payload: 실패 원인이 된 원본 페이로드
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.set_error(err, payload)
+    event(f"{err}", "error")
+
+
+def set_attribute(key: str, value: Any):
+    """현재 스팬 속성 설정"""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes[key] = value
+
+
+def current_trace_id() -> Optional[str]:
+    """현재 트레이스 ID"""
+    current = _current_span.get()
+    return current.trace.trace_id if current is not None else None
@@ -0,0 +1,583 @@
+"""
+Vector DB Handler - 이미 가져온 웹 검색 결과를 로컬 벡터 인덱스에 저장하고 유사도로 다시 찾는 핸들러
+
+문서는 해시된 단어 + 문자 n-gram 특징으로 임베딩하고(외부 임베딩 API 호출 없음), float16 벡터를
+메모리 맵 파일(vectors.npy)에 저장합니다. 문서가 충분히 쌓이면 k-means 중심점으로 역색인(IVF)을 만들어
+쿼리와 가까운 중심점 몇 개의 목록만 비교하므로, 반복되는 주제는 Tavily 호출 없이 로컬 조회 지연으로 답할 수 있습니다.
+
+저장은 요청 경로 밖(백그라운드 스레드 1개)에서 순서대로 처리하고, 검색은 잠금 안에서 스냅샷만 얻은 뒤 계산합니다.
+
+    <VECTOR_DB_PATH>/vectors.npy      float16 (capacity, dim) 메모리 맵
+    <VECTOR_DB_PATH>/documents.jsonl  행 번호 순서의 문서 메타데이터
+    <VECTOR_DB_PATH>/ivf.npz          k-means 중심점 + 행별 목록 번호
+"""
+import json
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import tracing
+from cache import TTLCache, make_key
+from config import Config
+from metrics import timed_stage
+from models import SearchResult
+from text_utils import tokenize
+from tracing import traced
+
+VECTORS_FILE = "vectors.npy"
+DOCUMENTS_FILE = "documents.jsonl"
+IVF_FILE = "ivf.npz"
+
+
+def embed_text(text: str, dim: int) -> np.ndarray:
+    """
+    부호 있는 특징 해싱 임베딩 (단어 + 단어 내부 문자 2~3-gram, 로그 빈도, L2 정규화)
+
+    Args:
+        text: 입력 텍스트
+        dim: 벡터 차원
+
+    Returns:
+        float32 벡터 (특징이 없으면 0 벡터)
+    """
+    grams = []
+    for token in tokenize(text):
+        grams.append(f"w:{token}")
+        padded = f"<{token}>"
+        for n in (2, 3):
+            grams.extend(f"c{n}:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+
+    vector = np.zeros(dim, dtype=np.float32)
+    if not grams:
+        return vector
+
+    hashed = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.int64, count=len(grams))
+    values, counts = np.unique(hashed, return_counts=True)
+    # 하위 비트는 차원, 최상위 비트는 부호 (충돌한 특징끼리 상쇄되도록)
+    signs = np.where(values >> 31 & 1, 1.0, -1.0).astype(np.float32)
+    np.add.at(vector, values % dim, signs * (1.0 + np.log(counts)).astype(np.float32))
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def train_centroids(vectors: np.ndarray, nlist: int, iterations: int = 8, seed: int = 0) -> np.ndarray:
+    """
+    구면 k-means 중심점 학습 (코사인 유사도 기준)
+
+    Args:
+        vectors: 정규화된 학습 벡터 (n, dim)
+        nlist: 중심점 수
+        iterations: 반복 횟수
+        seed: 초기 중심점 선택 시드
+
+    Returns:
+        정규화된 중심점 (nlist, dim)
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        # 비어 있는 목록은 기존 중심점 유지
+        centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """
+    float16 벡터 + k-means 역색인 (IVF)
+
+    쓰기(add / deactivate / flush)는 한 스레드에서만 호출하고, search는 어느 스레드에서나 호출할 수 있습니다.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str],
+        dim: int,
+        created_at: Optional[np.ndarray] = None,
+        nprobe: int = 8,
+        train_min: int = 256,
+        max_lists: int = 1024,
+        train_sample: int = 8192,
+        initial_capacity: int = 1024
+    ):
+        self.directory = directory
+        self.dim = dim
+        self.nprobe = nprobe
+        self.train_min = train_min
+        self.max_lists = max_lists
+        self.train_sample = train_sample
+
+        count = 0 if created_at is None else len(created_at)
+        self._vectors, existed = self._open_vectors(max(initial_capacity, count))
+        # 벡터 파일이 없으면 저장된 문서도 사용할 수 없음
+        count = min(count, len(self._vectors)) if existed else 0
+        capacity = len(self._vectors)
+        self.count = count
+
+        # 행별 저장 시각 / 사용 여부 (같은 URL의 새 문서가 저장되면 이전 행은 사용하지 않음)
+        self._created_at = np.zeros(capacity, dtype=np.float64)
+        self._active = np.zeros(capacity, dtype=bool)
+        if count:
+            self._created_at[:count] = created_at[:count]
+            self._active[:count] = True
+
+        self.centroids: Optional[np.ndarray] = None
+        self._assignments = np.full(capacity, -1, dtype=np.int32)
+        self.trained_count = 0
+        self._lock = threading.Lock()
+        self._load_ivf()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _open_vectors(self, capacity: int) -> Tuple[np.ndarray, bool]:
+        """저장된 벡터 파일을 메모리 맵으로 열기 (없거나 저장하지 않는 경우 새로 생성, 기존 파일 여부 함께 반환)"""
+        if not self.directory:
+            return np.zeros((capacity, self.dim), dtype=np.float16), False
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(VECTORS_FILE)
+        if os.path.exists(path):
+            vectors = np.lib.format.open_memmap(path, mode="r+")
+            if vectors.dtype != np.float16 or vectors.ndim != 2 or vectors.shape[1] != self.dim:
+                raise ValueError(
+                    f"벡터 DB 파일 형식이 설정과 다릅니다: {path} "
+                    f"(dtype={vectors.dtype}, shape={vectors.shape}, VECTOR_DB_DIM={self.dim})"
+                )
+            return vectors, True
+        return self._create_vectors(capacity, np.zeros((0, self.dim), dtype=np.float16)), False
+
+    def _create_vectors(self, capacity: int, existing: np.ndarray) -> np.ndarray:
+        """용량을 늘린 벡터 파일 생성 후 기존 벡터 복사 (임시 파일에 쓴 뒤 교체)"""
+        if not self.directory:
+            vectors = np.zeros((capacity, self.dim), dtype=np.float16)
+            vectors[:len(existing)] = existing
+            return vectors
+
+        path = self._path(VECTORS_FILE)
+        tmp_path = f"{path}.tmp"
+        vectors = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float16, shape=(capacity, self.dim))
+        vectors[:len(existing)] = existing
+        vectors.flush()
+        os.replace(tmp_path, path)
+        return vectors
+
+    def _load_ivf(self):
+        """저장된 중심점 / 목록 번호 로드 (저장 이후 추가된 행은 다시 배정)"""
+        if not self.directory or not self.count or not os.path.exists(self._path(IVF_FILE)):
+            return
+
+        data = np.load(self._path(IVF_FILE))
+        centroids = data["centroids"].astype(np.float32)
+        if centroids.ndim != 2 or centroids.shape[1] != self.dim:
+            return
+        assignments = data["assignments"][:self.count]
+        self.centroids = centroids
+        self.trained_count = int(data["trained_count"])
+        self._assignments[:len(assignments)] = assignments
+        if len(assignments) < self.count:
+            self._assign(len(assignments), self.count)
+
+    def _assign(self, start: int, end: int):
+        """행 범위를 가장 가까운 중심점 목록에 배정"""
+        if self.centroids is None or start >= end:
+            return
+        vectors = np.asarray(self._vectors[start:end], dtype=np.float32)
+        self._assignments[start:end] = np.argmax(vectors @ self.centroids.T, axis=1)
+
+    def add(self, vectors: np.ndarray, created_at: float) -> np.ndarray:
+        """
+        벡터 추가 (용량이 부족하면 두 배로 늘리고, 문서 수가 학습 시점의 두 배가 되면 중심점 재학습)
+
+        Args:
+            vectors: 정규화된 벡터 (m, dim)
+            created_at: 저장 시각 (epoch 초)
+
+        Returns:
+            추가된 행 번호
+        """
+        start, end = self.count, self.count + len(vectors)
+        if end > len(self._vectors):
+            self._grow(max(end, 2 * len(self._vectors)))
+
+        self._vectors[start:end] = vectors.astype(np.float16)
+        self._created_at[start:end] = created_at
+        self._active[start:end] = True
+        self._assign(start, end)
+        with self._lock:
+            self.count = end
+
+        if end >= self.train_min and end >= 2 * self.trained_count:
+            self._train()
+        return np.arange(start, end)
+
+    def _grow(self, capacity: int):
+        vectors = self._create_vectors(capacity, self._vectors[:self.count])
+        created_at = np.zeros(capacity, dtype=np.float64)
+        created_at[:self.count] = self._created_at[:self.count]
+        active = np.zeros(capacity, dtype=bool)
+        active[:self.count] = self._active[:self.count]
+        assignments = np.full(capacity, -1, dtype=np.int32)
+        assignments[:self.count] = self._assignments[:self.count]
+        with self._lock:
+            self._vectors, self._created_at, self._active, self._assignments = vectors, created_at, active, assignments
+
+    def _train(self):
+        """중심점 학습 후 전체 행 재배정 (검색은 교체 전까지 이전 중심점 사용)"""
+        count = self.count
+        rng = np.random.default_rng(count)
+        sample = np.sort(rng.choice(count, size=min(count, self.train_sample), replace=False))
+        vectors = np.asarray(self._vectors[sample], dtype=np.float32)
+
+        nlist = int(min(self.max_lists, max(1, np.sqrt(count))))
+        centroids = train_centroids(vectors, nlist, seed=count)
+
+        assignments = np.full(len(self._assignments), -1, dtype=np.int32)
+        for start in range(0, count, 4096):
+            end = min(count, start + 4096)
+            chunk = np.asarray(self._vectors[start:end], dtype=np.float32)
+            assignments[start:end] = np.argmax(chunk @ centroids.T, axis=1)
+
+        with self._lock:
+            self.centroids = centroids
+            self._assignments = assignments
+            self.trained_count = count
+        tracing.info("벡터 DB 역색인 학습", documents=count, lists=nlist)
+
+    def deactivate(self, rows: List[int]):
+        """행을 검색 대상에서 제외"""
+        self._active[rows] = False
+
+    def search(self, query: np.ndarray, k: int, min_created_at: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        코사인 유사도 상위 k개 검색 (학습 전에는 전체 비교, 학습 후에는 가까운 nprobe개 목록만 비교)
+
+        Args:
+            query: 정규화된 쿼리 벡터
+            k: 결과 수
+            min_created_at: 이 시각 이전에 저장된 행은 제외
+
+        Returns:
+            (행 번호, 유사도) - 유사도 내림차순
+        """
+        with self._lock:
+            count = self.count
+            vectors, created_at, active = self._vectors, self._created_at, self._active
+            centroids, assignments = self.centroids, self._assignments
+
+        if not count or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        mask = active[:count] & (created_at[:count] >= min_created_at)
+        if centroids is not None:
+            probe = np.argsort(-(centroids @ query))[:self.nprobe]
+            mask &= np.isin(assignments[:count], probe)
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        scores = np.asarray(vectors[candidates], dtype=np.float32) @ query
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return candidates[order], scores[order]
+
+    def flush(self):
+        """메모리 맵 벡터와 역색인 저장 (임시 파일에 쓴 뒤 교체)"""
+        if not self.directory:
+            return
+        if isinstance(self._vectors, np.memmap):
+            self._vectors.flush()
+        if self.centroids is None:
+            return
+        tmp_path = self._path("ivf.tmp.npz")
+        np.savez(
+            tmp_path,
+            centroids=self.centroids,
+            assignments=self._assignments[:self.count],
+            trained_count=self.trained_count
+        )
+        os.replace(tmp_path, self._path(IVF_FILE))
+
+    def stats(self) -> Dict[str, Any]:
+        """인덱스 통계"""
+        with self._lock:
+            count = self.count
+            lists = 0 if self.centroids is None else len(self.centroids)
+            return {
+                "documents": count,
+                "active": int(self._active[:count].sum()),
+                "capacity": len(self._vectors),
+                "lists": lists,
+                "nprobe": min(self.nprobe, lists) if lists else 0,
+                "trained_count": self.trained_count,
+                "memory_mapped": isinstance(self._vectors, np.memmap),
+            }
+
+
+class VectorDBHandler:
+    """로컬 벡터 DB 핸들러 - 웹 검색 결과 저장 및 유사 문서 검색"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        enabled: Optional[bool] = None,
+        dim: Optional[int] = None,
+        min_score: Optional[float] = None,
+        max_age: Optional[float] = None,
+        max_documents: Optional[int] = None,
+        sources: Optional[List[str]] = None
+    ):
+        self.enabled = enabled if enabled is not None else Config.VECTOR_DB_ENABLED
+        self.path = path if path is not None else Config.VECTOR_DB_PATH
+        self.dim = dim if dim is not None else Config.VECTOR_DB_DIM
+        self.min_score = min_score if min_score is not None else Config.VECTOR_DB_MIN_SCORE
+        self.max_age = max_age if max_age is not None else Config.VECTOR_DB_MAX_AGE
+        self.max_documents = max_documents if max_documents is not None else Config.VECTOR_DB_MAX_DOCUMENTS
+        self.sources = set(sources if sources is not None else Config.VECTOR_DB_SOURCES)
+
+        self._documents: List[Dict[str, Any]] = []
+        # 문서 키(URL 또는 요약 쿼리) -> 최신 행 번호
+        self._rows_by_key: Dict[str, int] = {}
+        self.index: Optional[IVFIndex] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # 같은 쿼리의 라우팅 판단 / 실행 단계 검색 결과 재사용
+        self.cache = TTLCache(
+            "vector_db",
+            ttl=Config.VECTOR_DB_SEARCH_CACHE_TTL,
+            max_entries=Config.VECTOR_DB_SEARCH_CACHE_MAX_ENTRIES
+        )
+
+        self.inserted = 0
+        self.replaced = 0
+        self.skipped = 0
+
+        if self.enabled:
+            self._load()
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vector-db")
+
+    def _load(self):
+        """저장된 문서 메타데이터와 벡터 로드"""
+        documents_path = os.path.join(self.path, DOCUMENTS_FILE) if self.path else ""
+        if documents_path and os.path.exists(documents_path):
+            with open(documents_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._documents.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # 마지막 줄이 중간에 끊긴 경우 - 그 이후는 버림
+                        break
+
+        created_at = np.array([document.get("created_at", 0.0) for document in self._documents], dtype=np.float64)
+        self.index = IVFIndex(
+            self.path or None,
+            self.dim,
+            created_at=created_at,
+            nprobe=Config.VECTOR_DB_NPROBE,
+            train_min=Config.VECTOR_DB_TRAIN_MIN
+        )
+        del self._documents[self.index.count:]
+
+        stale = []
+        for row, document in enumerate(self._documents):
+            previous = self._rows_by_key.get(document["key"])
+            if previous is not None:
+                stale.append(previous)
+            self._rows_by_key[document["key"]] = row
+        if stale:
+            self.index.deactivate(stale)
+
+        if self._documents:
+            tracing.info("벡터 DB 로드", documents=len(self._documents), path=self.path)
+
+    @timed_stage("vector_db")
+    @traced("vector_db")
+    def search(self, query: str, max_results: int = 5) -> List[SearchResult]:
+        """
+        유사 문서 검색 (최소 유사도 이상, 최대 보관 기간 이내 문서만)
+
+        Args:
+            query: 검색 쿼리
+            max_results: 최대 결과 수
+
+        Returns:
+            검색 결과 리스트 (source="local_kb", relevance_score는 코사인 유사도,
+            metadata["query_score"]는 문서를 가져온 원래 검색 쿼리와의 코사인 유사도)
+        """
+        if not self.enabled or not self.index.count:
+            return []
+
+        cache_key = make_key(query, max_results)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            tracing.set_attribute("cache_hit", True)
+            return [result.model_copy(deep=True) for result in cached]
+
+        vector = embed_text(query, self.dim)
+        rows, scores = self.index.search(vector, max_results, min_created_at=time.time() - self.max_age)
+        results = [
+            self._to_result(self._documents[row], score, vector)
+            for row, score in zip(rows.tolist(), scores.tolist())
+            if score >= self.min_score
+        ]
+
+        tracing.set_attribute("results", len(results))
+        if len(scores):
+            tracing.set_attribute("top_score", round(float(scores[0]), 4))
+        self.cache.set(cache_key, results)
+        return [result.model_copy(deep=True) for result in results]
+
+    def _to_result(self, document: Dict[str, Any], score: float, query_vector: np.ndarray) -> SearchResult:
+        query_score = float(embed_text(document.get("query", ""), self.dim) @ query_vector)
+        return SearchResult(
+            source="local_kb",
+            content=document["content"],
+            relevance_score=round(score, 4),
+            metadata={
+                "title": document.get("title", ""),
+                "url": document.get("url", ""),
+                "published_date": document.get("published_date", ""),
+                "raw_content": document.get("raw_content", ""),
+                "original_source": document.get("source", ""),
+                "original_query": document.get("query", ""),
+                "query_score": round(query_score, 4),
+                "stored_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(document.get("created_at", 0.0))),
+            }
+        )
+
+    def add(self, query: str, search_results: List[SearchResult]):
+        """
+        웹 검색 결과를 백그라운드에서 저장 (저장 대상 소스만, 오류 결과 제외)
+
+        Args:
+            query: 결과를 가져온 검색 쿼리
+            search_results: 검색 결과들
+        """
+        if not self.enabled or self._executor is None:
+            return
+
+        results = [
+            result.model_copy(deep=True) for result in search_results
+            if result.source in self.sources and result.content and "error" not in result.metadata
+        ]
+        if not results:
+            return
+        try:
+            self._executor.submit(self._insert, query, results)
+        except RuntimeError:
+            # 종료 중
+            pass
+
+    def _insert(self, query: str, search_results: List[SearchResult]):
+        """문서 저장 (백그라운드 스레드에서 순서대로 실행)"""
+        try:
+            now = time.time()
+            documents = []
+            stale = []
+            for result in search_results:
+                document = self._document(query, result, now)
+                previous = self._rows_by_key.get(document["key"])
+                if previous is not None and self._documents[previous]["created_at"] >= now - self.max_age:
+                    # 아직 신선한 같은 문서가 있음
+                    self.skipped += 1
+                    continue
+                if previous is not None:
+                    stale.append(previous)
+                documents.append(document)
+
+            if not documents:
+                return
+            if self.index.count + len(documents) > self.max_documents:
+                self.skipped += len(documents)
+                tracing.warning("벡터 DB 최대 문서 수 도달 - 저장 생략", max_documents=self.max_documents)
+                return
+
+            vectors = np.stack([embed_text(self._embedding_text(document), self.dim) for document in documents])
+            # 검색은 인덱스의 행 수까지만 문서를 참조하므로 문서 목록을 먼저 늘림
+            count = self.index.count
+            self._documents.extend(documents)
+            try:
+                rows = self.index.add(vectors, now)
+            except Exception:
+                del self._documents[count:]
+                raise
+
+            # 벡터를 먼저 저장해야 다시 로드할 때 문서 행이 항상 벡터를 가리킴
+            self.index.flush()
+            self._append_documents(documents)
+            for row, document in zip(rows.tolist(), documents):
+                self._rows_by_key[document["key"]] = row
+            if stale:
+                self.index.deactivate(stale)
+                self.replaced += len(stale)
+            self.inserted += len(documents)
+            self.cache.clear()
+        except Exception as e:
+            tracing.warning(f"벡터 DB 저장 실패: {e}")
+
+    @staticmethod
+    def _document(query: str, result: SearchResult, created_at: float) -> Dict[str, Any]:
+        """저장할 문서 (URL이 없는 요약 결과는 검색 쿼리를 키로 사용)"""
+        url = result.metadata.get("url") or ""
+        return {
+            "key": url or f"{result.source}:{query.strip().lower()}",
+            "source": result.source,
+            "query": query,
+            "title": result.metadata.get("title", ""),
+            "url": url,
+            "published_date": result.metadata.get("published_date", ""),
+            "content": result.content,
+            "raw_content": result.metadata.get("raw_content") or "",
+            "created_at": created_at,
+        }
+
+    @staticmethod
+    def _embedding_text(document: Dict[str, Any]) -> str:
+        """임베딩 대상 텍스트 (같은 주제의 반복 쿼리가 잘 맞도록 원래 검색 쿼리와 제목을 함께 포함)"""
+        return f"{document['query']}\n{document['title']}\n{document['content']}"
+
+    def _append_documents(self, documents: List[Dict[str, Any]]):
+        """문서 메타데이터를 행 순서대로 추가 저장"""
+        if not self.path:
+            return
+        with open(os.path.join(self.path, DOCUMENTS_FILE), "a", encoding="utf-8") as f:
+            for document in documents:
+                f.write(json.dumps(document, ensure_ascii=False) + "\n")
+
+    def wait(self):
+        """대기 중인 저장 작업 완료까지 대기 (벤치마크 / 종료용)"""
+        if self._executor is not None:
+            self._executor.submit(lambda: None).result()
+
+    def stats(self) -> Dict[str, Any]:
+        """벡터 DB 통계"""
+        stats: Dict[str, Any] = {"enabled": self.enabled}
+        if not self.enabled:
+            return stats
+        stats.update(self.index.stats())
+        stats.update({
+            "inserted": self.inserted,
+            "replaced": self.replaced,
+            "skipped": self.skipped,
+            "search_cache": self.cache.stats(),
+        })
+        return stats
+
+    def close(self):
+        """대기 중인 저장 작업 완료 후 인덱스 저장"""
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self.index.flush()
@@ -1,10 +1,17 @@
 """
 Web Search Handler using Tavily API
 """
+import httpx
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from config import Config
 from models import SearchResult
+from cache import TTLCache, SingleFlight, AsyncSingleFlight, make_key
+import tracing
+from metrics import timed_stage
+from tracing import traced
+from http_pool import create_session, create_async_client, sync_timeout, async_timeout
+from resilience import CircuitOpenError, UpstreamThrottled, check_throttled
 
 
 class WebSearchHandler:
@@ -12,118 +19,247 @@ class WebSearchHandler:
     
     def __init__(self):
         self.api_key = Config.TAVILY_API_KEY
-        self.api_url = "https://api.tavily.com/search"
+        self.api_url = Config.TAVILY_API_URL
+        self.timeout = Config.TAVILY_TIMEOUT
         
         if not self.api_key:
             raise ValueError("TAVILY_API_KEY가 설정되지 않았습니다.")
+        
+        # keep-alive 연결 풀 (동기 / 비동기)
+        self.session = create_session("tavily")
+        self._async_client: Optional[httpx.AsyncClient] = None
+        
+        # (쿼리, 결과 수, 검색 깊이)별 결과 캐시 및 동시 요청 병합
+        self.cache = TTLCache(
+            "web_search",
+            ttl=Config.WEB_SEARCH_CACHE_TTL,
+            max_entries=Config.WEB_SEARCH_CACHE_MAX_ENTRIES,
+            max_bytes=Config.WEB_SEARCH_CACHE_MAX_BYTES
+        )
+        self._single_flight = SingleFlight()
+        self._async_single_flight = AsyncSingleFlight()
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """비동기 클라이언트 (첫 사용 시 실행 중인 이벤트 루프에서 생성)"""
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = create_async_client("tavily", self.timeout)
+        return self._async_client
+    
+    async def aclose(self):
+        """비동기 연결 풀 정리"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+    
+    def close(self):
+        """동기 연결 풀 정리"""
+        self.session.close()
+    
+    def _build_payload(self, query: str, max_results: int, search_depth: str = "basic") -> Dict[str, Any]:
+        """Tavily 검색 요청 본문 생성"""
+        return {
+            "api_key": self.api_key,
+            "query": query,
+            "search_depth": search_depth,
+            "include_answer": True,
+            "include_images": False,
+            "include_raw_content": True,
+            "max_results": max_results
+        }
+    
+    @timed_stage("web_search")
+    @traced("web_search")
+    def search(self, query: str, max_results: int = 5, search_depth: str = "basic") -> List[SearchResult]:
+        """
+        웹 검색 수행 (캐시 적중 시 재사용, 동일 검색 동시 요청은 한 번만 호출)
+        
+        Args:
+            query: 검색 쿼리
+            max_results: 최대 결과 수
+            search_depth: Tavily 검색 깊이 ("basic" | "advanced")
+            
+        Returns:
+            검색 결과 리스트
+        """
+        cache_key = make_key(query, max_results, search_depth)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            tracing.set_attribute("cache_hit", True)
+            return self._copy_results(cached)
+        
+        results = self._single_flight.do(
+            cache_key,
+            lambda: self._search_upstream(cache_key, query, max_results, search_depth)
+        )
+        return self._copy_results(results)
     
-    def search(self, query: str, max_results: int = 5) -> List[SearchResult]:
+    @timed_stage("web_search")
+    @traced("web_search")
+    async def asearch(self, query: str, max_results: int = 5, search_depth: str = "basic") -> List[SearchResult]:
         """
-        웹 검색 수행
+        웹 검색 수행 (비동기, 캐시 적중 시 재사용, 동일 검색 동시 요청은 한 번만 호출)
         
         Args:
             query: 검색 쿼리
             max_results: 최대 결과 수
+            search_depth: Tavily 검색 깊이 ("basic" | "advanced")
             
         Returns:
             검색 결과 리스트
         """
+        cache_key = make_key(query, max_results, search_depth)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            tracing.set_attribute("cache_hit", True)
+            return self._copy_results(cached)
+        
+        results = await self._async_single_flight.do(
+            cache_key,
+            lambda: self._asearch_upstream(cache_key, query, max_results, search_depth)
+        )
+        return self._copy_results(results)
+    
+    def _copy_results(self, results: List[SearchResult]) -> List[SearchResult]:
+        """캐시/공유 결과는 호출자가 수정할 수 있으므로 복사본 반환"""
+        return [result.model_copy(deep=True) for result in results]
+    
+    @traced("tavily.search")
+    def _search_upstream(self, cache_key: str, query: str, max_results: int, search_depth: str) -> List[SearchResult]:
+        """Tavily API 호출 후 결과 캐시"""
         try:
             headers = {
                 "Content-Type": "application/json"
             }
             
-            payload = {
-                "api_key": self.api_key,
-                "query": query,
-                "search_depth": "basic",
-                "include_answer": True,
-                "include_images": False,
-                "include_raw_content": True,
-                "max_results": max_results
-            }
-            
-            response = requests.post(
+            response = self.session.post(
                 self.api_url,
                 headers=headers,
-                json=payload,
-                timeout=30
+                json=self._build_payload(query, max_results, search_depth),
+                timeout=sync_timeout(self.timeout)
             )
+            check_throttled("tavily", response)
             response.raise_for_status()
             
-            try:
-                data = response.json()
-            except Exception as e:
-                print(f"❌ JSON 파싱 실패: {e}")
-                print(f"❌ 응답 내용: {response.text[:500]}")
-                raise Exception(f"API 응답 JSON 파싱 실패: {e}")
+            results = self._parse_response(response, query)
             
-            # 응답 데이터 검증
-            if not data:
-                print("❌ 빈 응답 데이터")
-                raise Exception("빈 응답 데이터")
+        except (UpstreamThrottled, CircuitOpenError):
+            raise
+        except requests.exceptions.RequestException as e:
+            # 네트워크 에러 시 빈 리스트 반환 (상위에서 처리)
+            raise Exception(f"웹 검색 API 연결 실패: {e}")
+        except Exception as e:
+            # 기타 에러 시 예외 발생 (상위에서 처리)
+            raise Exception(f"웹 검색 처리 실패: {e}")
+        
+        self.cache.set(cache_key, results)
+        return results
+    
+    @traced("tavily.search")
+    async def _asearch_upstream(self, cache_key: str, query: str, max_results: int, search_depth: str) -> List[SearchResult]:
+        """Tavily API 호출 후 결과 캐시 (비동기)"""
+        try:
+            headers = {
+                "Content-Type": "application/json"
+            }
             
-            if not isinstance(data, dict):
-                print(f"❌ 예상과 다른 응답 타입: {type(data)}")
-                raise Exception(f"예상과 다른 응답 타입: {type(data)}")
+            response = await self._get_async_client().post(
+                self.api_url,
+                headers=headers,
+                json=self._build_payload(query, max_results, search_depth),
+                timeout=async_timeout(self.timeout)
+            )
+            check_throttled("tavily", response)
+            response.raise_for_status()
             
-            print(f"📊 Tavily API 응답 구조: {list(data.keys())}")
+            results = self._parse_response(response, query)
             
-            results = []
+        except (UpstreamThrottled, CircuitOpenError):
+            raise
+        except httpx.HTTPError as e:
+            raise Exception(f"웹 검색 API 연결 실패: {e}")
+        except Exception as e:
+            raise Exception(f"웹 검색 처리 실패: {e}")
+        
+        self.cache.set(cache_key, results)
+        return results
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """검색 캐시 및 요청 병합 통계"""
+        stats = self.cache.stats()
+        stats["coalesced"] = self._single_flight.coalesced + self._async_single_flight.coalesced
+        return stats
+    
+    def _parse_response(self, response, query: str) -> List[SearchResult]:
+        """
+        Tavily 응답을 검색 결과로 변환
+        
+        Args:
+            response: HTTP 응답 (requests / httpx)
+            query: 검색 쿼리
             
-            # Tavily 검색 결과 파싱
-            if "results" in data and data["results"]:
-                print(f"📝 검색 결과 {len(data['results'])}개 발견")
-                for idx, result in enumerate(data["results"]):
-                    if not isinstance(result, dict):
-                        print(f"⚠️ 결과 {idx}가 dict가 아님: {type(result)}")
-                        continue
-                        
-                    # raw_content 안전 처리
-                    raw_content = result.get("raw_content", "")
-                    if raw_content and len(raw_content) > 1000:
-                        raw_content = raw_content[:1000]
+        Returns:
+            검색 결과 리스트
+        """
+        try:
+            data = response.json()
+        except Exception as e:
+            tracing.record_error(f"JSON 파싱 실패: {e}", payload=response.text)
+            raise Exception(f"API 응답 JSON 파싱 실패: {e}")
+        
+        # 응답 데이터 검증
+        if not data:
+            raise Exception("빈 응답 데이터")
+        
+        if not isinstance(data, dict):
+            tracing.record_error(f"예상과 다른 응답 타입: {type(data)}", payload=data)
+            raise Exception(f"예상과 다른 응답 타입: {type(data)}")
+        
+        tracing.capture("response", data)
+        
+        results = []
+        
+        # Tavily 검색 결과 파싱
+        if "results" in data and data["results"]:
+            for idx, result in enumerate(data["results"]):
+                if not isinstance(result, dict):
+                    tracing.warning(f"결과 {idx}가 dict가 아님: {type(result)}")
+                    continue
                     
-                    search_result = SearchResult(
-                        source="web_search",
-                        content=result.get("content", ""),
-                        relevance_score=float(result.get("score", 0.5)),
-                        metadata={
-                            "title": result.get("title", ""),
-                            "url": result.get("url", ""),
-                            "published_date": result.get("published_date", ""),
-                            "raw_content": raw_content
-                        }
-                    )
-                    results.append(search_result)
-            else:
-                print("⚠️ 'results' 키가 없거나 비어있음")
-            
-            # Tavily 답변이 있는 경우 추가
-            if "answer" in data and data["answer"]:
-                print(f"📋 Tavily 답변 발견: {data['answer'][:100]}...")
-                answer_result = SearchResult(
-                    source="web_search_summary",
-                    content=str(data["answer"]),
-                    relevance_score=0.9,
+                # raw_content 안전 처리
+                raw_content = result.get("raw_content", "")
+                if raw_content and len(raw_content) > 1000:
+                    raw_content = raw_content[:1000]
+                
+                search_result = SearchResult(
+                    source="web_search",
+                    content=result.get("content", ""),
+                    relevance_score=float(result.get("score", 0.5)),
                     metadata={
-                        "type": "tavily_answer",
-                        "query": query
+                        "title": result.get("title", ""),
+                        "url": result.get("url", ""),
+                        "published_date": result.get("published_date", ""),
+                        "raw_content": raw_content
                     }
                 )
-                results.insert(0, answer_result)  # 답변을 맨 앞에 추가
-            
-            print(f"✅ 총 {len(results)}개 검색 결과 반환")
-            return results
-            
-        except requests.exceptions.RequestException as e:
-            print(f"❌ 웹 검색 API 요청 실패: {e}")
-            # 네트워크 에러 시 빈 리스트 반환 (상위에서 처리)
-            raise Exception(f"웹 검색 API 연결 실패: {e}")
-        except Exception as e:
-            print(f"❌ 웹 검색 중 오류 발생: {e}")
-            # 기타 에러 시 예외 발생 (상위에서 처리)
-            raise Exception(f"웹 검색 처리 실패: {e}")
+                results.append(search_result)
+        else:
+            tracing.debug("'results' 키가 없거나 비어있음")
+        
+        # Tavily 답변이 있는 경우 추가
+        if "answer" in data and data["answer"]:
+            answer_result = SearchResult(
+                source="web_search_summary",
+                content=str(data["answer"]),
+                relevance_score=0.9,
+                metadata={
+                    "type": "tavily_answer",
+                    "query": query
+                }
+            )
+            results.insert(0, answer_result)  # 답변을 맨 앞에 추가
+        
+        tracing.set_attribute("results", len(results))
+        return results
     
     def search_news(self, query: str, max_results: int = 3) -> List[SearchResult]:
         """
@@ -152,23 +288,23 @@ class WebSearchHandler:
                 "include_domains": ["news.google.com", "reuters.com", "bbc.com", "cnn.com"]
             }
             
-            response = requests.post(
+            response = self.session.post(
                 self.api_url,
                 headers=headers,
                 json=payload,
-                timeout=30
+                timeout=sync_timeout(self.timeout)
             )
             response.raise_for_status()
             
             try:
                 data = response.json()
             except Exception as e:
-                print(f"❌ 뉴스 검색 JSON 파싱 실패: {e}")
+                tracing.warning(f"뉴스 검색 JSON 파싱 실패: {e}")
                 return []
             
             # 응답 데이터 검증
             if not data or not isinstance(data, dict):
-                print("❌ 뉴스 검색 - 빈 응답 또는 잘못된 타입")
+                tracing.warning("뉴스 검색 - 빈 응답 또는 잘못된 타입")
                 return []
             
             results = []
@@ -194,5 +330,5 @@ class WebSearchHandler:
             return results
             
         except Exception as e:
-            print(f"뉴스 검색 중 오류 발생: {e}")
+            tracing.warning(f"뉴스 검색 중 오류 발생: {e}")
             return []